@@ -0,0 +1,136 @@
+"""
+BLE ingest benchmark: threaded queue pipeline vs single asyncio loop
+
+Runs both BLE pipelines against the in-process BLE stand-in (python.simulation.ble_standin)
+streaming synthetic ECG at the firmware rate:
+  - threaded: BLETransport (Bleak loop in a thread) -> queue.Queue -> StreamingSession.run()
+  - asyncio:  AsyncBLEStreamer, notification handler feeds the session on the same loop
+
+Measured for each pipeline:
+  - notification-to-packet latency: stand-in notify -> packet through detector and sinks
+  - notification-to-peak latency: same, for the packets in which an R-peak was emitted
+  - CPU time of the whole process per second of streaming
+
+Usage:
+    python3 -m python.benchmarks.ble_latency [seconds_of_ecg] [--load]
+
+--load adds a background thread doing pure-Python work (like a GUI redraw) to show how
+each pipeline copes with GIL contention.
+"""
+
+import asyncio
+import sys
+import threading
+import time
+
+import numpy as np
+
+from python.core.config import Config
+from python.core.sinks import Sink
+from python.core.streaming import StreamingSession
+from python.core.ble_transport import BLETransport
+from python.core.async_streaming import AsyncBLEStreamer
+from python.core.synthetic import synthetic_ecg
+from python.simulation.ble_standin import StandinDevice, StandinBackend
+
+
+class LatencySink(Sink):
+    """Stamps every packet against the stand-in's notify time for that packet."""
+
+    def __init__(self, device):
+        self.device = device
+        self.peak_pending = False
+        self.packet_latencies = []
+        self.peak_latencies = []
+
+    def on_peak(self, peak_index, sample_value, instantaneous_bpm):
+        self.peak_pending = True
+
+    def on_packet(self, packet, packet_count):
+        sent = self.device.notify_times.get(packet.timestamp)
+        if sent is not None:
+            latency = time.perf_counter() - sent
+            self.packet_latencies.append(latency)
+            if self.peak_pending:
+                self.peak_latencies.append(latency)
+        self.peak_pending = False
+
+
+def _background_load(stop):
+    # Roughly what the old update_plot did: build arrays from Python lists in a loop
+    values = list(range(1250))
+    while not stop.is_set():
+        np.array(values)
+        sum(v * v for v in values)
+
+
+def _make_session(seconds):
+    device = StandinDevice(synthetic_ecg(seconds), connect_delay=0.0)
+    backend = StandinBackend([device])
+    session = StreamingSession(
+        Config(), startup_grace=0.5, no_data_timeout=0.5, verbose=False
+    )
+    sink = session.add_sink(LatencySink(device))
+    return device, backend, session, sink
+
+
+def run_threaded(seconds):
+    device, backend, session, sink = _make_session(seconds)
+    session.transport = BLETransport(
+        scanner_class=backend.scanner_class, client_class=backend.client_class
+    )
+    session.start()
+    session._thread.join()
+    return sink
+
+
+def run_asyncio(seconds):
+    device, backend, session, sink = _make_session(seconds)
+    streamer = AsyncBLEStreamer(
+        session,
+        scanner_class=backend.scanner_class,
+        client_class=backend.client_class,
+    )
+    asyncio.run(streamer.run())
+    return sink
+
+
+def _summary(values):
+    ms = np.array(values) * 1000.0
+    if len(ms) == 0:
+        return "no samples"
+    return (
+        f"p50 {np.percentile(ms, 50):.3f} ms | p99 {np.percentile(ms, 99):.3f} ms | "
+        f"max {ms.max():.3f} ms ({len(ms)})"
+    )
+
+
+def main(seconds=20.0, load=False):
+    results = {}
+    for label, runner in (("threaded + queue", run_threaded), ("asyncio", run_asyncio)):
+        stop_load = threading.Event()
+        if load:
+            threading.Thread(
+                target=_background_load, args=(stop_load,), daemon=True
+            ).start()
+        cpu_start, wall_start = time.process_time(), time.perf_counter()
+        sink = runner(seconds)
+        cpu = time.process_time() - cpu_start
+        wall = time.perf_counter() - wall_start
+        stop_load.set()
+
+        results[label] = {
+            "packet_latency_ms": (np.array(sink.packet_latencies) * 1000).tolist(),
+            "peak_latency_ms": (np.array(sink.peak_latencies) * 1000).tolist(),
+            "cpu_percent": 100.0 * cpu / wall,
+        }
+        print(f"\n{label}{' (with background load)' if load else ''}")
+        print(f"  notify -> packet:  {_summary(sink.packet_latencies)}")
+        print(f"  notify -> peak:    {_summary(sink.peak_latencies)}")
+        print(f"  process CPU:       {100.0 * cpu / wall:.1f} %")
+    return results
+
+
+if __name__ == "__main__":
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    main(float(args[0]) if args else 20.0, load="--load" in sys.argv)
@@ -0,0 +1,104 @@
+"""
+BLE ingest under realistic link conditions (python.simulation.ble_standin.LinkModel)
+
+Streams synthetic ECG from the BLE stand-in through AsyncBLEStreamer and StreamingSession
+once per link profile: an ideal link, connection-event batching (30 ms like macOS, and a
+slow 100 ms interval that overflows the notify buffer), random notification loss, an
+un-negotiated 23-byte MTU, and a flaky link that disconnects every few seconds. The
+device is live (keeps sampling while the link is down), so every loss shows up as
+missing samples.
+
+Reported per profile:
+  - process CPU per second of streaming
+  - device -> host delay added by the link (mcu_to_arrival p50 / p99) and host
+    arrival -> processed latency (end_to_end p99)
+  - packets the device sampled, delivered, dropped on the link and parsed, packet IDs
+    the session counted as lost, parser resyncs and recorded gaps
+
+Usage:
+    python3 -m python.benchmarks.ble_link [seconds_of_ecg]
+"""
+
+import asyncio
+import sys
+import time
+
+from python.core.async_streaming import AsyncBLEStreamer
+from python.core.config import Config
+from python.core.streaming import StreamingSession
+from python.core.synthetic import synthetic_ecg
+from python.simulation.ble_standin import LinkModel, StandinDevice, StandinBackend
+
+PROFILES = {
+    "ideal": lambda: None,
+    "30 ms interval": lambda: LinkModel(connection_interval=0.030),
+    "100 ms interval, 2/event": lambda: LinkModel(
+        connection_interval=0.100, max_per_event=2
+    ),
+    "2 % loss": lambda: LinkModel(connection_interval=0.030, drop_rate=0.02, seed=1),
+    "MTU 23": lambda: LinkModel(connection_interval=0.030, mtu=23),
+    "flaky (360 disconnects/h)": lambda: LinkModel(
+        connection_interval=0.030,
+        disconnects_per_hour=360,
+        supervision_timeout=0.5,
+        down_for=0.5,
+        seed=2,
+    ),
+}
+
+
+def run(link, seconds):
+    device = StandinDevice(synthetic_ecg(seconds), live=True, link=link)
+    backend = StandinBackend([device])
+    session = StreamingSession(
+        Config(), startup_grace=2.0, no_data_timeout=1.5, verbose=False
+    )
+    streamer = AsyncBLEStreamer(
+        session,
+        scanner_class=backend.scanner_class,
+        client_class=backend.client_class,
+        max_reconnect_time=5.0,
+    )
+    cpu_start, wall_start = time.process_time(), time.perf_counter()
+    asyncio.run(streamer.run())
+    cpu = time.process_time() - cpu_start
+    wall = time.perf_counter() - wall_start
+
+    latency = session.latency.summary()
+    return {
+        "cpu_percent": 100.0 * cpu / wall,
+        "link_delay_p50_ms": latency.get("mcu_to_arrival", {}).get("p50_ms"),
+        "link_delay_p99_ms": latency.get("mcu_to_arrival", {}).get("p99_ms"),
+        "end_to_end_p99_ms": latency.get("end_to_end", {}).get("p99_ms"),
+        "packets_sampled": device.cursor,
+        "packets_delivered": device.packets_sent,
+        "packets_dropped": device.packets_dropped,
+        "packets_truncated": device.packets_truncated,
+        "packets_parsed": session.parser.packet_count,
+        "packets_lost": session.packets_lost,
+        "skipped_bytes": session.parser.skipped_bytes,
+        "disconnects": device.disconnects,
+        "gaps": len(session.gaps),
+    }
+
+
+def main(seconds=20.0):
+    results = {}
+    for name, make_link in PROFILES.items():
+        result = run(make_link(), seconds)
+        results[name] = result
+        delay = result["link_delay_p99_ms"]
+        print(
+            f"{name:26s} | CPU {result['cpu_percent']:4.1f} % | link delay p50 "
+            f"{result['link_delay_p50_ms'] or 0:6.2f} ms p99 {delay or 0:6.2f} ms | "
+            f"e2e p99 {result['end_to_end_p99_ms'] or 0:5.2f} ms | "
+            f"parsed {result['packets_parsed']}/{result['packets_sampled']} "
+            f"(dropped {result['packets_dropped']}, truncated {result['packets_truncated']}, "
+            f"IDs lost {result['packets_lost']}) | skipped {result['skipped_bytes']} B | "
+            f"{result['disconnects']} disconnects, {result['gaps']} gaps"
+        )
+    return results
+
+
+if __name__ == "__main__":
+    main(float(sys.argv[1]) if len(sys.argv) > 1 else 20.0)
@@ -0,0 +1,111 @@
+"""
+BLE auto-reconnect: time from link loss to streaming again
+
+Streams synthetic ECG from a live BLE stand-in (it keeps sampling while the link is down,
+like real_time_streaming_ble.ino) through AsyncBLEStreamer, drops the link part-way through
+(StandinBackend.drop_link) with the device out of range for a given time, and measures:
+  - time to resume: link dropped -> first packet through the detector after reconnecting
+  - reconnect attempts needed (from the backoff) and the gap recorded by the session
+  - continuity: the same detector/BPM objects before and after, samples keep counting,
+    and R-peaks are still detected after the gap (no 2 s recalibration)
+
+Usage:
+    python3 -m python.benchmarks.ble_reconnect [seconds_of_ecg] [connect_delay_s]
+"""
+
+import asyncio
+import sys
+import time
+
+from python.core.async_streaming import AsyncBLEStreamer
+from python.core.config import Config
+from python.core.sinks import Sink
+from python.core.streaming import StreamingSession
+from python.core.synthetic import synthetic_ecg
+from python.simulation.ble_standin import StandinDevice, StandinBackend
+
+
+class _ResumeSink(Sink):
+    """Stamps the first packet and first R-peak after the link was dropped."""
+
+    def __init__(self):
+        self.dropped_at = None
+        self.first_packet_after = None
+        self.peaks_after = 0
+
+    def on_packet(self, packet, packet_count):
+        if self.dropped_at is not None and self.first_packet_after is None:
+            self.first_packet_after = time.perf_counter()
+
+    def on_peak(self, peak_index, sample_value, instantaneous_bpm):
+        if self.first_packet_after is not None:
+            self.peaks_after += 1
+
+
+def run(down_for, seconds, connect_delay, drop_at=4.0):
+    device = StandinDevice(
+        synthetic_ecg(seconds), connect_delay=connect_delay, live=True
+    )
+    backend = StandinBackend([device])
+    session = StreamingSession(
+        Config(), startup_grace=1.0, no_data_timeout=0.5, verbose=False
+    )
+    sink = session.add_sink(_ResumeSink())
+    streamer = AsyncBLEStreamer(
+        session,
+        scanner_class=backend.scanner_class,
+        client_class=backend.client_class,
+    )
+    detector, bpm_detector = session.detector, session.bpm_detector
+
+    async def scenario():
+        task = asyncio.create_task(streamer.run())
+        await asyncio.sleep(drop_at)
+        samples_before = session.global_sample_counter
+        sink.dropped_at = time.perf_counter()
+        backend.drop_link(device.address, down_for=down_for)
+        await task
+        return samples_before
+
+    samples_before = asyncio.run(scenario())
+    gap = session.gaps[0] if session.gaps else None
+    return {
+        "down_for_s": down_for,
+        "time_to_resume_s": (
+            sink.first_packet_after - sink.dropped_at
+            if sink.first_packet_after is not None
+            else None
+        ),
+        "connect_attempts": sum(
+            1 for client in backend.clients if client.address == device.address
+        )
+        - 1,
+        "recorded_gap_s": gap["duration_s"] if gap else None,
+        "state_kept": session.detector is detector
+        and session.bpm_detector is bpm_detector
+        and session.global_sample_counter > samples_before,
+        "peaks_after_gap": sink.peaks_after,
+    }
+
+
+def main(seconds=12.0, connect_delay=0.05):
+    results = []
+    for down_for in (0.0, 0.5, 2.0):
+        result = run(down_for, seconds, connect_delay)
+        results.append(result)
+        resume = result["time_to_resume_s"]
+        print(
+            f"out of range {down_for:3.1f} s | time to resume "
+            f"{'never' if resume is None else f'{resume * 1000:7.1f} ms'} | "
+            f"{result['connect_attempts']} connect attempt(s) | "
+            f"recorded gap {result['recorded_gap_s']} s | state kept {result['state_kept']} | "
+            f"{result['peaks_after_gap']} peaks after the gap"
+        )
+    return results
+
+
+if __name__ == "__main__":
+    main(
+        float(sys.argv[1]) if len(sys.argv) > 1 else 12.0,
+        float(sys.argv[2]) if len(sys.argv) > 2 else 0.05,
+    )
@@ -0,0 +1,109 @@
+"""
+BLE startup: launch -> first parsed packet, with and without the device registry
+
+Each case runs in a fresh interpreter (so import cost is included) and streams from the BLE
+stand-in through AsyncBLEStreamer, as step4_stream_ble.py does. The stand-in is given
+realistic radio timings: a scan only sees the device after SCAN_DELAY_S (one advertising
+window) and a connect takes CONNECT_DELAY_S.
+  - cold:   empty registry - scan by name, then connect (the old path)
+  - cached: registry knows the address - direct connect, scan in parallel
+  - stale:  registry has a wrong address - the direct connect fails, the scan wins
+
+Reported per case: connect path taken, connect time and launch-to-first-packet (from the
+streamer's run metrics), plus the import time of the streaming modules.
+
+Usage:
+    python3 -m python.benchmarks.ble_startup
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+SCAN_DELAY_S = 2.0
+CONNECT_DELAY_S = 0.5
+
+
+def _worker(case, registry_path, launch_time):
+    """Runs inside the child interpreter and prints one JSON line with its measurements."""
+    import asyncio
+
+    import_start = time.time()
+    from python.core.async_streaming import AsyncBLEStreamer
+    from python.core.config import Config
+    from python.core.device_registry import DeviceRegistry
+    from python.core.streaming import StreamingSession
+    from python.core.synthetic import synthetic_ecg
+    from python.simulation.ble_standin import StandinDevice, StandinBackend
+
+    import_s = time.time() - import_start
+
+    device = StandinDevice(synthetic_ecg(5), connect_delay=CONNECT_DELAY_S)
+    backend = StandinBackend([device], scan_delay=SCAN_DELAY_S)
+    registry = DeviceRegistry(registry_path)
+    if case == "stale":
+        registry.remember(device.name, "EC:60:00:00:00:FF", connect_time_s=0.5)
+    session = StreamingSession(Config(), duration_sec=1.0, verbose=False)
+    streamer = AsyncBLEStreamer(
+        session,
+        scanner_class=backend.scanner_class,
+        client_class=backend.client_class,
+        registry=registry,
+        launch_time=launch_time,
+    )
+    asyncio.run(streamer.run())
+    print(json.dumps(dict(streamer.metrics, import_s=import_s)))
+
+
+def run_case(case, registry_path):
+    env = dict(os.environ)
+    project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+    env["PYTHONPATH"] = project_root + os.pathsep + env.get("PYTHONPATH", "")
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-m",
+            "python.benchmarks.ble_startup",
+            "--worker",
+            case,
+            registry_path,
+            repr(time.time()),
+        ],
+        capture_output=True,
+        text=True,
+        env=env,
+        cwd=tempfile.gettempdir(),
+    )
+    if result.returncode != 0:
+        last_line = result.stderr.strip().splitlines()[-1:] or ["no output"]
+        print(f"{case}: failed ({last_line[0]})")
+        return None
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    results = {}
+    with tempfile.TemporaryDirectory() as registry_dir:
+        registry_path = os.path.join(registry_dir, "ble_devices.json")
+        # cold fills the registry that cached then uses; stale overwrites it
+        for case in ("cold", "cached", "stale"):
+            result = run_case(case, registry_path)
+            if result is None:
+                continue
+            results[case] = result
+            print(
+                f"{case:6s} | path {result['connect_path']:6s} | connect {result['connect_s']:.2f} s | "
+                f"launch -> first packet {result['launch_to_first_packet_s']:.2f} s | "
+                f"imports {result['import_s']:.2f} s"
+            )
+    return results
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--worker":
+        _worker(sys.argv[2], sys.argv[3], float(sys.argv[4]))
+    else:
+        main()
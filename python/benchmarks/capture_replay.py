@@ -0,0 +1,127 @@
+"""
+Raw capture and replay: cost of the tee, and replaying a capture through the full pipeline
+
+Streams synthetic ECG at the gateway's real pace (one packet every 40 ms) through a
+StreamingSession with CSV loggers and the raw capture on, like a real run, then reports:
+  - cost of capturing: µs per chunk with the CaptureWriter off / on, and
+    CaptureWriter.write timed on its own (the on/off difference is within the noise)
+  - capture size per second of recording
+  - replays the capture and the run's streamed_raw_packets.csv through the full pipeline
+    (python.core.capture.replay) as fast as possible and at N x speed, and checks that
+    every replay finds exactly the R-peaks of the original run
+
+Usage:
+    python3 -m python.benchmarks.capture_replay [seconds_of_ecg]
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+import timeit
+
+from python.core.capture import CaptureWriter, replay
+from python.core.config import Config
+from python.core.headless import run_headless
+from python.core.sinks import CSVSink
+from python.core.streaming import StreamingSession, create_csv_loggers
+from python.core.synthetic import synthetic_ecg
+from python.core.transports import ReplayTransport
+
+
+def feed_cost(frames, capture_path=None, repeats=5):
+    """Fastest µs per chunk over `repeats` runs, optionally capturing to capture_path."""
+    best = float("inf")
+    for _ in range(repeats):
+        session = StreamingSession(Config(), verbose=False, track_latency=False)
+        if capture_path is not None:
+            session.capture = CaptureWriter(capture_path)
+        start = time.perf_counter()
+        for frame in frames:
+            session.feed(frame)
+        best = min(best, (time.perf_counter() - start) / len(frames))
+        if session.capture is not None:
+            session.capture.close()
+    return best * 1e6
+
+
+def record(samples, output_dir):
+    """The original run: CSV outputs plus raw_capture.ecgcap in output_dir."""
+    config = Config()
+    stop_flag = threading.Event()
+    loggers = create_csv_loggers(config, output_dir, stop_flag)
+    session = StreamingSession(
+        config,
+        ReplayTransport.from_samples(samples, speed=1.0),
+        stop_flag=stop_flag,
+        verbose=False,
+    )
+    session.add_sink(CSVSink(*loggers))
+    session.capture = session.add_sink(
+        CaptureWriter(os.path.join(output_dir, "raw_capture.ecgcap"), "synthetic")
+    )
+    run_headless(session, loggers=loggers)
+    return session
+
+
+def main(seconds=20.0):
+    samples = synthetic_ecg(seconds)
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)  # CSVLogger writes run_metadata.json to the working directory
+        frames = ReplayTransport.from_samples(samples).frames
+        off = feed_cost(frames)
+        on = feed_cost(frames, os.path.join(tmp, "cost.ecgcap"))
+        writer = CaptureWriter(os.path.join(tmp, "write.ecgcap"))
+        number = 100_000
+        write_us = (
+            min(
+                timeit.repeat(
+                    lambda: writer.write(frames[0], time.perf_counter()),
+                    number=number,
+                    repeat=5,
+                )
+            )
+            / number
+            * 1e6
+        )
+        writer.close()
+        print(
+            f"capture off {off:.2f} µs/chunk | on {on:.2f} µs/chunk | "
+            f"CaptureWriter.write alone {write_us:.2f} µs/chunk "
+            f"({100.0 * write_us / off:.1f} % of a chunk)"
+        )
+
+        original_dir = os.path.join(tmp, "original")
+        os.makedirs(original_dir)
+        original = record(samples, original_dir)
+        capture_path = os.path.join(original_dir, "raw_capture.ecgcap")
+        print(
+            f"capture: {os.path.getsize(capture_path) / seconds / 1e3:.2f} kB per second of "
+            f"recording (streamed_raw_packets.csv: "
+            f"{os.path.getsize(os.path.join(original_dir, 'streamed_raw_packets.csv')) / seconds / 1e3:.2f} kB/s)"
+        )
+
+        sources = {
+            "capture": capture_path,
+            "csv": os.path.join(original_dir, "streamed_raw_packets.csv"),
+        }
+        for source, path in sources.items():
+            for speed in (None, 20.0):
+                session = replay(path, os.path.join(tmp, f"replay_{source}"), speed)
+                elapsed = session.replay_seconds
+                same = (
+                    session.detector.detected_peaks == original.detector.detected_peaks
+                )
+                label = "max" if speed is None else f"{speed:g}x"
+                results[(source, label)] = {"elapsed_s": elapsed, "same_peaks": same}
+                print(
+                    f"replay {source:7s} at {label:>3s}: {elapsed:6.2f} s for {seconds:g} s "
+                    f"({seconds / elapsed:6.1f}x real time) | same R-peaks: {same}"
+                )
+    return results
+
+
+if __name__ == "__main__":
+    main(float(sys.argv[1]) if len(sys.argv) > 1 else 20.0)
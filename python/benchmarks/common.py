@@ -0,0 +1,5 @@
+# note: shared constants of the benchmarks (the ECG comes from python.core.synthetic, and
+# paced gateway replays from ReplayTransport.from_samples(samples, speed=1.0))
+
+PACKET_SIZE = 28  # bytes of a gateway frame
+PACKET_INTERVAL_S = 0.040  # 10 samples at 250 Hz
@@ -0,0 +1,299 @@
+"""
+Streaming vs batch equivalence: do BatchTester and StreamingSession find the same peaks?
+
+Every record goes through each batch path (BatchTester of the real-time pipeline, and of
+the pre-recorded pipeline when wfdb is installed - it keeps its own copy of the detector)
+and through the streaming path: the record is packetized like the gateway firmware does
+(ReplayTransport.from_samples) and fed to StreamingSession.feed in chunks of several sizes
+(1 byte, odd sizes that split frames, whole frames, the whole recording), so the parser's
+reassembly is part of the check. Records are spread over a process pool.
+
+Compared exactly, against the first batch path:
+  - r_peaks             detected sample indices
+  - instantaneous_bpm   BPM history (one value per RR interval)
+  - avg_bpm_5s          5 s windowed BPM at the last sample
+
+Records are synthetic ECG (SyntheticECG, seeded: heart rate and rhythm, variability,
+amplitude, baseline and noise vary per record) and, with --physionet, every --segment seconds of every record in a PhysioNet
+folder (e.g. Icentia11k). Both paths get the same samples: the tail that does not fill a
+packet is dropped, as the firmware never sends it. The first divergence of every record
+is printed, all of them go to the JSON report, and the run exits with status 1 if any
+record diverged.
+
+Usage:
+    python3 -m python.benchmarks.equivalence [--synthetic=200] [--seconds=60]
+        [--physionet=folder] [--segment=30] [--chunks=1,13,28,1000,0] [--workers=N]
+        [--output=equivalence_report.json]
+    (chunk size 0 = the whole recording in one feed)
+"""
+
+import concurrent.futures
+import functools
+import glob
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+from python.core.config import Config
+from python.core.streaming import StreamingSession
+from python.core.synthetic import synthetic_ecg
+from python.core.transports import ReplayTransport
+
+DEFAULT_CHUNK_SIZES = (1, 13, 28, 1000, 0)
+FIELDS = ("r_peaks", "instantaneous_bpm", "avg_bpm_5s")
+FS = 250
+SAMPLES_PER_PACKET = 10
+
+
+def batch_testers():
+    """
+    Returns:
+        dict of name -> BatchTester class, for every batch pipeline that can be imported
+    """
+    from python.real_time_testing_pipeline.step3_batchprocess_ecg_realtime import (
+        BatchTester,
+    )
+
+    testers = {"batch (real-time)": BatchTester}
+    try:
+        from python.pre_recorded_testing_pipeline.step3_batchprocess import (
+            BatchTester as PreRecordedBatchTester,
+        )
+    except ImportError:
+        pass  # needs wfdb and matplotlib (through step1)
+    else:
+        testers["batch (pre-recorded)"] = PreRecordedBatchTester
+    return testers
+
+
+# ---------------------------------------------------------------------------- records
+def synthetic_records(count, seconds):
+    return [("synthetic", index, seconds) for index in range(count)]
+
+
+def physionet_records(folder, segment):
+    """Every `segment` seconds of every record (.hea) in folder, as record specs."""
+    import wfdb
+
+    records = []
+    for header in sorted(
+        glob.glob(os.path.join(folder, "**", "*.hea"), recursive=True)
+    ):
+        path = header[: -len(".hea")]
+        length = wfdb.rdheader(path).sig_len
+        step = int(segment * FS)
+        for start in range(0, length - step + 1, step):
+            records.append(("physionet", path, start, start + step))
+    return records
+
+
+def record_label(spec):
+    if spec[0] == "synthetic":
+        return f"synthetic #{spec[1]}"
+    _, path, start, end = spec
+    return f"{os.path.basename(path)} [{start / FS:g}-{end / FS:g} s]"
+
+
+def load_record(spec):
+    """
+    Returns:
+        list of 12-bit ADC samples of the record
+    """
+    if spec[0] == "synthetic":
+        _, index, seconds = spec
+        rng = np.random.default_rng(index)
+        return synthetic_ecg(
+            seconds,
+            bpm=rng.uniform(40, 180),
+            heartbeat_type="irregular" if rng.random() < 0.25 else "regular",
+            hrv=rng.uniform(0.0, 0.1),
+            noise_mv=rng.uniform(0.0, 0.05),
+            gain=rng.uniform(120, 720),  # R waves of 150 to 900 ADC counts
+            baseline=rng.uniform(1.2, 2.0),
+            seed=index,
+        )
+
+    import wfdb
+    from python.pre_recorded_testing_pipeline.step1_generate_dataset_physionet import (
+        generateData,
+    )
+
+    _, path, start, end = spec
+    record = wfdb.rdrecord(path, sampfrom=start, sampto=end)
+    return generateData(path).convert_to_digital(record.p_signal[:, 0])
+
+
+# ---------------------------------------------------------------------------- paths
+def run_batch(tester_class, samples):
+    results = tester_class(fs=FS, use_filter=False).run(samples)
+    results["avg_bpm_5s"] = float(results["avg_bpm_5s"])
+    return results
+
+
+def run_stream(samples, chunk_size):
+    """Feed the packetized record to a StreamingSession `chunk_size` bytes at a time."""
+    data = b"".join(ReplayTransport.from_samples(samples).frames)
+    session = StreamingSession(Config(), verbose=False, track_latency=False)
+    last_time = 0.0
+    step = chunk_size or len(data)
+    for start in range(0, len(data), step):
+        packets = session.feed(data[start : start + step])
+        if packets:
+            last_time = packets[-1].sample_times[-1]
+    return {
+        "r_peaks": session.detector.detected_peaks,
+        "instantaneous_bpm": session.bpm_detector.bpm_history,
+        "avg_bpm_5s": float(session.bpm_detector.calculate_bpm_in_window(last_time)),
+    }
+
+
+def first_divergence(expected, actual):
+    """
+    Returns:
+        None if equal, else {"index", "expected", "actual"} of the first difference
+        (index None for a single value; a missing element is None)
+    """
+    if not isinstance(expected, list):
+        if expected == actual:
+            return None
+        return {"index": None, "expected": expected, "actual": actual}
+    for index in range(max(len(expected), len(actual))):
+        left = expected[index] if index < len(expected) else None
+        right = actual[index] if index < len(actual) else None
+        if left != right:
+            return {"index": index, "expected": left, "actual": right}
+    return None
+
+
+def check_record(spec, chunk_sizes):
+    """
+    Runs in a pool worker: every path over one record, diffed against the first batch path.
+
+    Returns:
+        dict with the record's label, sizes, and its divergences (the first one per path
+        and field, in path order)
+    """
+    started = time.process_time()
+    samples = load_record(spec)
+    samples = samples[: len(samples) - len(samples) % SAMPLES_PER_PACKET]
+
+    paths = {
+        name: functools.partial(run_batch, tester, samples)
+        for name, tester in batch_testers().items()
+    }
+    for chunk_size in chunk_sizes:
+        name = f"stream (chunk {chunk_size or 'all'})"
+        paths[name] = functools.partial(run_stream, samples, chunk_size)
+
+    reference_name = None
+    divergences = []
+    for name, run in paths.items():
+        results = run()
+        if reference_name is None:
+            reference_name, reference = name, results
+            continue
+        for field in FIELDS:
+            divergence = first_divergence(reference[field], results[field])
+            if divergence is not None:
+                divergence.update(path=name, field=field)
+                divergences.append(divergence)
+    return {
+        "record": record_label(spec),
+        "samples": len(samples),
+        "peaks": len(reference["r_peaks"]),
+        "reference": reference_name,
+        "divergences": divergences,
+        "cpu_s": round(time.process_time() - started, 3),
+    }
+
+
+def describe(divergence):
+    where = "" if divergence["index"] is None else f"[{divergence['index']}]"
+    return (
+        f"{divergence['path']} {divergence['field']}{where}: "
+        f"{divergence['expected']} vs {divergence['actual']}"
+    )
+
+
+def main(
+    synthetic=200,
+    seconds=60.0,
+    physionet=None,
+    segment=30.0,
+    chunk_sizes=DEFAULT_CHUNK_SIZES,
+    workers=None,
+    output="equivalence_report.json",
+):
+    records = synthetic_records(synthetic, seconds)
+    if physionet:
+        records += physionet_records(physionet, segment)
+    testers = list(batch_testers())
+    print(
+        f"🔁 {len(records)} records x ({', '.join(testers)} + {len(chunk_sizes)} "
+        f"streaming chunk sizes) on {workers or os.cpu_count()} worker(s)"
+    )
+    if len(testers) == 1:
+        print(
+            "   (pre-recorded BatchTester skipped: wfdb/matplotlib are not installed)"
+        )
+
+    started = time.perf_counter()
+    results = []
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+        check = functools.partial(check_record, chunk_sizes=chunk_sizes)
+        chunksize = max(1, len(records) // (8 * (workers or os.cpu_count() or 1)))
+        for result in pool.map(check, records, chunksize=chunksize):
+            results.append(result)
+            if result["divergences"]:
+                print(f"❌ {result['record']}: {describe(result['divergences'][0])}")
+            if len(results) % 100 == 0:
+                print(f"   {len(results)}/{len(records)} records checked")
+    elapsed = time.perf_counter() - started
+
+    divergent = [result for result in results if result["divergences"]]
+    total_samples = sum(result["samples"] for result in results)
+    summary = {
+        "records": len(results),
+        "divergent_records": len(divergent),
+        "samples_per_path": total_samples,
+        "paths": testers + [f"stream (chunk {size or 'all'})" for size in chunk_sizes],
+        "wall_s": round(elapsed, 2),
+        "cpu_s": round(sum(result["cpu_s"] for result in results), 2),
+    }
+    with open(output, "w") as f:
+        json.dump({"summary": summary, "records": results}, f, indent=2)
+
+    print(
+        f"\n{len(results)} records ({total_samples / FS / 3600:.2f} h of ECG per path) "
+        f"in {elapsed:.1f} s ({summary['cpu_s']:.0f} s CPU)"
+    )
+    if divergent:
+        print(f"❌ {len(divergent)} record(s) diverged, see {output}")
+    else:
+        print("✅ Streaming and batch agree on every record")
+    print(f"📄 Report saved to {output}")
+    return summary
+
+
+if __name__ == "__main__":
+    options = dict(
+        arg[2:].split("=", 1) if "=" in arg else (arg[2:], True)
+        for arg in sys.argv[1:]
+        if arg.startswith("--")
+    )
+    summary = main(
+        synthetic=int(options.get("synthetic", 200)),
+        seconds=float(options.get("seconds", 60.0)),
+        physionet=options.get("physionet"),
+        segment=float(options.get("segment", 30.0)),
+        chunk_sizes=tuple(
+            int(size)
+            for size in str(options.get("chunks", "1,13,28,1000,0")).split(",")
+        ),
+        workers=int(options["workers"]) if "workers" in options else None,
+        output=options.get("output", "equivalence_report.json"),
+    )
+    sys.exit(1 if summary["divergent_records"] else 0)
@@ -0,0 +1,142 @@
+"""
+Robustness and recovery cost of the host pipeline under injected link faults
+
+Replays synthetic ECG (ReplayTransport at N x real pace) through StreamingSession once
+cleanly and once per fault profile, each with its own seeded FaultInjector
+(python.core.faults) between the transport and the session. The last row sends the same
+data through the BLE stand-in and AsyncBLEStreamer with the faults applied to the
+notifications (faulty_client_class).
+
+Reported per profile (FaultReport, compared with the clean run):
+  - faults injected
+  - samples recovered (% of the clean run), packet IDs counted as lost, duplicated and
+    reordered (checked against the duplicates the injector made, unless chunks were
+    corrupted or truncated)
+  - R-peaks matched / missed / extra, and how far the detector's sample indices drifted
+    from the clean run's (final and max, in samples)
+  - p99 latency added to the arrival -> processed path and to the MCU -> arrival path
+    (bursts hold chunks back; a corrupted timestamp makes the latter meaningless)
+  - CPU: all chunks that needed a parser resync, and the average cost of such a chunk vs
+    a normal one
+
+Usage:
+    python3 -m python.benchmarks.fault_injection [seconds_of_ecg] [speed] [--faults=spec]
+    e.g. --faults=corrupt=0.01,drop=0.02,seed=3 runs just that profile
+"""
+
+import asyncio
+import sys
+
+from python.core.async_streaming import AsyncBLEStreamer
+from python.core.config import Config
+from python.core.faults import FaultInjector, FaultyTransport, FaultReport
+from python.core.faults import faulty_client_class
+from python.core.streaming import StreamingSession
+from python.core.synthetic import synthetic_ecg
+from python.core.transports import ReplayTransport
+from python.simulation.ble_standin import StandinDevice, StandinBackend
+
+PROFILES = {
+    "corrupt 1 %": "corrupt=0.01",
+    "drop 2 %": "drop=0.02",
+    "duplicate 2 %": "duplicate=0.02",
+    "truncate 1 %": "truncate=0.01",
+    "bursts 2 % x 10": "burst=0.02",
+    "disconnect 0.5 % x 12": "disconnect=0.005",
+    "all of the above": (
+        "corrupt=0.01,drop=0.02,duplicate=0.02,truncate=0.01,burst=0.02,disconnect=0.005"
+    ),
+}
+
+
+def run_replay(samples, speed, injector=None):
+    """Read the transport until it is exhausted (StreamingSession.run without the prints)."""
+    session = StreamingSession(Config(), verbose=False)
+    report = FaultReport(injector).attach(session)
+    transport = ReplayTransport.from_samples(samples, speed=speed)
+    if injector is not None:
+        transport = FaultyTransport(transport, injector)
+    while True:
+        data = transport.read(timeout=0.05)
+        if data is None:
+            break
+        if data:
+            session.feed(data, transport.last_arrival)
+    return session, report
+
+
+def run_ble(samples, speed, injector):
+    device = StandinDevice(samples, packet_interval=0.040 / speed)
+    backend = StandinBackend([device])
+    session = StreamingSession(
+        Config(), startup_grace=1.0, no_data_timeout=1.0, verbose=False
+    )
+    report = FaultReport(injector).attach(session)
+    streamer = AsyncBLEStreamer(
+        session,
+        scanner_class=backend.scanner_class,
+        client_class=faulty_client_class(backend.client_class, injector),
+        reconnect=False,
+    )
+    asyncio.run(streamer.run())
+    return session, report
+
+
+def print_row(name, result):
+    peaks = result["peaks"]
+    link = result.get("mcu_to_arrival_p99_added_ms", 0)
+    # A corrupted timestamp byte throws the MCU clock baseline off by hours
+    link = (
+        f"{link:6.2f} ms link"
+        if abs(link) < 60_000
+        else "  (corrupted timestamps) link"
+    )
+    print(
+        f"{name:24s} | faults {sum(result['faults'].values()):4d} | samples "
+        f"{result['samples_recovered_percent']:6.2f} % | IDs lost {result['packet_ids_lost']:4d} "
+        f"dup {result['packet_ids_duplicated']:4d} reord {result['packet_ids_reordered']} | "
+        f"peaks {peaks['matched']}/{peaks['matched'] + peaks['missed']} +{peaks['extra']} | "
+        f"drift {peaks.get('drift_final_samples', 0):5d} (max {peaks.get('drift_max_samples', 0)}) | "
+        f"p99 added {result.get('end_to_end_p99_added_ms', 0):6.2f} ms e2e, "
+        f"{link} | resync "
+        f"{result['resync_chunks']} chunks {result['resync_cpu_ms']:.2f} ms "
+        f"({result['resync_chunk_us']:.1f} vs {result['normal_chunk_us']:.1f} µs/chunk)"
+    )
+
+
+def main(seconds=120.0, speed=20.0, spec=None):
+    samples = synthetic_ecg(seconds)
+    clean, _ = run_replay(samples, speed)
+    print(
+        f"clean: {clean.global_sample_counter} samples, "
+        f"{len(clean.detector.detected_peaks)} R-peaks ({seconds:g} s of ECG at {speed:g}x)"
+    )
+    profiles = {"custom": spec} if spec else PROFILES
+    results = {}
+    for name, profile in profiles.items():
+        injector = FaultInjector.from_spec(profile)
+        session, report = run_replay(samples, speed, injector)
+        results[name] = report.summary(clean)
+        print_row(name, results[name])
+        report.check_packet_ids()
+
+    name = f"BLE stand-in: {'custom' if spec else 'all'}"
+    injector = FaultInjector.from_spec(spec or PROFILES["all of the above"])
+    session, report = run_ble(samples, speed, injector)
+    results[name] = report.summary(clean)
+    print_row(name, results[name])
+    report.check_packet_ids()
+    return results
+
+
+if __name__ == "__main__":
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    spec = None
+    for arg in sys.argv[1:]:
+        if arg.startswith("--faults="):
+            spec = arg.split("=", 1)[1]
+    main(
+        float(args[0]) if len(args) > 0 else 120.0,
+        float(args[1]) if len(args) > 1 else 20.0,
+        spec,
+    )
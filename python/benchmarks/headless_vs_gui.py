@@ -0,0 +1,146 @@
+"""
+Headless vs GUI streaming: startup time, peak RSS and CPU per stream
+
+Each mode runs in a fresh interpreter (so import cost and RSS are real) and streams the
+same synthetic ECG through StreamingSession from a paced replay transport at the firmware
+rate, with the CSV loggers on:
+  - headless: python.core.headless StatusLine, no GUI modules imported
+  - gui:      the PyQtGraph window from python.core.live_plot (offscreen Qt platform)
+
+Reported per mode:
+  - startup: interpreter launch -> pipeline ready to read its first packet
+  - peak RSS of the process
+  - CPU time per second of streaming
+  - whether PyQt5 / pyqtgraph / matplotlib / wfdb ended up in sys.modules
+
+Usage:
+    python3 -m python.benchmarks.headless_vs_gui [seconds_of_ecg]
+"""
+
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+GUI_MODULES = ("PyQt5", "pyqtgraph", "matplotlib", "wfdb")
+
+
+def _worker(mode, seconds, launch_time):
+    """Runs inside the child interpreter and prints one JSON line with its measurements."""
+    from python.core.config import Config
+    from python.core.sinks import CSVSink
+    from python.core.streaming import StreamingSession, create_csv_loggers
+    from python.core.synthetic import synthetic_ecg
+    from python.core.transports import ReplayTransport
+
+    if mode == "gui":
+        # Import the GUI stack first: fail before any logger thread exists if it is missing
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+        from PyQt5 import QtCore
+        from python.core.live_plot import build_window
+        from python.core.sinks import PlotBuffer
+
+    config = Config()
+    output_dir = tempfile.mkdtemp(prefix="headless_vs_gui_")
+    stop_flag = threading.Event()
+    csv_logger, bpm_logger = create_csv_loggers(config, output_dir, stop_flag)
+    session = StreamingSession(
+        config,
+        ReplayTransport.from_samples(synthetic_ecg(seconds), speed=1.0),
+        stop_flag=stop_flag,
+        verbose=False,
+    )
+    session.add_sink(CSVSink(csv_logger, bpm_logger))
+
+    if mode == "headless":
+        from python.core.headless import StatusLine
+
+        session.add_sink(StatusLine(stream=sys.stderr))
+        startup = time.time() - launch_time
+        cpu_start, wall_start = time.process_time(), time.perf_counter()
+        session.run()
+    else:
+        plot_buffer = session.add_sink(PlotBuffer(config.max_samples_plotted))
+        app, win, timer = build_window(plot_buffer, lambda event: event.accept())
+        win.show()
+        startup = time.time() - launch_time
+        cpu_start, wall_start = time.process_time(), time.perf_counter()
+        session.start()
+
+        def quit_when_done():
+            if not session._thread.is_alive():
+                app.quit()
+
+        done_timer = QtCore.QTimer()
+        done_timer.timeout.connect(quit_when_done)
+        done_timer.start(100)
+        app.exec_()
+
+    cpu = time.process_time() - cpu_start
+    wall = time.perf_counter() - wall_start
+    stop_flag.set()
+    for logger in (csv_logger, bpm_logger):
+        logger._thread.join()
+
+    print(
+        json.dumps(
+            {
+                "startup_s": startup,
+                "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+                / 1024.0,
+                "cpu_percent": 100.0 * cpu / wall,
+                "gui_modules": [m for m in GUI_MODULES if m in sys.modules],
+            }
+        )
+    )
+
+
+def run_mode(mode, seconds):
+    env = dict(os.environ)
+    project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+    env["PYTHONPATH"] = project_root + os.pathsep + env.get("PYTHONPATH", "")
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-m",
+            "python.benchmarks.headless_vs_gui",
+            "--worker",
+            mode,
+            str(seconds),
+            repr(time.time()),
+        ],
+        capture_output=True,
+        text=True,
+        env=env,
+        cwd=tempfile.gettempdir(),  # the loggers drop run_metadata.json in the cwd
+    )
+    if result.returncode != 0:
+        last_line = result.stderr.strip().splitlines()[-1:] or ["no output"]
+        print(f"{mode}: failed ({last_line[0]})")
+        return None
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main(seconds=10.0):
+    results = {}
+    for mode in ("headless", "gui"):
+        result = run_mode(mode, seconds)
+        if result is None:
+            continue
+        results[mode] = result
+        print(
+            f"{mode:9s} startup {result['startup_s']:.2f} s | peak RSS {result['peak_rss_mb']:.0f} MB | "
+            f"CPU {result['cpu_percent']:.1f} % | GUI modules: {', '.join(result['gui_modules']) or 'none'}"
+        )
+    return results
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--worker":
+        _worker(sys.argv[2], float(sys.argv[3]), float(sys.argv[4]))
+    else:
+        main(float(sys.argv[1]) if len(sys.argv) > 1 else 10.0)
@@ -0,0 +1,61 @@
+"""
+Cost of the per-stage latency tracking in StreamingSession
+
+Feeds the same synthetic ECG through StreamingSession one packet per chunk (the BLE case:
+one notification per packet, so the most chunks per sample) with track_latency off and on,
+alternating the two several times and keeping the fastest run of each.
+
+Reported:
+  - µs per packet with tracking off / on, and the difference
+  - what that difference costs at the firmware rate (25 packets/s) in CPU per second
+  - the stage summary the tracker produced (what ends up in latency_summary.json)
+
+Usage:
+    python3 -m python.benchmarks.latency_overhead [seconds_of_ecg] [repeats]
+"""
+
+import sys
+import time
+
+from python.benchmarks.common import PACKET_INTERVAL_S
+from python.core.config import Config
+from python.core.data_handling import encode_packet
+from python.core.streaming import StreamingSession
+from python.core.synthetic import synthetic_ecg
+
+
+def run(frames, track_latency):
+    session = StreamingSession(Config(), verbose=False, track_latency=track_latency)
+    start = time.perf_counter()
+    for frame in frames:
+        session.feed(frame)
+    return (time.perf_counter() - start) / len(frames), session
+
+
+def main(seconds=120.0, repeats=5):
+    samples = synthetic_ecg(seconds)
+    frames = [
+        encode_packet(i % 255 + 1, i * 40, samples[i * 10 : i * 10 + 10])
+        for i in range(len(samples) // 10)
+    ]
+    best = {False: float("inf"), True: float("inf")}
+    for _ in range(repeats):
+        for track_latency in (False, True):
+            per_packet, session = run(frames, track_latency)
+            best[track_latency] = min(best[track_latency], per_packet)
+
+    extra = best[True] - best[False]
+    print(
+        f"off {best[False] * 1e6:.2f} µs/packet | on {best[True] * 1e6:.2f} µs/packet | "
+        f"+{extra * 1e6:.2f} µs ({100.0 * extra / best[False]:.1f} %) | "
+        f"{100.0 * extra / PACKET_INTERVAL_S:.4f} % of a CPU at 25 packets/s"
+    )
+    session.latency.print_summary()
+    return {"off_us": best[False] * 1e6, "on_us": best[True] * 1e6}
+
+
+if __name__ == "__main__":
+    main(
+        float(sys.argv[1]) if len(sys.argv) > 1 else 120.0,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 5,
+    )
@@ -0,0 +1,103 @@
+"""
+Multi-device BLE scaling: host CPU and notification loss vs number of devices
+
+Streams synthetic ECG from N BLE stand-in devices (python.simulation.ble_standin) through
+MultiDeviceBLEManager - one asyncio loop, one session + CSV loggers per device - and
+reports for each N:
+  - process CPU per second of streaming (and per device)
+  - notification loss: packets notified by the stand-ins that never reached a session
+  - worst per-device notify -> packet latency (p99)
+
+Usage:
+    python3 -m python.benchmarks.multi_device [seconds_of_ecg] [max_devices]
+"""
+
+import asyncio
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from python.core.config import Config
+from python.core.multi_device import MultiDeviceBLEManager
+from python.core.sinks import Sink
+from python.core.synthetic import synthetic_ecg
+from python.simulation.ble_standin import StandinDevice, StandinBackend
+
+
+class _NotifyLatencySink(Sink):
+    def __init__(self, device):
+        self.device = device
+        self.latencies = []
+
+    def on_packet(self, packet, packet_count):
+        sent = self.device.notify_times.get(packet.timestamp)
+        if sent is not None:
+            self.latencies.append(time.perf_counter() - sent)
+
+
+def run(n_devices, seconds):
+    samples = synthetic_ecg(seconds)
+    devices = [
+        StandinDevice(samples, address=f"EC:60:00:00:00:{i + 1:02X}", connect_delay=0.0)
+        for i in range(n_devices)
+    ]
+    backend = StandinBackend(devices)
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        manager = MultiDeviceBLEManager(
+            Config(),
+            output_dir,
+            scan_timeout=0.0,
+            scanner_class=backend.scanner_class,
+            client_class=backend.client_class,
+        )
+        asyncio.run(manager.discover())
+        sinks = []
+        for stream, device in zip(manager.streams, devices):
+            stream.session.startup_grace = 0.5
+            stream.session.no_data_timeout = 0.5
+            sinks.append(stream.session.add_sink(_NotifyLatencySink(device)))
+
+        cpu_start, wall_start = time.process_time(), time.perf_counter()
+        asyncio.run(manager.run())
+        cpu = time.process_time() - cpu_start
+        wall = time.perf_counter() - wall_start
+
+    sent = sum(device.packets_sent for device in devices)
+    received = sum(stream.session.parser.packet_count for stream in manager.streams)
+    p99 = max(
+        (np.percentile(sink.latencies, 99) * 1000 if sink.latencies else 0.0)
+        for sink in sinks
+    )
+    return {
+        "devices": n_devices,
+        "cpu_percent": 100.0 * cpu / wall,
+        "packets_sent": sent,
+        "packets_received": received,
+        "loss_percent": 100.0 * (sent - received) / sent if sent else 0.0,
+        "worst_p99_latency_ms": p99,
+    }
+
+
+def main(seconds=10.0, max_devices=16):
+    results = []
+    n = 1
+    while n <= max_devices:
+        result = run(n, seconds)
+        results.append(result)
+        print(
+            f"N={n:3d} | CPU {result['cpu_percent']:5.1f} % ({result['cpu_percent'] / n:.2f} %/device) | "
+            f"loss {result['loss_percent']:.2f} % ({result['packets_received']}/{result['packets_sent']}) | "
+            f"worst p99 notify->packet {result['worst_p99_latency_ms']:.2f} ms"
+        )
+        n *= 2
+    return results
+
+
+if __name__ == "__main__":
+    main(
+        float(sys.argv[1]) if len(sys.argv) > 1 else 10.0,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 16,
+    )
@@ -0,0 +1,68 @@
+"""
+Live plot data-preparation benchmark: full window vs min/max decimation
+
+Measures what update_plot does before PyQtGraph draws - snapshot the PlotBuffer window,
+decimate to the plot width, copy to float arrays - and how many points reach setData
+(drawing cost in PyQtGraph is roughly linear in that number). Runs without Qt.
+
+Windows compared:
+  - 5 s at 250 Hz (today's default)
+  - 60 s at 1 kHz
+
+Usage:
+    python3 -m python.benchmarks.plot_render [plot_width_px]
+"""
+
+import sys
+import time
+
+import numpy as np
+
+from python.core.render import minmax_decimate
+from python.core.sinks import PlotBuffer
+from python.core.synthetic import synthetic_ecg
+
+
+class _Packet:
+    def __init__(self, samples, sample_times):
+        self.samples = samples
+        self.sample_times = sample_times
+
+
+def _filled_buffer(window_s, fs):
+    n = int(window_s * fs)
+    plot_buffer = PlotBuffer(n)
+    samples = synthetic_ecg(window_s * 2, fs=fs)
+    for i in range(0, len(samples) - 10, 10):
+        times = [(i + k) / fs for k in range(10)]
+        plot_buffer.on_packet(_Packet(samples[i : i + 10], times), i // 10 + 1)
+    return plot_buffer
+
+
+def time_frame(plot_buffer, width, decimate, repeats=200):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        x, y, total = plot_buffer.snapshot()
+        if decimate:
+            x, y = minmax_decimate(x, y, width)
+        # The (x, y) arrays handed to setData
+        frame = np.array(x, dtype=float), np.array(y, dtype=float)
+    return (time.perf_counter() - start) / repeats, len(frame[1])
+
+
+def main(width=1200):
+    results = {}
+    for window_s, fs in ((5, 250), (60, 1000)):
+        plot_buffer = _filled_buffer(window_s, fs)
+        for decimate in (False, True):
+            seconds, points = time_frame(plot_buffer, width, decimate)
+            label = f"{window_s} s @ {fs} Hz, {'min/max decimated' if decimate else 'full window'}"
+            results[label] = {"prep_ms": seconds * 1000, "points": points}
+            print(
+                f"{label:45s} prep {seconds * 1000:7.3f} ms | {points:6d} points to setData"
+            )
+    return results
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1200)
@@ -0,0 +1,169 @@
+"""
+Acquisition latency under heavy GUI load: one process vs acquisition process + shared ring
+
+A paced replay transport releases synthetic 28-byte gateway frames at the firmware rate
+(one packet every 40 ms). A "GUI" thread in the main process does what a busy PyQtGraph
+front-end does - copy the plot window every frame and burn pure-Python CPU drawing it -
+without ever sleeping.
+
+  - single process: StreamingSession thread + PlotBuffer, GUI thread in the same process
+    (the old layout: both fight for one GIL)
+  - split: AcquisitionProcess runs the session; the GUI thread reads the SharedRing
+
+Measured: release-to-processed latency of every packet (frame due time -> packet through
+the detector and all sinks) and of packets that produced an R-peak.
+
+Usage:
+    python3 -m python.benchmarks.process_split [seconds_of_ecg]
+"""
+
+import functools
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+from python.core.config import Config
+from python.core.sinks import Sink, CSVSink, PlotBuffer
+from python.core.streaming import StreamingSession, create_csv_loggers
+from python.core.acquisition import AcquisitionProcess
+from python.core.synthetic import synthetic_ecg
+from python.core.transports import ReplayTransport
+
+
+class LatencySink(Sink):
+    """Release-to-processed latency per packet; written to result_path on close."""
+
+    def __init__(self, transport, result_path=None):
+        self.transport = transport
+        self.result_path = result_path
+        self.peak_pending = False
+        self.packet_latencies = []
+        self.peak_latencies = []
+
+    def on_peak(self, peak_index, sample_value, instantaneous_bpm):
+        self.peak_pending = True
+
+    def on_packet(self, packet, packet_count):
+        # The paced replay reads one frame at a time; last_arrival is when it was due
+        due = self.transport.last_arrival
+        if due is not None:
+            latency = time.perf_counter() - due
+            self.packet_latencies.append(latency)
+            if self.peak_pending:
+                self.peak_latencies.append(latency)
+        self.peak_pending = False
+
+    def close(self):
+        if self.result_path:
+            with open(self.result_path, "w") as f:
+                json.dump(
+                    {
+                        "packet_latencies": self.packet_latencies,
+                        "peak_latencies": self.peak_latencies,
+                    },
+                    f,
+                )
+
+
+def install_latency_sink(result_path, session):
+    """setup() hook for the acquisition process (module level so it pickles)."""
+    session.add_sink(LatencySink(session.transport, result_path))
+
+
+def _gui_load(snapshot, stop):
+    # Every "frame": copy the visible window, then draw it point by point in Python
+    while not stop.is_set():
+        x, y, total = snapshot()
+        xs, ys = np.array(x), np.array(y)
+        sum(float(a) * float(b) for a, b in zip(xs.tolist(), ys.tolist()))
+        sum(v * v for v in range(200_000))
+
+
+def run_single_process(config, samples, output_dir):
+    stop_flag = threading.Event()
+    csv_logger, bpm_logger = create_csv_loggers(
+        config,
+        output_dir,
+        stop_flag,
+        metadata_file=os.path.join(output_dir, "run_metadata.json"),
+    )
+    transport = ReplayTransport.from_samples(samples, speed=1.0)
+    session = StreamingSession(config, transport, stop_flag=stop_flag, verbose=False)
+    session.add_sink(CSVSink(csv_logger, bpm_logger))
+    plot_buffer = session.add_sink(PlotBuffer(config.max_samples_plotted))
+    sink = session.add_sink(LatencySink(transport))
+
+    stop_gui = threading.Event()
+    threading.Thread(
+        target=_gui_load, args=(plot_buffer.snapshot, stop_gui), daemon=True
+    ).start()
+    session.start().join()
+    stop_gui.set()
+    stop_flag.set()
+    for logger in (csv_logger, bpm_logger):
+        logger._thread.join()
+    return sink.packet_latencies, sink.peak_latencies
+
+
+def run_split(config, samples, output_dir):
+    result_path = os.path.join(output_dir, "latency.json")
+    acquisition = AcquisitionProcess(
+        config,
+        output_dir,
+        transport_factory=functools.partial(
+            ReplayTransport.from_samples, samples, speed=1.0
+        ),
+        setup=functools.partial(install_latency_sink, result_path),
+        verbose=False,
+    )
+    stop_gui = threading.Event()
+    threading.Thread(
+        target=_gui_load, args=(acquisition.ring.snapshot, stop_gui), daemon=True
+    ).start()
+    acquisition.start()
+    acquisition.process.join()
+    stop_gui.set()
+    time.sleep(0.1)  # let the GUI thread drop its views before the ring is closed
+    acquisition.join()
+    with open(result_path) as f:
+        result = json.load(f)
+    return result["packet_latencies"], result["peak_latencies"]
+
+
+def _summary(values):
+    ms = np.array(values) * 1000.0
+    if len(ms) == 0:
+        return "no samples"
+    return (
+        f"p50 {np.percentile(ms, 50):.3f} ms | p99 {np.percentile(ms, 99):.3f} ms | "
+        f"max {ms.max():.3f} ms ({len(ms)})"
+    )
+
+
+def main(seconds=20.0):
+    config = Config()
+    samples = synthetic_ecg(seconds)
+    results = {}
+    for label, runner in (
+        ("single process", run_single_process),
+        ("acquisition process + shared ring", run_split),
+    ):
+        with tempfile.TemporaryDirectory() as output_dir:
+            packet_latencies, peak_latencies = runner(config, samples, output_dir)
+        results[label] = {
+            "packet_latency_ms": (np.array(packet_latencies) * 1000).tolist(),
+            "peak_latency_ms": (np.array(peak_latencies) * 1000).tolist(),
+        }
+        print(f"\n{label} (with GUI load)")
+        print(f"  release -> packet:  {_summary(packet_latencies)}")
+        print(f"  release -> peak:    {_summary(peak_latencies)}")
+    return results
+
+
+if __name__ == "__main__":
+    main(float(sys.argv[1]) if len(sys.argv) > 1 else 20.0)
@@ -0,0 +1,88 @@
+"""
+Multi-port USB ingest: one SerialHub thread reading N gateways
+
+N simulated ESP32 boards (python.simulation.esp32_gateway, one pseudo-terminal each)
+stand in for N gateways on a USB hub: each resets when its port is opened, starts on
+START and streams 28-byte frames at the firmware rate (one packet every 40 ms). The
+SerialHub reads all of them from a single selector-driven thread and runs each port
+through its own StreamingSession and CSV loggers.
+
+Reported for each N:
+  - process CPU per second of streaming (and per port; includes the simulated boards)
+  - packets lost (sent by a simulated board but never parsed)
+  - worst per-port p99 arrival -> processed latency, and aggregate packets/s
+
+Usage:
+    python3 -m python.benchmarks.serial_hub [seconds] [max_ports]
+"""
+
+import sys
+import tempfile
+import time
+
+from python.core.config import Config
+from python.core.serial_hub import SerialHub
+from python.core.synthetic import synthetic_ecg
+from python.simulation.esp32_gateway import SimulatedGateway
+
+
+def run(n_ports, seconds):
+    samples = synthetic_ecg(seconds)
+    gateways = [SimulatedGateway(samples) for _ in range(n_ports)]
+    slave_paths = [gateway.start() for gateway in gateways]
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        try:
+            hub = SerialHub(
+                Config(),
+                output_dir,
+                ports=slave_paths,
+                settle_time=0.5,  # boot text is flushed before START, as with boards
+                no_data_timeout=0.5,
+                startup_grace=3.0,  # the boards blink for 2.1 s before streaming
+            )
+            if not hub.open():
+                raise RuntimeError("could not open the simulated ports")
+
+            cpu_start, wall_start = time.process_time(), time.perf_counter()
+            hub.run()  # ends once every board has sent its whole dataset
+            cpu = time.process_time() - cpu_start
+            wall = time.perf_counter() - wall_start
+            hub.join_loggers()
+        finally:
+            for gateway in gateways:
+                gateway.stop()
+
+    stats = hub.stats()
+    received = sum(s["packets"] for s in stats.values())
+    return {
+        "ports": n_ports,
+        "cpu_percent": 100.0 * cpu / wall,
+        "packets_sent": sum(gateway.packets_sent for gateway in gateways),
+        "packets_received": received,
+        "worst_p99_latency_ms": max(s["latency_p99_ms"] for s in stats.values()),
+        "packets_per_s": sum(s["packets_per_s"] for s in stats.values()),
+    }
+
+
+def main(seconds=10.0, max_ports=16):
+    results = []
+    n = 1
+    while n <= max_ports:
+        result = run(n, seconds)
+        results.append(result)
+        lost = result["packets_sent"] - result["packets_received"]
+        print(
+            f"N={n:3d} | CPU {result['cpu_percent']:5.1f} % ({result['cpu_percent'] / n:.2f} %/port) | "
+            f"lost {lost}/{result['packets_sent']} | {result['packets_per_s']:.0f} packets/s | "
+            f"worst p99 latency {result['worst_p99_latency_ms']:.3f} ms"
+        )
+        n *= 2
+    return results
+
+
+if __name__ == "__main__":
+    main(
+        float(sys.argv[1]) if len(sys.argv) > 1 else 10.0,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 16,
+    )
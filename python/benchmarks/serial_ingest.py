@@ -0,0 +1,132 @@
+"""
+Serial ingest benchmark: select-driven SerialTransport vs the old in_waiting polling loop
+
+A pseudo-terminal pair stands in for the ESP32: the benchmark writes 28-byte gateway
+frames into the master side at the firmware's packet rate (one packet every 40 ms) and
+the transport under test reads the slave side through pyserial, exactly as it would read
+/dev/cu.usbserial-*. Linux/macOS only (needs os.openpty).
+
+Measured for each transport:
+  - idle CPU: CPU time used by the reader thread per second while no data arrives
+  - arrival-to-parse latency: time from a frame being written to PacketParser returning it
+
+Usage:
+    python3 -m python.benchmarks.serial_ingest [seconds_per_phase]
+"""
+
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+from python.benchmarks.common import PACKET_INTERVAL_S, PACKET_SIZE
+from python.core.data_handling import PacketParser, encode_packet
+from python.core.transports import SerialTransport
+
+
+class PollingSerialTransport(SerialTransport):
+    """The pre-selector USB loop: poll in_waiting, sleep 1 ms when nothing is there."""
+
+    def read(self, timeout=0.01):
+        if self.ser.in_waiting > 0:
+            return self.ser.read(self.ser.in_waiting)
+        time.sleep(0.001)
+        return b""
+
+
+def _open_pty():
+    master_fd, slave_fd = os.openpty()
+    return master_fd, slave_fd, os.ttyname(slave_fd)
+
+
+def _reader(transport, parser, sent_times, stop, result):
+    """Reader thread: records its own CPU time and the latency of every parsed packet."""
+    latencies = []
+    cpu_start = time.thread_time()
+    while not stop.is_set():
+        data = transport.read(timeout=0.05)
+        if not data:
+            continue
+        parser.update_buffer(data)
+        now = time.perf_counter()
+        for packet in parser.get_packets():
+            sent = sent_times.get(packet.timestamp)
+            if sent is not None:
+                latencies.append(now - sent)
+    result["cpu_s"] = time.thread_time() - cpu_start
+    result["latencies"] = latencies
+
+
+def run_phase(transport_class, seconds, send_packets):
+    """Run one reader against the pty for `seconds`, optionally streaming packets."""
+    master_fd, slave_fd, slave_path = _open_pty()
+    transport = transport_class(slave_path, settle_time=0)
+    transport.open()
+    os.read(master_fd, 64)  # swallow the START command
+
+    parser = PacketParser(PACKET_SIZE)
+    sent_times = {}
+    stop = threading.Event()
+    result = {}
+    reader = threading.Thread(
+        target=_reader, args=(transport, parser, sent_times, stop, result)
+    )
+    reader.start()
+
+    deadline = time.perf_counter() + seconds
+    sequence = 0
+    samples = [2048] * 10
+    while time.perf_counter() < deadline:
+        if send_packets:
+            sequence += 1
+            frame = encode_packet(sequence & 0xFF, sequence, samples)
+            sent_times[sequence] = time.perf_counter()
+            os.write(master_fd, frame)
+        time.sleep(PACKET_INTERVAL_S)
+
+    time.sleep(0.1)  # let the reader drain the last frame
+    stop.set()
+    reader.join()
+    transport.ser.close()
+    os.close(master_fd)
+    os.close(slave_fd)
+
+    latencies_ms = np.array(result["latencies"]) * 1000.0
+    return {
+        "cpu_percent": 100.0 * result["cpu_s"] / seconds,
+        "packets": int(len(latencies_ms)),
+        "latency_p50_ms": (
+            float(np.percentile(latencies_ms, 50)) if send_packets else None
+        ),
+        "latency_p99_ms": (
+            float(np.percentile(latencies_ms, 99)) if send_packets else None
+        ),
+        "latency_max_ms": float(latencies_ms.max()) if send_packets else None,
+    }
+
+
+def main(seconds=5.0):
+    results = {}
+    for label, transport_class in (
+        ("polling (in_waiting + 1 ms sleep)", PollingSerialTransport),
+        ("selector (SerialTransport)", SerialTransport),
+    ):
+        idle = run_phase(transport_class, seconds, send_packets=False)
+        streaming = run_phase(transport_class, seconds, send_packets=True)
+        results[label] = {"idle": idle, "streaming": streaming}
+
+        print(f"\n{label}")
+        print(f"  idle CPU:            {idle['cpu_percent']:.2f} %")
+        print(f"  streaming CPU:       {streaming['cpu_percent']:.2f} %")
+        print(
+            f"  arrival-to-parse:    p50 {streaming['latency_p50_ms']:.3f} ms | "
+            f"p99 {streaming['latency_p99_ms']:.3f} ms | max {streaming['latency_max_ms']:.3f} ms "
+            f"({streaming['packets']} packets)"
+        )
+    return results
+
+
+if __name__ == "__main__":
+    main(float(sys.argv[1]) if len(sys.argv) > 1 else 5.0)
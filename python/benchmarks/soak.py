@@ -0,0 +1,327 @@
+"""
+Soak test: hours of synthetic ECG through the full streaming engine, watching for growth
+
+Streams synthetic ECG (SyntheticECG, shaped by heartrate_config, with heart-rate
+variability so no two minutes of a segment are the same; a SEGMENT_SECONDS segment is
+generated and looped, so the ECG does not weigh on the RSS being watched) through
+StreamingSession.run() in its own thread, the way the GUI scripts run it, with the CSV
+loggers, gap log, latency report and plot buffer attached. The replay runs at N x real time (default 2 h of ECG at 100x, so 72 s). Memory
+growth in the lists a session keeps for the whole recording (mcu_timestamps,
+detected_peaks, BPMDetector.peak_history, ...) only shows up over hours.
+
+Sampled every --interval seconds:
+  - RSS of the process, number of threads
+  - transport backlog (packets due but not read yet) and CSV logger queue depths
+  - end_to_end p50 / p99 latency of the chunks processed since the previous sample
+
+After a warm-up (the first 10 % of the samples) the median of the last quarter of every
+series is compared with the median of the first quarter (medians, so a few intervals
+slowed down by another process on the machine do not make a trend). A series that grew by more than
+--tolerance (fraction of its starting value) and by more than its absolute floor
+(FLOORS) is reported as an upward trend, and the soak test exits with status 1.
+soak_report.json (every sample, the trends and the final list sizes) is written to the
+output folder (a temporary one unless --output is given).
+
+Usage:
+    python3 -m python.benchmarks.soak [hours_of_ecg] [speed] [--interval=s]
+        [--tolerance=0.2] [--output=dir]
+"""
+
+import contextlib
+import json
+import os
+import resource
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+from python.benchmarks.common import PACKET_INTERVAL_S
+from python.core.config import Config
+from python.core.data_handling import encode_packet
+from python.core.latency import LatencyHistogram
+from python.core.sinks import CSVSink, GapLogSink, PlotBuffer
+from python.core.streaming import StreamingSession, create_csv_loggers
+from python.core.synthetic import SyntheticECG
+from python.core.transports import Transport
+
+DEFAULT_TOLERANCE = 0.2
+WARMUP_FRACTION = 0.1
+# Smallest growth (first -> last quarter) that counts as a trend, per series
+FLOORS = {
+    "rss_mb": 5.0,
+    "threads": 0.5,
+    "transport_backlog": 25.0,  # packets (1 s of data)
+    "raw_logger_queue": 2500.0,  # rows (10 s of data)
+    "bpm_logger_queue": 50.0,
+    # Latency is the noisiest series (scheduler hiccups on a busy CPU): only a growth of a
+    # whole millisecond at p99 is a trend
+    "end_to_end_p50_ms": 0.1,
+    "end_to_end_p99_ms": 1.0,
+}
+# The CSV loggers flush once a second, so their queues swing by a second of wall time's
+# rows, i.e. `speed` seconds of ECG: the floors of these series grow with the speed
+QUEUE_ROWS_PER_ECG_SECOND = {"raw_logger_queue": 250.0, "bpm_logger_queue": 2.5}
+MAX_PACKETS_PER_READ = 64
+SEGMENT_SECONDS = 600.0  # ECG generated for the soak, looped for longer runs
+
+
+class LoopingECGTransport(Transport):
+    """
+    Endless gateway: plays (and loops, if shorter) `samples` for `seconds` of ECG at
+    `speed` x real time, with packet IDs and MCU timestamps that keep counting (packets are
+    encoded as they are read, so hours of data cost 2 bytes per sample). Every read returns all the packets due by then, like a serial
+    read; queue_depth() is how many packets are due but not read yet.
+    """
+
+    name = "soak-replay"
+
+    def __init__(self, samples, seconds, speed=100.0):
+        self.samples = np.asarray(samples[: len(samples) - len(samples) % 10])
+        self.total_packets = int(seconds / PACKET_INTERVAL_S)
+        self.speed = speed
+        self.position = 0
+        self._start = None
+
+    def _due(self, now):
+        return min(
+            self.total_packets,
+            int((now - self._start) * self.speed / PACKET_INTERVAL_S) + 1,
+        )
+
+    def read(self, timeout=0.05):
+        if self.position >= self.total_packets:
+            return None
+        now = time.perf_counter()
+        if self._start is None:
+            self._start = now
+        due = self._due(now)
+        if due <= self.position:
+            wait = self._start + self.position * PACKET_INTERVAL_S / self.speed - now
+            time.sleep(max(0.0, min(wait, timeout)))
+            return b""
+        end = min(due, self.position + MAX_PACKETS_PER_READ)
+        frames = []
+        cycle = len(self.samples)
+        for packet in range(self.position, end):
+            start = packet * 10 % cycle
+            frames.append(
+                encode_packet(
+                    packet % 255 + 1,
+                    packet * int(PACKET_INTERVAL_S * 1000),
+                    self.samples[start : start + 10].tolist(),
+                )
+            )
+        self.last_arrival = self._start + self.position * PACKET_INTERVAL_S / self.speed
+        self.position = end
+        return b"".join(frames)
+
+    def queue_depth(self):
+        if self._start is None:
+            return 0
+        return max(0, self._due(time.perf_counter()) - self.position)
+
+
+def rss_mb():
+    """Resident set size of this process (peak RSS where /proc is not available)."""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+
+def window_latency(histogram, previous_counts):
+    """(p50 ms, p99 ms, count) of the values recorded since previous_counts."""
+    window = LatencyHistogram()
+    window.counts = histogram.counts - previous_counts
+    window.count = int(window.counts.sum())
+    window.max_us = histogram.max_us
+    return (
+        window.percentile(50) * 1000.0,
+        window.percentile(99) * 1000.0,
+        window.count,
+    )
+
+
+def find_trends(samples, tolerance=DEFAULT_TOLERANCE, speed=1.0):
+    """
+    Args:
+        samples: list of dicts, one per sampling interval
+        tolerance: Growth allowed, as a fraction of the series' starting value
+        speed: Replay speed of the run (scales the logger queue floors)
+
+    Returns:
+        dict of series -> {"start", "end", "growth"} for every series trending upward
+    """
+    usable = samples[int(len(samples) * WARMUP_FRACTION) :]
+    quarter = len(usable) // 4
+    if quarter == 0:
+        return {}
+    trends = {}
+    for name, floor in FLOORS.items():
+        floor = max(floor, QUEUE_ROWS_PER_ECG_SECOND.get(name, 0.0) * speed)
+        values = [sample[name] for sample in usable if sample.get(name) is not None]
+        if len(values) < 4 * quarter:
+            continue
+        start = float(np.median(values[:quarter]))
+        end = float(np.median(values[-quarter:]))
+        growth = end - start
+        if growth > floor and growth > tolerance * abs(start):
+            trends[name] = {
+                "start": round(start, 3),
+                "end": round(end, 3),
+                "growth": round(growth, 3),
+            }
+    return trends
+
+
+def soak(hours=2.0, speed=100.0, interval=1.0, output_dir=None, out=None):
+    """
+    Run the soak test.
+
+    Returns:
+        (samples, session): the series sampled every `interval` s and the finished session
+    """
+    out = out or sys.stdout
+    seconds = hours * 3600.0
+    config = Config()
+    stop_flag = threading.Event()
+    loggers = create_csv_loggers(
+        config,
+        output_dir,
+        stop_flag,
+        metadata_file=os.path.join(output_dir, "run_metadata.json"),
+    )
+    ecg, _ = SyntheticECG.from_config(config).generate(
+        seconds=min(seconds, SEGMENT_SECONDS)
+    )
+    session = StreamingSession(
+        config,
+        LoopingECGTransport(ecg, seconds, speed),
+        stop_flag=stop_flag,
+        verbose=False,
+    )
+    session.add_sink(CSVSink(*loggers))
+    session.add_sink(GapLogSink(os.path.join(output_dir, "stream_gaps.json")))
+    session.add_sink(PlotBuffer(config.max_samples_plotted))
+    samples = []
+    previous_counts = np.zeros_like(LatencyHistogram().counts)
+    wall_start = time.perf_counter()
+    thread = session.start()
+    while thread.is_alive():
+        thread.join(interval)
+        # A copy: the session thread keeps recording into the tracker
+        histogram = session.latency.snapshot()["end_to_end"]
+        p50, p99, chunks = window_latency(histogram, previous_counts)
+        previous_counts = histogram.counts.copy()
+        sample = {
+            "wall_s": round(time.perf_counter() - wall_start, 2),
+            "ecg_s": round(session.global_sample_counter / config.fs, 1),
+            "rss_mb": round(rss_mb(), 2),
+            "threads": threading.active_count(),
+            "transport_backlog": session.transport.queue_depth(),
+            "raw_logger_queue": loggers[0].queue_depth(),
+            "bpm_logger_queue": loggers[1].queue_depth(),
+            "end_to_end_p50_ms": round(p50, 3) if chunks else None,
+            "end_to_end_p99_ms": round(p99, 3) if chunks else None,
+            "chunks": chunks,
+        }
+        samples.append(sample)
+        print(
+            f"⏱ {sample['ecg_s'] / 3600:5.2f} h of ECG | RSS {sample['rss_mb']:7.1f} MB | "
+            f"threads {sample['threads']} | backlog {sample['transport_backlog']:3d} | "
+            f"logger queues {sample['raw_logger_queue']:6d} / {sample['bpm_logger_queue']:3d} | "
+            f"p50 {p50:.3f} ms p99 {p99:.3f} ms",
+            file=out,
+            flush=True,
+        )
+    stop_flag.set()
+    for logger in loggers:
+        logger._thread.join()
+    return samples, session
+
+
+def main(
+    hours=2.0,
+    speed=100.0,
+    interval=1.0,
+    tolerance=DEFAULT_TOLERANCE,
+    output_dir=None,
+):
+    out = sys.stdout
+    keep = output_dir is not None
+    with contextlib.ExitStack() as stack:
+        if not keep:
+            output_dir = stack.enter_context(tempfile.TemporaryDirectory())
+        os.makedirs(output_dir, exist_ok=True)
+        print(
+            f"🧪 Soak test: {hours:g} h of ECG at {speed:g}x "
+            f"(~{hours * 3600 / speed:.0f} s), sampling every {interval:g} s"
+        )
+        # The session prints every R-peak and BPM of the run when it finishes
+        log_path = os.path.join(output_dir, "session_output.log")
+        with open(log_path, "w") as log, contextlib.redirect_stdout(log):
+            samples, session = soak(hours, speed, interval, output_dir, out)
+
+        trends = find_trends(samples, tolerance, speed)
+        report = {
+            "hours_of_ecg": hours,
+            "speed": speed,
+            "tolerance": tolerance,
+            "samples_processed": session.global_sample_counter,
+            "packets_lost": session.packets_lost,
+            "packets_duplicated": session.packets_duplicated,
+            "packets_reordered": session.packets_reordered,
+            # What the session keeps for the whole recording
+            "list_sizes": {
+                "mcu_timestamps": len(session.mcu_timestamps),
+                "detected_peaks": len(session.detector.detected_peaks),
+                "peak_history": len(session.bpm_detector.peak_history),
+                "bpm_history": len(session.bpm_detector.bpm_history),
+            },
+            "trends": trends,
+            "samples": samples,
+        }
+        report_path = os.path.join(output_dir, "soak_report.json")
+        with open(report_path, "w") as f:
+            json.dump(report, f, indent=2)
+
+        print(
+            f"\n{session.global_sample_counter} samples processed, "
+            f"{session.packets_lost} packets lost; lists kept by the session: "
+            + ", ".join(f"{name} {size}" for name, size in report["list_sizes"].items())
+        )
+        if trends:
+            print(
+                f"❌ UPWARD TREND in {len(trends)} series "
+                f"(median of the last vs the first quarter, tolerance {100 * tolerance:.0f} %):"
+            )
+            for name, trend in trends.items():
+                print(
+                    f"   {name}: {trend['start']} -> {trend['end']} (+{trend['growth']})"
+                )
+        else:
+            print("✅ No series trended upward")
+        if keep:
+            print(f"📄 Report saved to {report_path}")
+    return report
+
+
+if __name__ == "__main__":
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    options = dict(
+        arg[2:].split("=", 1) for arg in sys.argv[1:] if arg.startswith("--")
+    )
+    report = main(
+        float(args[0]) if len(args) > 0 else 2.0,
+        float(args[1]) if len(args) > 1 else 100.0,
+        interval=float(options.get("interval", 1.0)),
+        tolerance=float(options.get("tolerance", DEFAULT_TOLERANCE)),
+        output_dir=options.get("output"),
+    )
+    sys.exit(1 if report["trends"] else 0)
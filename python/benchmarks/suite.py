@@ -0,0 +1,415 @@
+"""
+Regression suite for the hot paths, with stored baselines
+
+Runs offline on synthetic ECG (python.core.synthetic), so no dataset or hardware is
+needed, and keeps the best of a few repeats of every measurement.
+
+Reported:
+  - parser_mb_per_s             PacketParser on the gateway byte stream, 512-byte chunks
+  - detector_per_sample_sps     R_peak_detector.process_sample called per packet, the way
+                                StreamingSession.process_packet does it
+  - detector_batch_sps          BatchTester.run (detector + BPM) over the whole recording
+  - bpm_window_us_60s / _1h     BPMDetector.calculate_bpm_in_window with 60 s and 1 h of
+                                peak history (it walks back over the window's peaks
+                                only, so 1 h should cost about the same as 60 s)
+  - csv_logger_rows_per_s       CSVLogger: log() of every row until the writer thread has
+                                written all of them
+  - convert_to_digital_sps      generateData.convert_to_digital (mV -> ADC codes); not
+                                measured when wfdb / matplotlib are not installed
+  - replay_realtime_factor      seconds of ECG processed per second through
+                                ReplayTransport -> StreamingSession -> CSV loggers
+  - replay_end_to_end_p50_ms / _p99_ms   per-chunk latency of that run
+
+The results are written as JSON and compared with a baseline (by default
+python/benchmarks/baselines/suite.json). A metric that is worse than the baseline by more
+than the tolerance (fraction, default 0.25) and by more than its unit's absolute floor
+(ABSOLUTE_FLOORS: latencies a few µs apart are timer noise) is a regression: the suite
+prints it and exits with status 1. So is a metric of the baseline that was not measured
+(convert_to_digital_sps without wfdb); a metric missing from the baseline is measured but
+not gated, with a warning. A suspected regression is measured again, up to MAX_RUNS runs
+in all, keeping the best value of each metric; the baseline is the best of BASELINE_RUNS
+runs, so both sides are best-of-N and one busy moment on the machine does not fail the
+gate. Record a new baseline with --update-baseline on an idle machine, after an intended
+change or when moving to another machine.
+
+Usage:
+    python3 -m python.benchmarks.suite [seconds_of_ecg] [--output=results.json]
+        [--baseline=path] [--tolerance=0.25] [--update-baseline]
+"""
+
+import json
+import os
+import platform
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+from python.benchmarks.common import PACKET_SIZE
+from python.core.config import Config
+from python.core.data_handling import PacketParser
+from python.core.logging import CSVLogger
+from python.core.signal_processing import R_peak_detector, BPMDetector
+from python.core.sinks import CSVSink
+from python.core.streaming import StreamingSession, create_csv_loggers
+from python.core.synthetic import synthetic_ecg
+from python.core.transports import ReplayTransport
+from python.real_time_testing_pipeline.step3_batchprocess_ecg_realtime import (
+    BatchTester,
+)
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baselines", "suite.json")
+DEFAULT_TOLERANCE = 0.25
+MAX_RUNS = 3  # runs of the whole suite before a regression is reported
+BASELINE_RUNS = 3  # runs whose best values make a new baseline
+# Smallest difference from the baseline that can count as a regression, per unit
+ABSOLUTE_FLOORS = {"ms": 0.05, "µs/call": 1.0}
+CHUNK_SIZE = 512  # bytes per read, about what a serial read returns at 250 Hz
+
+
+def best_of(function, repeats):
+    """Fastest wall time (s) of `repeats` calls of function()."""
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_parser(stream, repeats=5):
+    chunks = [
+        stream[start : start + CHUNK_SIZE]
+        for start in range(0, len(stream), CHUNK_SIZE)
+    ]
+
+    def parse():
+        parser = PacketParser(PACKET_SIZE)
+        for chunk in chunks:
+            parser.update_buffer(chunk)
+            parser.get_packets()
+
+    return len(stream) / best_of(parse, repeats) / 1e6
+
+
+def bench_detector_per_sample(samples, repeats=5):
+    packets = [samples[start : start + 10] for start in range(0, len(samples), 10)]
+
+    def detect():
+        detector = R_peak_detector(fs=250)
+        process_sample = detector.process_sample
+        for packet in packets:
+            for sample in packet:
+                process_sample(sample)
+
+    return len(samples) / best_of(detect, repeats)
+
+
+def bench_detector_batch(samples, repeats=5):
+    def detect():
+        BatchTester(fs=250).run(samples)
+
+    return len(samples) / best_of(detect, repeats)
+
+
+def bench_bpm_window(history_seconds, bpm=75, number=2000):
+    """µs per calculate_bpm_in_window call with `history_seconds` of peaks stored."""
+    detector = BPMDetector(fs=250)
+    interval = 60.0 / bpm
+    for beat in range(int(history_seconds / interval)):
+        detector.add_peak(int(beat * interval * 250), beat * interval)
+    now = history_seconds
+    best = best_of(
+        lambda: [detector.calculate_bpm_in_window(now) for _ in range(number)], 5
+    )
+    return best / number * 1e6
+
+
+def bench_csv_logger(rows, output_dir, repeats=5):
+    best = float("inf")
+    for repeat in range(repeats):
+        stop_flag = threading.Event()
+        logger = CSVLogger(
+            os.path.join(output_dir, f"bench_{repeat}.csv"),
+            stop_flag,
+            write_interval=0.05,
+            metadata_file=os.path.join(output_dir, "run_metadata.json"),
+        )
+        logger.create_CSV(header=["Time", "Sample", "Packet ID", "Packet Count"])
+        start = time.perf_counter()
+        for row in range(rows):
+            logger.log(row * 0.004, 2000, row // 10 % 255 + 1, row // 10 + 1)
+        while logger.samples_written < rows:
+            time.sleep(0.001)
+        best = min(best, time.perf_counter() - start)
+        stop_flag.set()
+        logger._thread.join()
+    return rows / best
+
+
+def bench_convert_to_digital(samples, repeats=5):
+    try:
+        from python.pre_recorded_testing_pipeline.step1_generate_dataset_physionet import (
+            generateData,
+        )
+    except ImportError as e:
+        print(f"⚠️ convert_to_digital NOT MEASURED ({e}): install wfdb to gate it")
+        return None
+    generator = generateData()
+    # Back to mV, the way parse_data() hands the PhysioNet record over
+    millivolts = ((np.asarray(samples) / 4095 * 3.3 - 1.5) * 1000 / 500).tolist()
+    return len(samples) / best_of(
+        lambda: generator.convert_to_digital(millivolts), repeats
+    )
+
+
+def bench_replay(samples, seconds, output_dir, repeats=5):
+    """(real-time factor, end_to_end p50 ms, end_to_end p99 ms) of the fastest run."""
+    best = None
+    for repeat in range(repeats):
+        run_dir = os.path.join(output_dir, f"replay_{repeat}")
+        os.makedirs(run_dir)
+        config = Config()
+        stop_flag = threading.Event()
+        loggers = create_csv_loggers(
+            config,
+            run_dir,
+            stop_flag,
+            metadata_file=os.path.join(run_dir, "run_metadata.json"),
+        )
+        session = StreamingSession(config, stop_flag=stop_flag, verbose=False)
+        session.add_sink(CSVSink(*loggers))
+        transport = ReplayTransport.from_samples(samples)
+        start = time.perf_counter()
+        while True:
+            data = transport.read()
+            if data is None:
+                break
+            session.feed(data, transport.last_arrival)
+        elapsed = time.perf_counter() - start
+        stop_flag.set()
+        for logger in loggers:
+            logger._thread.join()
+        end_to_end = session.latency.summary()["end_to_end"]
+        run = (seconds / elapsed, end_to_end["p50_ms"], end_to_end["p99_ms"])
+        if best is None or run[0] > best[0]:
+            best = run
+    return best
+
+
+def metric(value, unit, higher_is_better):
+    return {
+        "value": round(value, 3),
+        "unit": unit,
+        "higher_is_better": higher_is_better,
+    }
+
+
+def run_suite(seconds=300.0):
+    """
+    Returns:
+        dict with the machine the suite ran on and every metric
+        ({"value", "unit", "higher_is_better"})
+    """
+    samples = synthetic_ecg(seconds)
+    stream = b"".join(ReplayTransport.from_samples(samples).frames)
+    metrics = {}
+
+    print("⏱  PacketParser...")
+    metrics["parser_mb_per_s"] = metric(bench_parser(stream), "MB/s", True)
+    print("⏱  R_peak_detector...")
+    metrics["detector_per_sample_sps"] = metric(
+        bench_detector_per_sample(samples), "samples/s", True
+    )
+    metrics["detector_batch_sps"] = metric(
+        bench_detector_batch(samples), "samples/s", True
+    )
+    print("⏱  BPMDetector...")
+    metrics["bpm_window_us_60s"] = metric(bench_bpm_window(60), "µs/call", False)
+    metrics["bpm_window_us_1h"] = metric(bench_bpm_window(3600), "µs/call", False)
+    print("⏱  generateData.convert_to_digital...")
+    converted = bench_convert_to_digital(samples)
+    if converted is not None:
+        metrics["convert_to_digital_sps"] = metric(converted, "samples/s", True)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print("⏱  CSVLogger...")
+        metrics["csv_logger_rows_per_s"] = metric(
+            bench_csv_logger(len(samples), tmp), "rows/s", True
+        )
+        print("⏱  Replay end to end...")
+        factor, p50, p99 = bench_replay(samples, seconds, tmp)
+    metrics["replay_realtime_factor"] = metric(factor, "x real time", True)
+    metrics["replay_end_to_end_p50_ms"] = metric(p50, "ms", False)
+    metrics["replay_end_to_end_p99_ms"] = metric(p99, "ms", False)
+
+    return {
+        "machine": {
+            "platform": platform.platform(),
+            "processor": platform.processor() or platform.machine(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+        },
+        "seconds_of_ecg": seconds,
+        "metrics": metrics,
+    }
+
+
+def compare(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """
+    Args:
+        results, baseline: Outputs of run_suite()
+        tolerance: Fraction a metric may be worse than its baseline value
+
+    Returns:
+        list of (name, value, baseline value, change in %) for every regression
+    """
+    regressions = []
+    for name, result in results["metrics"].items():
+        reference = baseline["metrics"].get(name)
+        if reference is None or not reference["value"]:
+            continue
+        change = (result["value"] - reference["value"]) / reference["value"]
+        worse = -change if result["higher_is_better"] else change
+        difference = abs(result["value"] - reference["value"])
+        if worse > tolerance and difference > ABSOLUTE_FLOORS.get(result["unit"], 0.0):
+            regressions.append(
+                (name, result["value"], reference["value"], round(100.0 * change, 1))
+            )
+    return regressions
+
+
+def unmatched_metrics(results, baseline):
+    """
+    Returns:
+        (not_measured, not_in_baseline): names of the baseline's metrics missing from
+        results, and of the measured metrics the baseline has no value for
+    """
+    measured, recorded = set(results["metrics"]), set(baseline["metrics"])
+    return sorted(recorded - measured), sorted(measured - recorded)
+
+
+def best_results(first, second):
+    """Per metric, the better of two run_suite() results."""
+    merged = dict(first, metrics=dict(first["metrics"]))
+    for name, result in second["metrics"].items():
+        current = merged["metrics"].get(name)
+        if current is None or (
+            result["value"] > current["value"]
+            if result["higher_is_better"]
+            else result["value"] < current["value"]
+        ):
+            merged["metrics"][name] = result
+    return merged
+
+
+def print_results(results, baseline=None):
+    print(f"\n{'metric':28s} {'value':>14s} {'baseline':>14s} {'change':>8s}")
+    for name, result in results["metrics"].items():
+        line = f"{name:28s} {result['value']:14.3f}"
+        reference = (baseline or {}).get("metrics", {}).get(name)
+        if reference and reference["value"]:
+            change = 100.0 * (result["value"] / reference["value"] - 1.0)
+            line += f" {reference['value']:14.3f} {change:+7.1f}%"
+        print(f"{line}  {result['unit']}")
+
+
+def main(
+    seconds=300.0,
+    output="benchmark_results.json",
+    baseline_path=BASELINE_PATH,
+    tolerance=DEFAULT_TOLERANCE,
+    update_baseline=False,
+):
+    baseline = None
+    if os.path.exists(baseline_path) and not update_baseline:
+        with open(baseline_path, "r") as f:
+            baseline = json.load(f)
+    results = run_suite(seconds)
+    runs = 1
+    if baseline is None:
+        while runs < BASELINE_RUNS:
+            print(f"⏱  Baseline run {runs + 1}/{BASELINE_RUNS}...")
+            results = best_results(results, run_suite(seconds))
+            runs += 1
+    else:
+        while runs < MAX_RUNS and compare(results, baseline, tolerance):
+            # A slow run is usually another process on the machine: measure again and
+            # keep the better value of each metric before calling it a regression
+            print(
+                f"⚠️ Slower than the baseline, running the suite again to confirm "
+                f"({runs + 1}/{MAX_RUNS})..."
+            )
+            results = best_results(results, run_suite(seconds))
+            runs += 1
+    results["runs"] = runs
+
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print_results(results, baseline)
+    print(f"\n📄 Results written to {output}")
+
+    if update_baseline or baseline is None:
+        os.makedirs(os.path.dirname(baseline_path), exist_ok=True)
+        with open(baseline_path, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"📄 Baseline written to {baseline_path}")
+        if "convert_to_digital_sps" not in results["metrics"]:
+            print(
+                "⚠️ The baseline has no convert_to_digital_sps (wfdb is not installed): "
+                "record it where wfdb is, or that path is not gated"
+            )
+        return results, []
+
+    if baseline["machine"] != results["machine"]:
+        print(
+            "⚠️ The baseline was recorded on another machine "
+            f"({baseline['machine']['processor']}, Python {baseline['machine']['python']}); "
+            "rerun with --update-baseline to compare like with like"
+        )
+    regressions = compare(results, baseline, tolerance)
+    not_measured, not_in_baseline = unmatched_metrics(results, baseline)
+    if not_in_baseline:
+        print(
+            f"⚠️ NOT GATED: {', '.join(not_in_baseline)} not in {baseline_path}; "
+            "record them with --update-baseline"
+        )
+    if regressions:
+        print(
+            f"\n❌ PERFORMANCE REGRESSION: {len(regressions)} metric(s) more than "
+            f"{100 * tolerance:.0f} % worse than {baseline_path}"
+        )
+        for name, value, reference, change in regressions:
+            print(f"   {name}: {value} vs {reference} ({change:+.1f} %)")
+    if not_measured:
+        # A skipped benchmark must not pass the gate silently
+        print(
+            f"\n❌ NOT MEASURED: {', '.join(not_measured)} in the baseline but not in "
+            "this run (a benchmark was skipped, e.g. wfdb is not installed)"
+        )
+        regressions += [
+            (name, None, baseline["metrics"][name]["value"], None)
+            for name in not_measured
+        ]
+    if not regressions:
+        print(f"✅ No metric more than {100 * tolerance:.0f} % worse than the baseline")
+    return results, regressions
+
+
+if __name__ == "__main__":
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    options = dict(
+        arg[2:].split("=", 1) if "=" in arg else (arg[2:], True)
+        for arg in sys.argv[1:]
+        if arg.startswith("--")
+    )
+    _, regressions = main(
+        float(args[0]) if args else 300.0,
+        output=options.get("output", "benchmark_results.json"),
+        baseline_path=options.get("baseline", BASELINE_PATH),
+        tolerance=float(options.get("tolerance", DEFAULT_TOLERANCE)),
+        update_baseline="update-baseline" in options,
+    )
+    sys.exit(1 if regressions else 0)
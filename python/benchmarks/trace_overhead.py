@@ -0,0 +1,126 @@
+"""
+Cost of span tracing (python.core.tracing) on the streaming hot path
+
+Feeds the same synthetic ECG through StreamingSession one packet per chunk (the BLE case:
+one notification per packet, so the most spans per sample) with the tracer off and on,
+alternating the two several times and keeping the fastest run of each.
+
+Reported:
+  - µs per packet with tracing off / on, end to end, and the difference (on a busy machine
+    this difference is mostly noise, hence the next two lines)
+  - the tracing work a chunk goes through, timed on its own: off = the `tracer.enabled`
+    check and branches, on = the same plus the timestamps and two span appends
+    (there is no uninstrumented build to compare against)
+  - spans recorded and the size of the trace.json they produce
+
+Usage:
+    python3 -m python.benchmarks.trace_overhead [seconds_of_ecg] [repeats]
+"""
+
+import os
+import sys
+import tempfile
+import time
+import timeit
+
+from python.benchmarks.common import PACKET_INTERVAL_S
+from python.core.config import Config
+from python.core.data_handling import encode_packet
+from python.core.streaming import StreamingSession
+from python.core.synthetic import synthetic_ecg
+from python.core.tracing import tracer
+
+# The tracing code StreamingSession.feed runs per chunk
+FEED_TRACING = """
+tracing = tracer.enabled
+if tracing:
+    parse_start = perf_counter_ns()
+if tracing:
+    detect_start = perf_counter_ns()
+    tracer.span("parse", parse_start, detect_start, 28)
+if tracing and packets:
+    tracer.span("detect", detect_start, value=1)
+"""
+
+
+def per_chunk_cost(enabled, number=100_000):
+    tracer.clear()
+    tracer.enabled = enabled
+    best = min(
+        timeit.repeat(
+            FEED_TRACING,
+            globals={
+                "tracer": tracer,
+                "perf_counter_ns": time.perf_counter_ns,
+                "packets": [None],
+            },
+            number=number,
+            repeat=5,
+        )
+    )
+    tracer.disable()
+    tracer.clear()
+    return best / number
+
+
+def run(frames, tracing):
+    tracer.clear()
+    if tracing:
+        tracer.enable()
+    else:
+        tracer.disable()
+    session = StreamingSession(Config(), verbose=False, track_latency=False)
+    start = time.perf_counter()
+    for frame in frames:
+        session.feed(frame)
+    elapsed = time.perf_counter() - start
+    tracer.disable()
+    return elapsed / len(frames)
+
+
+def main(seconds=120.0, repeats=5):
+    samples = synthetic_ecg(seconds)
+    frames = [
+        encode_packet(i % 255 + 1, i * 40, samples[i * 10 : i * 10 + 10])
+        for i in range(len(samples) // 10)
+    ]
+    best = {False: float("inf"), True: float("inf")}
+    for _ in range(repeats):
+        for tracing in (False, True):
+            best[tracing] = min(best[tracing], run(frames, tracing))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "trace.json")
+        spans = tracer.dump(path)
+        trace_bytes = os.path.getsize(path)
+    tracer.clear()
+    cost = {enabled: per_chunk_cost(enabled) for enabled in (False, True)}
+
+    extra = best[True] - best[False]
+    print(
+        f"off {best[False] * 1e6:.2f} µs/packet | on {best[True] * 1e6:.2f} µs/packet | "
+        f"+{extra * 1e6:.2f} µs ({100.0 * extra / best[False]:.1f} %) | "
+        f"{100.0 * extra / PACKET_INTERVAL_S:.4f} % of a CPU at 25 packets/s"
+    )
+    for enabled in (False, True):
+        print(
+            f"tracing {'on ' if enabled else 'off'}: {cost[enabled] * 1e9:5.0f} ns of tracing "
+            f"work per packet ({100.0 * cost[enabled] / best[False]:.2f} % of the packet cost)"
+        )
+    print(
+        f"{spans} spans for {seconds:g} s of ECG -> {trace_bytes / 1e6:.2f} MB "
+        f"({trace_bytes / seconds / 1e3:.1f} kB per second of recording)"
+    )
+    return {
+        "off_us": best[False] * 1e6,
+        "on_us": best[True] * 1e6,
+        "off_ns": cost[False] * 1e9,
+        "on_ns": cost[True] * 1e9,
+    }
+
+
+if __name__ == "__main__":
+    main(
+        float(sys.argv[1]) if len(sys.argv) > 1 else 120.0,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 5,
+    )
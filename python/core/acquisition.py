@@ -0,0 +1,172 @@
+# classes included: AcquisitionProcess
+# note: runs transport -> parse -> detect -> BPM -> CSV logging in a separate process and
+# publishes the plot window through python.core.shared_ring, so a busy GUI (redraws, window
+# drags, the Qt event loop holding the GIL) can never delay packet handling.
+
+import multiprocessing
+import os
+import threading
+import traceback
+
+from python.core.shared_ring import SharedRing, SharedRingSink, WRITER_DONE
+
+
+def _acquisition_main(
+    ring_name,
+    config,
+    output_dir,
+    transport_factory,
+    duration_sec,
+    setup,
+    verbose,
+    stop_event,
+):
+    """Entry point of the acquisition process (spawned, so everything is rebuilt here)."""
+    # Imported in the child only: the GUI process never needs the pipeline modules
+    from python.core.streaming import StreamingSession, create_csv_loggers
+    from python.core.sinks import CSVSink
+    from python.core.instrumentation import attach_instrumentation
+    from python.core.console import console
+
+    console.set_level(config.log_level)
+    ring = SharedRing.attach(ring_name)
+    # Local flag for the session and loggers (cheap to poll, unlike the process-shared event)
+    stop_flag = threading.Event()
+    ble = transport_factory is None
+
+    try:
+        csv_logger, bpm_logger = create_csv_loggers(
+            config,
+            output_dir,
+            stop_flag,
+            asynchronous=ble,
+            metadata_file=os.path.join(output_dir, "run_metadata.json"),
+        )
+        session = StreamingSession(
+            config, stop_flag=stop_flag, duration_sec=duration_sec, verbose=verbose
+        )
+        session.add_sink(CSVSink(csv_logger, bpm_logger))
+        attach_instrumentation(
+            config,
+            output_dir,
+            session,
+            (csv_logger, bpm_logger),
+            source="ble" if ble else "serial",
+            label="acquisition",
+        )
+        session.add_sink(SharedRingSink(ring))
+
+        if ble:
+            import asyncio
+            from python.core.async_streaming import AsyncBLEStreamer
+
+            from python.core.device_registry import DeviceRegistry
+            from python.core.ble_transport import bleak_classes
+
+            scanner_class, client_class = bleak_classes()
+            streamer = AsyncBLEStreamer(
+                session,
+                loggers=(csv_logger, bpm_logger),
+                scanner_class=scanner_class,
+                client_class=client_class,
+                registry=DeviceRegistry(),
+                metrics_path=os.path.join(output_dir, "run_metrics.json"),
+            )
+            stop = streamer.stop
+        else:
+            session.transport = transport_factory()
+            stop = session.stop
+
+        if setup is not None:
+            setup(session)
+
+        # Relay the cross-process stop request (window closed / STOP typed in the GUI)
+        def wait_for_stop():
+            stop_event.wait()
+            stop()
+
+        threading.Thread(target=wait_for_stop, daemon=True).start()
+
+        if ble:
+            asyncio.run(streamer.run())
+        else:
+            session.start().join()
+            # The session may have ended on its own (no data / end of replay)
+            stop_flag.set()
+
+        for logger in (csv_logger, bpm_logger):
+            if logger._thread:
+                logger._thread.join(timeout=3.0)
+            print(f"✓ Data saved to: {logger.file_name}")
+    except Exception as e:
+        print(f"Acquisition process error: {e}")
+        traceback.print_exc()
+    finally:
+        ring.header[WRITER_DONE] = 1  # also on failure, so the GUI stops waiting
+        ring.close()
+
+
+class AcquisitionProcess:
+    """
+    Owns the shared ring and the acquisition process.
+
+    Args:
+        config: Config of the run (pickled to the child)
+        output_dir: Folder for streamed_raw_packets.csv / streamed_data_outputs.csv
+        transport_factory: Picklable callable returning a Transport, e.g.
+            functools.partial(SerialTransport, port, baudrate). None = BLE through
+            AsyncBLEStreamer.
+        setup: Optional picklable callable setup(session), run in the child before
+            streaming starts (extra sinks or batch hooks)
+    """
+
+    def __init__(
+        self,
+        config,
+        output_dir,
+        transport_factory=None,
+        duration_sec=None,
+        setup=None,
+        verbose=True,
+    ):
+        # Twice the plot window, so the writer never touches the window being drawn
+        self.ring = SharedRing(
+            capacity=2 * config.max_samples_plotted,
+            window=config.max_samples_plotted,
+        )
+        # spawn, not fork: the parent may already have Qt and its threads running
+        context = multiprocessing.get_context("spawn")
+        self.stop_event = context.Event()
+        self.process = context.Process(
+            target=_acquisition_main,
+            args=(
+                self.ring.name,
+                config,
+                output_dir,
+                transport_factory,
+                duration_sec,
+                setup,
+                verbose,
+                self.stop_event,
+            ),
+            name="ecg-acquisition",
+        )
+
+    def start(self):
+        self.process.start()
+        return self.process
+
+    def stop(self):
+        """Ask the acquisition process to stop streaming (safe to call more than once)."""
+        self.stop_event.set()
+
+    def join(self, timeout=10.0):
+        """Wait for the process to flush its CSVs, then release the shared memory."""
+        if self.process.pid is not None:
+            self.process.join(timeout=timeout)
+            if self.process.is_alive():
+                print("⚠️ Acquisition process did not exit, terminating it")
+                self.process.terminate()
+                self.process.join()
+        if self.ring.shm is not None and self.ring.header is not None:
+            self.ring.close()
@@ -0,0 +1,280 @@
+# classes included: AsyncBLEStreamer
+# note: asyncio-native BLE pipeline. The Bleak notification handler feeds the StreamingSession
+# directly on the event loop (no queue, no processing thread), and AsyncCSVLogger tasks write
+# the CSVs from the same loop. The Qt window can share the loop via python.core.qt_asyncio.
+
+import asyncio
+import json
+import time
+import traceback
+
+from bleak import BleakScanner, BleakClient
+
+from python.core.ble_transport import find_and_connect, connect_known_device
+from python.core.logging import AsyncCSVLogger
+from python.core.tracing import tracer
+from python.tests.ble.ble_config import (
+    TARGET_DEVICE_NAME,
+    ECG_DATA_CHARACTERISTIC_UUID,
+    ECG_COMMAND_CHARACTERISTIC_UUID,
+)
+
+
+class AsyncBLEStreamer:
+    """
+    Connects to the ESP32 and runs `session` inside the Bleak event loop until the
+    session's stop_flag is set, its duration elapses or no data arrives for
+    session.no_data_timeout seconds. Timeouts, backoff and duration follow session.clock;
+    with a VirtualClock, run the streamer with session.clock.run(streamer.run()).
+
+    Args:
+        session: StreamingSession without a transport
+        loggers: CSV loggers of the session; AsyncCSVLoggers are run as tasks on the loop
+        scanner_class, client_class: Bleak-compatible backend (BleakScanner/BleakClient or
+            the BLE stand-in)
+        device_address: Connect to this address directly instead of scanning by name
+        reconnect: When the link drops, reconnect to the same address (no scan) with
+            exponential backoff and keep the session going - detector, BPM window and
+            loggers are untouched and the gap is recorded via session.record_gap()
+        max_reconnect_time: Give up (and end the session) after this many seconds
+        initial_backoff, max_backoff: Wait between reconnect attempts, doubling each time
+        registry: DeviceRegistry - connect to the cached address with a scan in parallel
+            (connect_known_device) instead of always scanning first
+        launch_time: time.time() (session.clock.time()) when the program started;
+            launch-to-first-packet is then measured from there instead of from run()
+        metrics_path: Write the connect/startup timings (self.metrics) here as JSON
+    """
+
+    def __init__(
+        self,
+        session,
+        loggers=(),
+        device_name=TARGET_DEVICE_NAME,
+        scanner_class=BleakScanner,
+        client_class=BleakClient,
+        device_address=None,
+        reconnect=True,
+        max_reconnect_time=30.0,
+        initial_backoff=0.25,
+        max_backoff=4.0,
+        registry=None,
+        launch_time=None,
+        metrics_path=None,
+    ):
+        self.session = session
+        self.loggers = loggers
+        self.device_name = device_name
+        self.device_address = device_address
+        self.scanner_class = scanner_class
+        self.client_class = client_class
+        self.reconnect = reconnect
+        self.max_reconnect_time = max_reconnect_time
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
+        self.registry = registry
+        self.launch_time = launch_time
+        self.metrics_path = metrics_path
+        self.metrics = {}
+        self.client = None
+        self.last_packet_time = 0.0
+        self.first_packet_time = None
+        self.link_lost = False
+
+    def _notification_handler(self, sender, data):
+        """Called by Bleak on the event loop: parse, detect and log right here."""
+        if tracer.enabled:
+            notify_start = time.perf_counter_ns()
+        self.last_packet_time = self.session.clock.time()
+        packets = self.session.feed(data, time.perf_counter())
+        if self.first_packet_time is None and packets:
+            self.first_packet_time = self.last_packet_time
+        if tracer.enabled:
+            # parse and detect of this notification show up nested inside
+            tracer.span("notify", notify_start, value=len(data))
+
+    def _on_disconnect(self, client):
+        """Bleak's disconnected_callback; the housekeeping loop does the reconnecting."""
+        if client is self.client:
+            self.link_lost = True
+
+    async def _start_streaming(self, client):
+        await client.start_notify(
+            ECG_DATA_CHARACTERISTIC_UUID, self._notification_handler
+        )
+        await client.write_gatt_char(ECG_COMMAND_CHARACTERISTIC_UUID, b"START")
+
+    async def _reconnect(self):
+        """
+        Reconnect to the cached address until it works, the session is stopped or
+        max_reconnect_time runs out.
+
+        Returns:
+            The new connected client, or None if the device did not come back
+        """
+        session = self.session
+        clock = session.clock
+        address = self.client.address
+        lost_at = clock.time()
+        backoff = self.initial_backoff
+        attempt = 0
+        print(f"⚠️ BLE link to {address} lost, reconnecting...")
+
+        while not session.stop_flag.is_set():
+            attempt += 1
+            try:
+                client = await find_and_connect(
+                    self.device_name,
+                    scanner_class=self.scanner_class,
+                    client_class=self.client_class,
+                    device_address=address,
+                    disconnected_callback=self._on_disconnect,
+                )
+            except Exception as e:
+                print(f"Reconnect attempt {attempt} failed: {e}")
+                client = None
+            if client is not None:
+                self.client = client
+                self.link_lost = False
+                # A partial packet from before the drop would only produce a resync
+                session.parser.buffer = b""
+                await self._start_streaming(client)
+                session.record_gap(lost_at, clock.time(), "ble_disconnect")
+                self.last_packet_time = clock.time() + session.startup_grace
+                return client
+
+            if clock.time() - lost_at + backoff > self.max_reconnect_time:
+                print(
+                    f"ERROR: {address} did not come back within {self.max_reconnect_time:g} seconds"
+                )
+                break
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, self.max_backoff)
+        return None
+
+    def stop(self):
+        """Thread-safe: the housekeeping loop notices the flag within 0.1 s."""
+        self.session.stop_flag.set()
+
+    async def run(self):
+        """
+        Stream until stopped. Returns True if the device was connected.
+        """
+        session = self.session
+        clock = session.clock
+        logger_tasks = [
+            asyncio.create_task(logger.run())
+            for logger in self.loggers
+            if isinstance(logger, AsyncCSVLogger)
+        ]
+
+        print("[1/4] Connecting to ESP32...")
+        launch_time = self.launch_time if self.launch_time is not None else clock.time()
+        connect_started = clock.time()
+        connect_path = "address" if self.device_address is not None else "scan"
+        try:
+            if self.registry is not None and self.device_address is None:
+                client, connect_path = await connect_known_device(
+                    self.registry,
+                    self.device_name,
+                    scanner_class=self.scanner_class,
+                    client_class=self.client_class,
+                    disconnected_callback=self._on_disconnect,
+                )
+            else:
+                client = await find_and_connect(
+                    self.device_name,
+                    scanner_class=self.scanner_class,
+                    client_class=self.client_class,
+                    device_address=self.device_address,
+                    disconnected_callback=self._on_disconnect,
+                )
+        except Exception as e:
+            print(f"ERROR: BLE connect failed: {e}")
+            client = None
+        if client is None:
+            print("ERROR: Failed to connect to BLE device")
+            session.stop_flag.set()
+            await asyncio.gather(*logger_tasks)
+            return False
+        self.client = client
+        connected_time = clock.time()
+
+        try:
+            print("[2/4] Subscribing to notifications and sending START_STREAM...")
+            start_time = clock.time()
+            self.last_packet_time = start_time + session.startup_grace
+            await self._start_streaming(client)
+            print("✓ Streaming started")
+
+            # Housekeeping only - packets are handled by the notification handler
+            print("[3/4] Streaming data (press STOP to end)...")
+            while not session.stop_flag.is_set():
+                await asyncio.sleep(0.1)
+                if self.link_lost or not client.is_connected:
+                    if not self.reconnect:
+                        print("BLE link lost, stopping.")
+                        break
+                    client = await self._reconnect()
+                    if client is None:
+                        client = self.client
+                        break
+                now = clock.time()
+                if now - self.last_packet_time > session.no_data_timeout:
+                    print(
+                        f"No data for {session.no_data_timeout:g} seconds, assuming done. Received {session.parser.packet_count} packets"
+                    )
+                    break
+                if (
+                    session.duration_sec is not None
+                    and now - start_time >= session.duration_sec
+                ):
+                    print(
+                        f"\nRecording finished (user-set duration: {session.duration_sec}s). Stopping now..."
+                    )
+                    break
+
+            print("[4/4] Stopping stream...")
+            try:
+                if client.is_connected:
+                    await client.write_gatt_char(
+                        ECG_COMMAND_CHARACTERISTIC_UUID, b"STOP"
+                    )
+                    await client.stop_notify(ECG_DATA_CHARACTERISTIC_UUID)
+            except Exception as e:
+                print(f"Warning: Error during cleanup: {e}")
+
+        except Exception as e:
+            print(f"BLE streaming error: {e}")
+            traceback.print_exc()
+
+        finally:
+            try:
+                if client.is_connected:
+                    await client.disconnect()
+                    print("✓ Disconnected from ESP32")
+            except Exception as e:
+                print(f"Warning: Error during disconnect: {e}")
+
+            session.finish()
+            session.stop_flag.set()  # lets the logger tasks do their final write
+            await asyncio.gather(*logger_tasks)
+
+        self.metrics = {
+            "connect_path": connect_path,
+            "launch_to_connect_start_s": round(connect_started - launch_time, 3),
+            "connect_s": round(connected_time - connect_started, 3),
+            "launch_to_first_packet_s": (
+                round(self.first_packet_time - launch_time, 3)
+                if self.first_packet_time is not None
+                else None
+            ),
+            "gaps": len(session.gaps),
+        }
+        print(
+            f"Startup: connect {self.metrics['connect_s']:.2f} s ({connect_path}), "
+            f"launch to first packet {self.metrics['launch_to_first_packet_s']} s"
+        )
+        if self.metrics_path is not None:
+            with open(self.metrics_path, "w") as f:
+                json.dump(self.metrics, f, indent=2)
+        return True
@@ -0,0 +1,353 @@
+# classes included: BLETransport
+# functions included: bleak_classes, find_and_connect, connect_known_device
+# note: BLE link to gateway_template_ble_version.ino / real_time_streaming_ble.ino, shared by
+# step4_stream_ble.py and step2_stream_ble_realtime.py (previously copied into both)
+
+import asyncio
+import os
+import queue
+import threading
+import time
+import traceback
+
+from bleak import BleakScanner, BleakClient
+
+from python.core.transports import Transport
+from python.core.tracing import tracer
+from python.tests.ble.ble_config import (
+    TARGET_DEVICE_NAME,
+    ECG_DATA_CHARACTERISTIC_UUID,
+    ECG_COMMAND_CHARACTERISTIC_UUID,
+)
+
+
+def bleak_classes():
+    """
+    BleakScanner / BleakClient, or the BLE stand-in's classes when ECG_BLE_STANDIN is set
+    (see python.simulation.ble_standin.bleak_classes). The simulator is only imported then,
+    so the streaming scripts do not load it on real hardware.
+
+    Returns:
+        (scanner_class, client_class)
+    """
+    if not os.environ.get("ECG_BLE_STANDIN"):
+        return BleakScanner, BleakClient
+    from python.simulation.ble_standin import bleak_classes as standin_classes
+
+    return standin_classes()
+
+
+async def find_and_connect(
+    device_name=TARGET_DEVICE_NAME,
+    scan_timeout=10.0,
+    scanner_class=BleakScanner,
+    client_class=BleakClient,
+    device_address=None,
+    disconnected_callback=None,
+):
+    """
+    Find and connect to ESP32.
+    Mirrors logic from test_ble_streaming.py
+
+    Args:
+        device_name: Advertised name to scan for
+        scan_timeout: Seconds to scan before giving up
+        scanner_class, client_class: Bleak-compatible backend (swap in the BLE stand-in
+            from python.simulation.ble_standin to run without a radio)
+        device_address: Known address - skips the scan (like test_ble_simple's skip_scan)
+        disconnected_callback: Passed to the client; called with it when the link drops
+
+    Returns:
+        BleakClient: Connected client, or None if failed
+    """
+    if device_address is None:
+        # Scan for device, timeout after scan_timeout seconds
+        print(f"Scanning for '{device_name}'...")
+        device = await scanner_class.find_device_by_name(
+            device_name, timeout=scan_timeout
+        )
+
+        # if device not found, return after timeout
+        if device is None:
+            print(f"ERROR: '{device_name}' not found")
+            return None
+
+        print(f"Found '{device_name}' at {device.address}")
+        device_address = device.address
+
+    # Connect
+    client = _new_client(client_class, device_address, disconnected_callback)
+    await client.connect()
+
+    if client.is_connected:
+        print("Connected successfully")
+        return client
+    else:
+        print("Connection failed")
+        return None
+
+
+def _new_client(client_class, address, disconnected_callback):
+    if disconnected_callback is not None:
+        return client_class(address, disconnected_callback=disconnected_callback)
+    return client_class(address)
+
+
+async def connect_known_device(
+    registry,
+    device_name=TARGET_DEVICE_NAME,
+    scan_timeout=10.0,
+    scanner_class=BleakScanner,
+    client_class=BleakClient,
+    disconnected_callback=None,
+):
+    """
+    Connect using the device registry: a direct connect to the cached address and a scan
+    by name run side by side, and whichever yields a connected client first wins. The
+    scan covers a stale or missing cache entry, so a first run is no slower than
+    find_and_connect. The registry is updated after every successful connect.
+
+    Args:
+        registry: DeviceRegistry
+        device_name, scan_timeout, scanner_class, client_class, disconnected_callback:
+            as in find_and_connect
+
+    Returns:
+        (client, path): Connected client (or None) and "direct" / "scan"
+    """
+    entry = registry.get(device_name)
+    cached_address = entry["address"] if entry else None
+    started = time.perf_counter()
+
+    async def connect_to(address, timeout):
+        client = _new_client(client_class, address, disconnected_callback)
+        if timeout is None:
+            await client.connect()
+        else:
+            await client.connect(timeout=timeout)
+        return client if client.is_connected else None
+
+    scan = asyncio.create_task(
+        scanner_class.find_device_by_name(device_name, timeout=scan_timeout)
+    )
+    direct = None
+    if cached_address is not None:
+        print(f"Connecting directly to cached {device_name} at {cached_address}...")
+        direct = asyncio.create_task(
+            connect_to(cached_address, registry.connect_timeout(device_name))
+        )
+
+    async def connect_scanned(device):
+        print(f"Found '{device_name}' at {device.address}")
+        try:
+            return await connect_to(device.address, None)
+        except Exception as e:
+            print(f"Connect to {device.address} failed: {e}")
+            return None
+
+    client, path = None, None
+    scanned = None  # found by the scan while the direct connect was still running
+    pending = {task for task in (scan, direct) if task is not None}
+    try:
+        while pending and client is None:
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            if direct in done:
+                try:
+                    client, path = direct.result(), "direct"
+                except Exception as e:
+                    print(f"Direct connect to {cached_address} failed: {e}")
+                if client is None and scanned is not None:
+                    # The scan already found the device: connect to it now
+                    client, path = await connect_scanned(scanned), "scan"
+            if scan in done and client is None:
+                try:
+                    device = scan.result()
+                except Exception as e:
+                    print(f"Scan failed: {e}")
+                    device = None
+                if device is None:
+                    print(f"ERROR: '{device_name}' not found")
+                elif direct in pending and device.address == cached_address:
+                    # The direct connect is already on its way to this device; keep the
+                    # scan result in case it fails
+                    scanned = device
+                else:
+                    if direct in pending:
+                        direct.cancel()
+                        pending.discard(direct)
+                    client, path = await connect_scanned(device), "scan"
+    finally:
+        for task in pending:
+            task.cancel()
+
+    if client is None:
+        print("Connection failed")
+        return None, None
+
+    connect_time = time.perf_counter() - started
+    print(f"Connected successfully ({path}, {connect_time:.2f} s)")
+    registry.remember(
+        device_name,
+        client.address,
+        connect_time_s=connect_time,
+        mtu_size=getattr(client, "mtu_size", None),
+    )
+    return client, path
+
+
+class BLETransport(Transport):
+    """
+    Runs the Bleak client on an asyncio loop in a background thread and hands the
+    notification payloads to the session through a thread-safe queue.
+
+    With a DeviceRegistry the connect goes through connect_known_device (cached address
+    first, scan in parallel) instead of always scanning.
+    """
+
+    name = "ble"
+
+    def __init__(
+        self,
+        device_name=TARGET_DEVICE_NAME,
+        connect_timeout=15.0,
+        scanner_class=BleakScanner,
+        client_class=BleakClient,
+        registry=None,
+    ):
+        self.device_name = device_name
+        self.connect_timeout = connect_timeout
+        self.registry = registry
+        self.scanner_class = scanner_class
+        self.client_class = client_class
+        self.client = None
+        self._loop = None  # event loop of the BLE thread, for write()
+        self.data_queue = queue.Queue()  # Thread-safe queue for BLE data
+        self._thread = None
+        self._ready = threading.Event()
+        self._stop = threading.Event()
+
+    def open(self):
+        # Start BLE connection in background thread
+        print("Starting BLE connection thread...")
+        self._thread = threading.Thread(target=self._thread_func, daemon=True)
+        self._thread.start()
+
+        # Wait for BLE connection to complete (with timeout)
+        print("Waiting for BLE connection...")
+        if not self._ready.wait(timeout=self.connect_timeout):
+            print("ERROR: BLE connection timeout")
+            return False
+        if self.client is None:
+            print("ERROR: BLE client not connected")
+            return False
+        print("BLE connected, starting data processing...")
+        return True
+
+    def _thread_func(self):
+        try:
+            asyncio.run(self._async_main())
+        except Exception as e:
+            print(f"BLE thread error: {e}")
+            traceback.print_exc()
+
+    def _notification_handler(self, sender, data):
+        """Called by Bleak when BLE notification received from ESP32 (BLE thread)."""
+        if tracer.enabled:
+            notify_start = time.perf_counter_ns()
+        self.data_queue.put((time.perf_counter(), data))
+        if tracer.enabled:
+            tracer.span("notify", notify_start, value=len(data))
+
+    async def _async_main(self):
+        self._loop = asyncio.get_running_loop()
+        print("[1/4] Connecting to ESP32...")
+        if self.registry is not None:
+            client, _ = await connect_known_device(
+                self.registry,
+                self.device_name,
+                scanner_class=self.scanner_class,
+                client_class=self.client_class,
+            )
+        else:
+            client = await find_and_connect(
+                self.device_name,
+                scanner_class=self.scanner_class,
+                client_class=self.client_class,
+            )
+
+        if client is None:
+            print("ERROR: Failed to connect to BLE device")
+            self._ready.set()  # release open() so it can report the failure
+            return
+
+        self.client = client
+
+        try:
+            print("[2/4] Subscribing to notifications and sending START_STREAM...")
+            await client.start_notify(
+                ECG_DATA_CHARACTERISTIC_UUID, self._notification_handler
+            )
+            await client.write_gatt_char(ECG_COMMAND_CHARACTERISTIC_UUID, b"START")
+            print("✓ Streaming started")
+            self._ready.set()
+
+            # Keep connection alive until close() is called
+            print("[3/4] Streaming data (press STOP to end)...")
+            while not self._stop.is_set():
+                await asyncio.sleep(0.1)
+
+            print("[4/4] Stopping stream...")
+            try:
+                if client.is_connected:
+                    await client.write_gatt_char(
+                        ECG_COMMAND_CHARACTERISTIC_UUID, b"STOP"
+                    )
+                    await client.stop_notify(ECG_DATA_CHARACTERISTIC_UUID)
+            except Exception as e:
+                print(f"Warning: Error during cleanup: {e}")
+
+        except Exception as e:
+            print(f"BLE streaming error: {e}")
+            traceback.print_exc()
+
+        finally:
+            try:
+                if client.is_connected:
+                    await client.disconnect()
+                    print("✓ Disconnected from ESP32")
+            except Exception as e:
+                print(f"Warning: Error during disconnect: {e}")
+
+    def read(self, timeout=0.01):
+        try:
+            self.last_arrival, data = self.data_queue.get(timeout=timeout)
+            return data
+        except queue.Empty:
+            return b""
+
+    def write(self, data, timeout=5.0):
+        """
+        Send a command (b"START", b"STOP", ...) on the command characteristic. Runs on the
+        BLE thread's event loop and waits for it, so it can be called from any other
+        thread. The line ending the serial firmware needs is dropped.
+        """
+        if self.client is None or self._loop is None or not self._loop.is_running():
+            print(f"Warning: BLE not connected, command {bytes(data)!r} not sent")
+            return
+        command = bytes(data).rstrip(b"\r\n")
+        future = asyncio.run_coroutine_threadsafe(
+            self.client.write_gatt_char(ECG_COMMAND_CHARACTERISTIC_UUID, command),
+            self._loop,
+        )
+        future.result(timeout=timeout)
+
+    def queue_depth(self):
+        return self.data_queue.qsize()
+
+    def close(self):
+        """Signal the BLE thread to send STOP and disconnect, then wait for it."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
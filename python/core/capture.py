@@ -0,0 +1,189 @@
+# classes included: CaptureWriter
+# functions included: read_capture, start_capture, replay
+# note: raw capture of a streaming run. Every chunk handed to StreamingSession.feed (the bytes
+# exactly as the serial port / BLE notification delivered them, before any parsing) is
+# appended to a small binary file together with its arrival time. ReplayTransport.from_capture
+# plays it back through the full pipeline, at the original pace, N times faster or as fast
+# as possible, so parser or detector changes can be checked against real field data.
+
+import datetime
+import json
+import os
+import struct
+import sys
+import threading
+import time
+
+from python.core.sinks import Sink
+
+CAPTURE_MAGIC = b"ECGCAP1\n"
+# Record layout: arrival (s since the first chunk, float64) + chunk length (uint32) + bytes
+RECORD_HEADER = struct.Struct("<dI")
+
+
+class CaptureWriter(Sink):
+    """
+    Appends raw transport chunks to a capture file (raw_capture.ecgcap).
+    StreamingSession calls write() for every chunk when session.capture is set; as a sink
+    the writer closes the file when the session ends.
+
+    Args:
+        path: Capture file to create
+        source: Free text stored in the header (transport name, device, ...)
+        config: Optional Config; packet_size and fs are stored in the header
+    """
+
+    def __init__(self, path, source=None, config=None):
+        self.path = path
+        self.chunks = 0
+        self.bytes = 0
+        self._t0 = None
+        self._file = open(path, "wb")
+        header = {
+            "version": 1,
+            "start_time": datetime.datetime.now().isoformat(),
+            "source": source,
+        }
+        if config is not None:
+            header.update(packet_size=config.packet_size, fs=config.fs)
+        self._file.write(CAPTURE_MAGIC + json.dumps(header).encode("utf-8") + b"\n")
+
+    def write(self, data, arrival):
+        """
+        Args:
+            data: Chunk as received
+            arrival: time.perf_counter() of its arrival
+        """
+        if self._t0 is None:
+            self._t0 = arrival
+        self._file.write(RECORD_HEADER.pack(arrival - self._t0, len(data)) + data)
+        self.chunks += 1
+        self.bytes += len(data)
+
+    def close(self):
+        if self._file.closed:
+            return
+        self._file.close()
+        print(
+            f"💾 Raw capture: {self.chunks} chunks, {self.bytes} bytes -> {self.path}"
+        )
+
+
+def read_capture(path):
+    """
+    Read a capture file. A tail cut off by a crash is ignored.
+
+    Returns:
+        (header dict, list of (arrival_s, bytes))
+    """
+    with open(path, "rb") as f:
+        if f.read(len(CAPTURE_MAGIC)) != CAPTURE_MAGIC:
+            raise ValueError(f"{path} is not a raw capture file")
+        header = json.loads(f.readline())
+        chunks = []
+        while True:
+            record = f.read(RECORD_HEADER.size)
+            if len(record) < RECORD_HEADER.size:
+                break
+            arrival, length = RECORD_HEADER.unpack(record)
+            data = f.read(length)
+            if len(data) < length:
+                break
+            chunks.append((arrival, data))
+    return header, chunks
+
+
+def start_capture(config, output_dir, session, source=None):
+    """
+    Tee the session's raw chunks into <output_dir>/raw_capture.ecgcap if heartrate_config
+    "capture_raw" is true (scripts also accept --capture).
+
+    Returns:
+        The CaptureWriter, or None if capturing is off
+    """
+    if not config.capture_raw:
+        return None
+    writer = CaptureWriter(
+        os.path.join(output_dir, "raw_capture.ecgcap"), source=source, config=config
+    )
+    session.capture = writer
+    session.add_sink(writer)
+    return writer
+
+
+def replay(source_path, output_dir, speed=1.0, config=None, virtual=False):
+    """
+    Run a capture (or a streamed_raw_packets.csv) through the full streaming pipeline and
+    write the usual streamed_*.csv outputs to output_dir.
+
+    Args:
+        source_path: raw_capture.ecgcap or streamed_raw_packets.csv
+        speed: 1.0 = original pace, N = N times faster, None = as fast as possible
+        virtual: Replay at `speed` on a VirtualClock: the pipeline sees the recorded
+            timing (so the windowed BPM updates as it did live) but nothing waits
+
+    Returns:
+        The finished StreamingSession; session.replay_seconds is how long the pipeline
+        took (without the final CSV writes)
+    """
+    from python.core.clock import SYSTEM_CLOCK, VirtualClock
+    from python.core.config import Config
+    from python.core.streaming import StreamingSession, create_csv_loggers
+    from python.core.sinks import CSVSink
+    from python.core.transports import ReplayTransport
+    from python.core.headless import _wait_for_loggers
+
+    config = config or Config()
+    if source_path.endswith(".csv"):
+        transport = ReplayTransport.from_csv(source_path, speed=speed)
+    else:
+        transport = ReplayTransport.from_capture(source_path, speed=speed)
+
+    os.makedirs(output_dir, exist_ok=True)
+    stop_flag = threading.Event()
+    clock = VirtualClock(start=time.time()) if virtual else SYSTEM_CLOCK
+    csv_logger, bpm_logger = create_csv_loggers(
+        config, output_dir, stop_flag, clock=clock
+    )
+    # The replay ends when the transport runs out, however long the recorded pauses were
+    session = StreamingSession(
+        config,
+        transport,
+        stop_flag=stop_flag,
+        no_data_timeout=float("inf"),
+        verbose=False,
+        clock=clock,
+    )
+    session.add_sink(CSVSink(csv_logger, bpm_logger))
+
+    started = time.perf_counter()
+    try:
+        session.run()
+    except KeyboardInterrupt:
+        print("\nInterrupted, stopping replay...")
+        session.finish()
+    elapsed = time.perf_counter() - started
+    stop_flag.set()  # final CSV writes
+    _wait_for_loggers((csv_logger, bpm_logger))
+
+    session.replay_seconds = elapsed
+    recorded = transport.duration()
+    print(
+        f"▶️ Replayed {len(transport.frames)} chunks ({recorded:.1f} s recorded) in "
+        f"{elapsed:.2f} s ({recorded / elapsed if elapsed else float('inf'):.1f}x), "
+        f"{session.parser.packet_count} packets, {len(session.detector.detected_peaks)} R-peaks"
+    )
+    return session
+
+
+if __name__ == "__main__":
+    # Usage: python3 -m python.core.capture <raw_capture.ecgcap | streamed_raw_packets.csv>
+    #                                       <output_dir> [--speed=N | --max] [--virtual]
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    speed = 1.0
+    for arg in sys.argv[1:]:
+        if arg.startswith("--speed="):
+            speed = float(arg.split("=", 1)[1])
+        elif arg == "--max":
+            speed = None
+    replay(args[0], args[1], speed=speed, virtual="--virtual" in sys.argv)
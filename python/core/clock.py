@@ -0,0 +1,151 @@
+# classes included: Clock, VirtualClock
+# note: the time source of the streaming engine (StreamingSession, the transports, the CSV
+# loggers and AsyncBLEStreamer). Everything timeout-driven - the no-data timeout, the startup
+# grace, the 1 s BPM update, the recording duration, the writers' flush interval, replay
+# pacing - reads and sleeps through a Clock, so a test or a replay can swap the wall clock for
+# a VirtualClock and run a 10 minute session in seconds with the same results.
+
+import asyncio
+import selectors
+import threading
+import time
+
+
+class Clock:
+    """
+    The wall clock: time.time(), time.perf_counter(), time.sleep() and asyncio.run().
+    SYSTEM_CLOCK is the instance everything uses unless told otherwise.
+    """
+
+    virtual = False
+
+    def time(self):
+        """Seconds since the epoch (what time.time() returns)."""
+        return time.time()
+
+    def perf_counter(self):
+        """Monotonic seconds, for measuring intervals (pacing)."""
+        return time.perf_counter()
+
+    def sleep(self, seconds):
+        time.sleep(seconds)
+
+    def wait(self, event, seconds):
+        """
+        Background wait (e.g. a CSV writer between flushes): up to `seconds`, or until
+        `event` is set.
+
+        Returns:
+            True if the event is set
+        """
+        return event.wait(seconds)
+
+    def run(self, coroutine):
+        """Run a coroutine on a new event loop whose timers follow this clock."""
+        return asyncio.run(coroutine)
+
+
+SYSTEM_CLOCK = Clock()
+
+
+class _VirtualSelector(selectors.DefaultSelector):
+    """Polls instead of blocking until the next timer, and moves the clock there instead."""
+
+    def __init__(self, clock):
+        super().__init__()
+        self.clock = clock
+
+    def select(self, timeout=None):
+        events = super().select(None if timeout is None else 0)
+        if not events and timeout:
+            self.clock.advance(timeout)
+        return events
+
+
+class _VirtualEventLoop(asyncio.SelectorEventLoop):
+    def __init__(self, clock):
+        super().__init__(_VirtualSelector(clock))
+        self.clock = clock
+
+    def time(self):
+        return self.clock.time()
+
+
+class VirtualClock(Clock):
+    """
+    Simulated time for tests and replays. Nothing waits in real time.
+
+    Threads: every thread that calls sleep() drives the clock until it ends (the
+    streaming thread, through the transport's pacing). Time only moves when all of them
+    are asleep, and then jumps straight to the earliest wake-up, so a thread that is busy
+    (processing a chunk) holds time still and the threads wake in the same order on every
+    run. wait() is for background threads (the CSV writers): they follow the time the
+    drivers make and never move it, so when they flush does not change the results.
+
+    asyncio: run() runs the coroutine on an event loop that, instead of waiting for its
+    next timer (asyncio.sleep, call_later), moves the clock to it. Real I/O and
+    run_in_executor() still complete in real time.
+
+    Args:
+        start: Initial time() value
+    """
+
+    virtual = True
+
+    def __init__(self, start=0.0):
+        self._now = float(start)
+        self._condition = threading.Condition()
+        self._threads = set()  # threads driving the clock
+        self._sleeping = {}  # driving thread -> wake-up time
+
+    def time(self):
+        return self._now
+
+    def perf_counter(self):
+        return self._now
+
+    def advance(self, seconds):
+        """Move time forward (waking the threads whose sleep is over)."""
+        with self._condition:
+            self._now += max(0.0, seconds)
+            self._condition.notify_all()
+
+    def _advance_if_all_asleep(self):
+        # Threads that ended no longer hold time back
+        self._threads = {thread for thread in self._threads if thread.is_alive()}
+        if not self._sleeping or any(
+            thread not in self._sleeping for thread in self._threads
+        ):
+            return False
+        wake = min(self._sleeping.values())
+        if wake <= self._now:
+            return False  # that thread is waking up: it is busy again
+        self._now = wake
+        self._condition.notify_all()
+        return True
+
+    def sleep(self, seconds):
+        thread = threading.current_thread()
+        with self._condition:
+            wake = self._now + max(0.0, seconds)
+            self._threads.add(thread)
+            self._sleeping[thread] = wake
+            try:
+                while self._now < wake:
+                    if not self._advance_if_all_asleep():
+                        # A thread dying does not notify: look again now and then
+                        self._condition.wait(0.01)
+            finally:
+                del self._sleeping[thread]
+
+    def wait(self, event, seconds):
+        with self._condition:
+            wake = self._now + max(0.0, seconds)
+            while self._now < wake and not event.is_set():
+                # Setting the event does not notify: look again now and then
+                self._condition.wait(0.01)
+        return event.is_set()
+
+    def run(self, coroutine):
+        with asyncio.Runner(loop_factory=lambda: _VirtualEventLoop(self)) as runner:
+            return runner.run(coroutine)
@@ -0,0 +1,55 @@
+# classes included: Config
+# functions included: default_config_path
+# note: single copy of the streaming Config that used to live in every step4/step2 streaming script
+
+import json
+import os
+
+# heartrate_config lives in python/, one level above core/
+CONFIG_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+
+def default_config_path():
+    """
+    Return the path of heartrate_config.json in the python/ folder.
+    The file is checked in as heartrate_config.JSON, so match the name case-insensitively
+    (macOS does this for free, Linux does not).
+    """
+    for name in os.listdir(CONFIG_DIR):
+        if name.lower() == "heartrate_config.json":
+            return os.path.join(CONFIG_DIR, name)
+    return os.path.join(CONFIG_DIR, "heartrate_config.json")
+
+
+class Config:
+    def __init__(self, json_path=None):
+        if json_path is None:
+            json_path = default_config_path()
+        with open(json_path, "r") as f:
+            data = json.load(f)
+
+        # Extract parameters from JSON
+        self.type_of_data = data.get("type_of_data", "open-source")
+        self.open_source_time_s = data.get("open_source_time_s", 5)
+        self.bpm = data.get("bpm", 75)
+        self.sampling_hz = data.get("sampling_hz", 250)
+        self.num_beats = data.get("num_beats", 5)
+        self.heartbeat_type = data.get("heartbeat_type", "regular")
+        self.durations = data.get("durations", {})
+        self.plot_window_s = data.get("plot_window_s", 5)
+        self.journaled_recording = data.get("journaled_recording", False)
+        self.acquisition_process = data.get("acquisition_process", False)
+        self.headless = data.get("headless", False)
+        self.log_level = data.get("log_level", "info")
+        self.metrics_port = data.get("metrics_port", 9108)
+        self.metrics_interval_s = data.get("metrics_interval_s", 5)
+        self.trace = data.get("trace", False)
+        self.capture_raw = data.get("capture_raw", False)
+        self.profile = data.get("profile", False)
+        self.profile_interval_ms = data.get("profile_interval_ms", 5)
+        self.profile_snapshot_s = data.get("profile_snapshot_s", 30)
+
+        # Derived parameters for MCU streaming
+        self.fs = self.sampling_hz
+        self.packet_size = 28  # ← adjust based on your firmware definition
+        self.max_samples_plotted = self.fs * self.plot_window_s  # e.g., 250*5 = 1250
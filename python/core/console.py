@@ -0,0 +1,58 @@
+# classes included: ConsoleLog
+# note: rate-limited terminal messages for the streaming path. Per-peak and per-batch messages
+# used to be printed unconditionally from the session and logger threads; they now go through
+# `console`, which drops them below the configured level and caps each kind of message at a
+# few lines per second. Everything else in the repo keeps using print().
+
+import sys
+import time
+
+LEVELS = {"quiet": 0, "info": 1, "debug": 2}
+
+
+class ConsoleLog:
+    """
+    Args:
+        level: "quiet", "info" or "debug" (heartrate_config "log_level")
+        max_per_second: Lines per second allowed for each message key; the rest are
+            counted and reported with the next line that gets through
+    """
+
+    def __init__(self, level="info", max_per_second=2.0, stream=None):
+        self.set_level(level)
+        self.min_interval = 1.0 / max_per_second if max_per_second else 0.0
+        self.stream = stream
+        self._last = {}  # key -> time.monotonic() of the last line printed
+        self._suppressed = {}  # key -> lines dropped since then
+
+    def set_level(self, level):
+        if level not in LEVELS:
+            print(f"⚠️ Unknown log_level '{level}', using 'info'")
+            level = "info"
+        self.level = level
+        self._level = LEVELS[level]
+
+    def info(self, key, message):
+        """Status messages (windowed BPM, ...): shown at info and debug."""
+        if self._level >= 1:
+            self._emit(key, message)
+
+    def debug(self, key, message):
+        """Per-peak / per-batch messages: shown at debug only."""
+        if self._level >= 2:
+            self._emit(key, message)
+
+    def _emit(self, key, message):
+        now = time.monotonic()
+        if now - self._last.get(key, -1e9) < self.min_interval:
+            self._suppressed[key] = self._suppressed.get(key, 0) + 1
+            return
+        self._last[key] = now
+        suppressed = self._suppressed.pop(key, 0)
+        if suppressed:
+            message = f"{message} (+{suppressed} similar)"
+        print(message, file=self.stream or sys.stdout)
+
+
+# Shared by the session and the CSV loggers; scripts call console.set_level(config.log_level)
+console = ConsoleLog()
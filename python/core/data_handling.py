@@ -2,6 +2,7 @@ import struct
 
 
 # classes included: Packet, Packet_Parser
+# functions included: encode_packet
 # pulled from Desktop/Heart Rate Project/heartrate_project_v10.py
 class Packet:
     """Represents a single parsed packet with its attributes"""
@@ -26,6 +27,8 @@ class PacketParser:
         self.NUM_SAMPLES = 10
         self.SAMPLE_INTERVAL_MS = 4
         self.packet_count = 0
+        self.skipped_bytes = 0  # bytes dropped while looking for a header
+        self.parse_errors = 0  # frames rejected for a bad end marker
 
     def update_buffer(self, data):
         self.buffer += data
@@ -33,6 +36,15 @@ class PacketParser:
     def has_complete_packet(self):
         return len(self.buffer) >= self.packet_size
 
+    def get_packets(self):
+        """Parse every complete packet currently in the buffer (skipping resync attempts)."""
+        packets = []
+        while len(self.buffer) >= self.packet_size:
+            packet = self.get_packet()
+            if packet is not None:
+                packets.append(packet)
+        return packets
+
     def get_packet(self):
         # Not enough bytes yet
         if len(self.buffer) < self.packet_size:
@@ -41,6 +53,7 @@ class PacketParser:
         # Check header
         if self.buffer[0] != self.HEADER_1 or self.buffer[1] != self.HEADER_2:
             self.buffer = self.buffer[1:]  # Shift by 1 and retry
+            self.skipped_bytes += 1
             return None
 
         # Extract packet
@@ -50,6 +63,7 @@ class PacketParser:
         # Check footer
         if packet[-1] != self.END_MARKER:
             print("⚠️ End marker mismatch, resyncing...")
+            self.parse_errors += 1
             # Resync: find next header
             while len(self.buffer) >= 2 and not (
                 self.buffer[0] == self.HEADER_1 and self.buffer[1] == self.HEADER_2
@@ -70,3 +84,16 @@ class PacketParser:
 
         # Return Packet object
         return Packet(packet_id, timestamp, samples, sample_times)
+
+
+def encode_packet(packet_id, timestamp, samples):
+    """
+    Build the 28-byte frame the gateway firmware sends (inverse of PacketParser.get_packet).
+    Header (2) + Packet ID (1) + Timestamp (4, ms, little-endian) + 10 samples (20) + End marker (1)
+    """
+    return (
+        bytes((0xAA, 0x55, packet_id & 0xFF))
+        + struct.pack("<I", timestamp & 0xFFFFFFFF)
+        + struct.pack("<" + "H" * 10, *[s & 0x0FFF for s in samples])
+        + b"\xff"
+    )
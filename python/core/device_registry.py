@@ -0,0 +1,76 @@
+# classes included: DeviceRegistry
+# functions included: default_registry_path
+# note: remembers the BLE gateways this machine has connected to (name -> address, last seen,
+# connection parameters) so the next run can connect directly instead of scanning first.
+# Used by ble_transport.connect_known_device.
+
+import datetime
+import json
+import os
+
+
+def default_registry_path():
+    """data_logs/ble_devices.json in the working directory, next to the run folders."""
+    return os.path.join(os.getcwd(), "data_logs", "ble_devices.json")
+
+
+class DeviceRegistry:
+    """
+    Small JSON file of known devices, keyed by advertised name:
+
+        {"ESP32_ECG": {"address": "EC:60:...", "last_seen": "2026-...",
+                       "connect_time_s": 0.84, "connect_timeout_s": 5.0, "mtu_size": 247}}
+
+    Args:
+        path: JSON file (default: data_logs/ble_devices.json)
+    """
+
+    def __init__(self, path=None):
+        self.path = path or default_registry_path()
+        self.devices = {}
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, "r") as f:
+                    self.devices = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"⚠️ Ignoring unreadable device registry {self.path}: {e}")
+
+    def get(self, name):
+        """Returns the entry for `name` (dict with at least "address"), or None."""
+        return self.devices.get(name)
+
+    def connect_timeout(self, name, minimum=3.0, default=10.0):
+        """
+        How long a direct connect to a known device is given before it is written off:
+        a few times its last connect time, never less than `minimum`.
+        """
+        entry = self.get(name)
+        if entry is None or not entry.get("connect_time_s"):
+            return default
+        return max(minimum, 3.0 * entry["connect_time_s"])
+
+    def remember(self, name, address, connect_time_s=None, mtu_size=None):
+        """Record a successful connection and save the registry."""
+        entry = self.devices.setdefault(name, {})
+        entry["address"] = address
+        entry["last_seen"] = datetime.datetime.now().isoformat()
+        if connect_time_s is not None:
+            entry["connect_time_s"] = round(connect_time_s, 3)
+            entry["connect_timeout_s"] = round(self.connect_timeout(name), 3)
+        if mtu_size is not None:
+            entry["mtu_size"] = mtu_size
+        self.save()
+
+    def forget(self, name):
+        if self.devices.pop(name, None) is not None:
+            self.save()
+
+    def save(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        try:
+            with open(self.path, "w") as f:
+                json.dump(self.devices, f, indent=2)
+        except OSError as e:
+            print(f"⚠️ Could not save device registry {self.path}: {e}")
@@ -0,0 +1,379 @@
+# classes included: FaultInjector, FaultyTransport, FaultReport
+# functions included: faulty_client_class
+# note: seeded fault injection between a transport and StreamingSession, to measure how the
+# parser and detector degrade on a bad link and what recovering costs. The same injector
+# wraps a Transport (serial, TCP, replay) or, for BLE, the notifications of a Bleak-compatible
+# client class (the real one or the stand-in). Fault lengths are counted in chunks, not
+# seconds, so a given seed produces the same faults at any replay speed.
+
+import json
+import random
+import time
+
+import numpy as np
+
+from python.core.transports import Transport
+
+FAULTS = ("corrupt", "drop", "duplicate", "truncate", "burst", "disconnect")
+
+
+class FaultInjector:
+    """
+    Decides, chunk by chunk, what reaches the host. Every rate is the probability that a
+    fault starts at a given chunk.
+
+    Args:
+        corrupt: One random byte of the chunk is flipped
+        drop: The chunk is lost
+        duplicate: The chunk is delivered twice (a repeated notification)
+        truncate: The tail of the chunk is cut off at a random point
+        burst: The next burst_chunks chunks are held back and then delivered at once
+            (a stalled link flushing its buffer)
+        disconnect: The link goes down for disconnect_chunks chunks (all lost)
+        seed: Seed of the fault sequence
+        packet_size: Bytes of a gateway packet, to count the packets of duplicated chunks
+    """
+
+    def __init__(
+        self,
+        corrupt=0.0,
+        drop=0.0,
+        duplicate=0.0,
+        truncate=0.0,
+        burst=0.0,
+        disconnect=0.0,
+        burst_chunks=10,
+        disconnect_chunks=12,
+        seed=0,
+        packet_size=28,
+    ):
+        self.rates = {
+            "corrupt": corrupt,
+            "drop": drop,
+            "duplicate": duplicate,
+            "truncate": truncate,
+            "burst": burst,
+            "disconnect": disconnect,
+        }
+        self.burst_chunks = burst_chunks
+        self.disconnect_chunks = disconnect_chunks
+        self.random = random.Random(seed)
+        self.packet_size = packet_size
+        self.counts = {fault: 0 for fault in FAULTS}
+        self.packets_duplicated = 0  # whole packets delivered a second time
+        self.chunks_in = 0
+        self.chunks_out = 0
+        self.held_seconds = 0.0  # total time chunks spent held back in bursts
+        self._held = []  # (arrival, chunk) waiting for the end of a burst
+        self._hold_left = 0
+        self._down_left = 0
+
+    @classmethod
+    def from_spec(cls, spec):
+        """Build from "fault=rate,...", e.g. "corrupt=0.01,drop=0.02,seed=3"."""
+        kwargs = {}
+        for item in spec.split(","):
+            if not item.strip():
+                continue
+            key, value = item.split("=", 1)
+            key = key.strip()
+            kwargs[key] = (
+                int(value)
+                if key in ("seed", "burst_chunks", "disconnect_chunks", "packet_size")
+                else float(value)
+            )
+        return cls(**kwargs)
+
+    def _starts(self, fault):
+        rate = self.rates[fault]
+        if rate > 0 and self.random.random() < rate:
+            self.counts[fault] += 1
+            return True
+        return False
+
+    def apply(self, chunk, arrival):
+        """
+        Args:
+            chunk: Bytes as the transport delivered them
+            arrival: time.perf_counter() of their arrival
+
+        Returns:
+            list of (arrival, bytes) to deliver now, oldest first (empty if the chunk was
+            lost or is being held back)
+        """
+        self.chunks_in += 1
+        if self._down_left:
+            self._down_left -= 1
+            return []
+        if self._starts("disconnect"):
+            self._down_left = self.disconnect_chunks - 1
+            return []
+        if self._starts("drop"):
+            return []
+
+        if len(chunk) > 1 and self._starts("truncate"):
+            chunk = chunk[: self.random.randrange(1, len(chunk))]
+        if chunk and self._starts("corrupt"):
+            position = self.random.randrange(len(chunk))
+            flipped = chunk[position] ^ self.random.randrange(1, 256)
+            chunk = chunk[:position] + bytes((flipped,)) + chunk[position + 1 :]
+        out = [(arrival, chunk)]
+        if self._starts("duplicate"):
+            out.append((arrival, chunk))
+            self.packets_duplicated += len(chunk) // self.packet_size
+
+        if not self._hold_left and self._starts("burst"):
+            self._hold_left = self.burst_chunks
+        if self._hold_left:
+            self._held.extend(out)
+            self._hold_left -= 1
+            if self._hold_left:
+                return []
+            out, self._held = self._held, []
+            released = time.perf_counter()
+            self.held_seconds += sum(released - held_at for held_at, _ in out)
+        self.chunks_out += len(out)
+        return out
+
+
+class FaultyTransport(Transport):
+    """
+    Wraps any Transport and passes its chunks through a FaultInjector. Chunks released
+    together (a burst, a duplicate) come out of one read(), as they would from a serial
+    port; last_arrival is the arrival of the oldest of them.
+    """
+
+    def __init__(self, inner, injector):
+        self.inner = inner
+        self.injector = injector
+        self.name = f"faulty-{inner.name}"
+
+    @property
+    def clock(self):
+        return self.inner.clock
+
+    @clock.setter
+    def clock(self, clock):
+        self.inner.clock = clock
+
+    def open(self):
+        return self.inner.open()
+
+    def read(self, timeout=0.01):
+        data = self.inner.read(timeout)
+        if not data:
+            return data  # b"" (nothing yet) or None (end of data)
+        arrival = self.inner.last_arrival or time.perf_counter()
+        out = self.injector.apply(data, arrival)
+        if not out:
+            return b""
+        self.last_arrival = out[0][0]
+        return b"".join(chunk for _, chunk in out)
+
+    def write(self, data):
+        self.inner.write(data)
+
+    def close(self):
+        self.inner.close()
+
+    def queue_depth(self):
+        return self.inner.queue_depth()
+
+
+def faulty_client_class(client_class, injector):
+    """
+    A Bleak-compatible client class whose notifications pass through `injector`, for
+    AsyncBLEStreamer / find_and_connect (client_class=...). Chunks released together
+    are delivered as consecutive notifications.
+    """
+
+    class FaultyClient(client_class):
+        async def start_notify(self, char_uuid, callback, **kwargs):
+            def faulty_callback(sender, data):
+                for _, chunk in injector.apply(bytes(data), time.perf_counter()):
+                    callback(sender, bytearray(chunk))
+
+            await super().start_notify(char_uuid, faulty_callback, **kwargs)
+
+    return FaultyClient
+
+
+class FaultReport:
+    """
+    What the faults did to a session, compared with a clean run of the same data.
+
+    attach() wraps session.feed to time every chunk on the thread that processes it, and
+    counts a chunk as resync work when the parser skipped bytes or rejected a frame in it
+    (resync_cpu_ms is the whole CPU of those chunks; compare resync_chunk_us with
+    normal_chunk_us for the extra cost).
+
+    Args:
+        injector: The FaultInjector of the run (its counts go into the report)
+        peak_tolerance: Samples (of MCU time) a peak may move and still count as the same
+            beat (25 = 100 ms at 250 Hz)
+    """
+
+    def __init__(self, injector=None, peak_tolerance=25):
+        self.injector = injector
+        self.peak_tolerance = peak_tolerance
+        self.session = None
+        self.feed_cpu = 0.0
+        self.resync_cpu = 0.0
+        self.chunks = 0
+        self.resync_chunks = 0
+
+    def attach(self, session):
+        self.session = session
+        feed = session.feed
+
+        def parser_counts():
+            return session.parser.skipped_bytes, session.parser.parse_errors
+
+        def timed_feed(data, arrival=None):
+            before = parser_counts()
+            start = time.thread_time()
+            packets = feed(data, arrival)
+            spent = time.thread_time() - start
+            self.feed_cpu += spent
+            self.chunks += 1
+            if parser_counts() != before:
+                self.resync_cpu += spent
+                self.resync_chunks += 1
+            return packets
+
+        session.feed = timed_feed
+        return self
+
+    @staticmethod
+    def _peak_times(session):
+        """MCU time (ms) of every detected peak: its packet's timestamp + 4 ms per sample."""
+        timestamps = session.mcu_timestamps
+        return [
+            timestamps[index // 10] + (index % 10) * 4
+            for index in session.detector.detected_peaks
+            if index // 10 < len(timestamps)
+        ]
+
+    def _peak_drift(self, reference, session):
+        """
+        Match the detected peaks to the clean run's beats by MCU time, which lost or
+        repeated samples do not shift; the drift is how far the detector's sample index of
+        the same beat has moved from the clean run's.
+        """
+        reference_peaks = reference.detector.detected_peaks
+        peaks = session.detector.detected_peaks
+        if not reference_peaks or not peaks:
+            return {"matched": 0, "missed": len(reference_peaks), "extra": len(peaks)}
+        times = np.asarray(self._peak_times(session))
+        tolerance_ms = self.peak_tolerance * 4
+        drifts = []
+        used = set()
+        for reference_index, reference_time in zip(
+            reference_peaks, self._peak_times(reference)
+        ):
+            nearest = int(np.argmin(np.abs(times - reference_time)))
+            if (
+                abs(times[nearest] - reference_time) <= tolerance_ms
+                and nearest not in used
+            ):
+                used.add(nearest)
+                drifts.append(peaks[nearest] - reference_index)
+        abs_drifts = np.abs(drifts) if drifts else np.zeros(1, dtype=int)
+        return {
+            "matched": len(drifts),
+            "missed": len(reference_peaks) - len(drifts),
+            "extra": len(peaks) - len(drifts),
+            "drift_final_samples": int(drifts[-1]) if drifts else 0,
+            "drift_max_samples": int(abs_drifts.max()),
+        }
+
+    def summary(self, reference=None):
+        """
+        Args:
+            reference: StreamingSession of the clean run (optional)
+
+        Returns:
+            dict of faults, samples, peaks, latency and resync CPU
+        """
+        session = self.session
+        parser = session.parser
+        report = {
+            "faults": dict(self.injector.counts) if self.injector else {},
+            "samples_recovered": session.global_sample_counter,
+            "packets_parsed": parser.packet_count,
+            "packet_ids_lost": session.packets_lost,
+            "packet_ids_duplicated": session.packets_duplicated,
+            "packet_ids_reordered": session.packets_reordered,
+            "skipped_bytes": parser.skipped_bytes,
+            "parse_errors": parser.parse_errors,
+            "feed_cpu_ms": round(self.feed_cpu * 1000.0, 3),
+            "resync_cpu_ms": round(self.resync_cpu * 1000.0, 3),
+            "resync_chunks": self.resync_chunks,
+            # Average cost of a chunk that needed a resync vs one that did not
+            "resync_chunk_us": round(
+                (
+                    1e6 * self.resync_cpu / self.resync_chunks
+                    if self.resync_chunks
+                    else 0.0
+                ),
+                2,
+            ),
+            "normal_chunk_us": round(
+                (
+                    1e6
+                    * (self.feed_cpu - self.resync_cpu)
+                    / (self.chunks - self.resync_chunks)
+                    if self.chunks > self.resync_chunks
+                    else 0.0
+                ),
+                2,
+            ),
+        }
+        if self.injector is not None:
+            report["held_back_s"] = round(self.injector.held_seconds, 3)
+            report["packets_duplicated_injected"] = self.injector.packets_duplicated
+        latency = session.latency.summary() if session.latency is not None else {}
+        for stage in ("mcu_to_arrival", "end_to_end"):
+            if stage in latency:
+                report[f"{stage}_p99_ms"] = latency[stage]["p99_ms"]
+
+        if reference is not None:
+            expected = reference.global_sample_counter
+            report["samples_expected"] = expected
+            report["samples_recovered_percent"] = round(
+                100.0 * session.global_sample_counter / expected if expected else 0.0, 2
+            )
+            report["peaks"] = self._peak_drift(reference, session)
+            clean = reference.latency.summary() if reference.latency is not None else {}
+            for stage in ("mcu_to_arrival", "end_to_end"):
+                if stage in latency and stage in clean:
+                    report[f"{stage}_p99_added_ms"] = round(
+                        latency[stage]["p99_ms"] - clean[stage]["p99_ms"], 3
+                    )
+        return report
+
+    def check_packet_ids(self):
+        """
+        Assert that the duplicated and reordered packet IDs the session counted are the
+        ones the injector made (it duplicates whole chunks and never reorders). Skipped
+        when chunks were corrupted or truncated: those change IDs and packet boundaries.
+        """
+        injector = self.injector
+        if (
+            injector is None
+            or injector.counts["corrupt"]
+            or injector.counts["truncate"]
+        ):
+            return
+        session = self.session
+        assert session.packets_duplicated == injector.packets_duplicated, (
+            f"{session.packets_duplicated} packet IDs duplicated, "
+            f"{injector.packets_duplicated} injected"
+        )
+        assert (
+            session.packets_reordered == 0
+        ), f"{session.packets_reordered} packet IDs reordered, none injected"
+
+    def write(self, path, reference=None):
+        with open(path, "w") as f:
+            json.dump(self.summary(reference), f, indent=2)
@@ -0,0 +1,127 @@
+# classes included: StatusLine
+# functions included: run_headless, run_headless_async
+# note: GUI-free front-end for the streaming scripts (servers, containers, SSH sessions).
+# Nothing here - or anything it imports - pulls in PyQt5, pyqtgraph, matplotlib or wfdb.
+
+import asyncio
+import sys
+import time
+
+from python.core.sinks import Sink
+
+
+class StatusLine(Sink):
+    """
+    One self-overwriting terminal line with the state of the stream, refreshed at most
+    every `interval` seconds:
+
+        ⏱  42.0 s | packets 1050 | 250 samples/s | peaks 52 | BPM 74.8 | p99 0.21 ms
+
+    Args:
+        interval: Seconds between refreshes
+        stream: Where to write (default sys.stdout)
+        latency: The session's LatencyTracker, to show the end-to-end p99
+    """
+
+    def __init__(self, interval=1.0, stream=None, latency=None):
+        self.interval = interval
+        self.latency = latency
+        self.stream = stream if stream is not None else sys.stdout
+        self.start_time = None
+        self.last_print = 0.0
+        self.packets = 0
+        self.samples = 0
+        self.peaks = 0
+        self.bpm = 0.0
+        self._window_start = 0.0
+        self._window_samples = 0
+
+    def on_packet(self, packet, packet_count):
+        now = time.time()
+        if self.start_time is None:
+            self.start_time = self._window_start = now
+        self.packets = packet_count
+        self.samples += len(packet.samples)
+        if now - self.last_print >= self.interval:
+            self.print_status(now)
+
+    def on_peak(self, peak_index, sample_value, instantaneous_bpm):
+        self.peaks += 1
+
+    def on_bpm(self, windowed_bpm):
+        self.bpm = windowed_bpm
+
+    def print_status(self, now=None):
+        now = now if now is not None else time.time()
+        elapsed = now - self.start_time if self.start_time else 0.0
+        window = now - self._window_start
+        rate = (self.samples - self._window_samples) / window if window > 0 else 0.0
+        self._window_start, self._window_samples = now, self.samples
+        self.last_print = now
+        line = (
+            f"\r⏱ {elapsed:6.1f} s | packets {self.packets} | {rate:.0f} samples/s | "
+            f"peaks {self.peaks} | BPM {self.bpm:.1f}"
+        )
+        if self.latency is not None:
+            end_to_end = self.latency.summary().get("end_to_end")
+            if end_to_end:
+                line += f" | p99 {end_to_end['p99_ms']:.2f} ms"
+        self.stream.write(line + "   ")
+        self.stream.flush()
+
+    def close(self):
+        if self.start_time is not None:
+            self.print_status()
+        self.stream.write("\n")
+        self.stream.flush()
+
+
+def _wait_for_loggers(loggers, timeout=3.0):
+    for logger in loggers:
+        if logger._thread:
+            logger._thread.join(timeout=timeout)
+        print(f"✓ Data saved to: {logger.file_name}")
+
+
+def run_headless(session, loggers=()):
+    """
+    Run a threaded StreamingSession without a window. Ctrl+C stops the stream cleanly
+    (device STOP, final CSV writes).
+
+    Returns:
+        int: 0 when the stream ended normally, 1 if the transport could not be opened
+    """
+    if not session.transport.open():
+        print("ERROR: transport could not be opened, nothing to stream.")
+        session.stop_flag.set()
+        _wait_for_loggers(loggers)
+        return 1
+
+    try:
+        session.run()
+    except KeyboardInterrupt:
+        print("\nInterrupted, stopping stream...")
+        session.stop()
+        session.finish()
+
+    session.stop_flag.set()  # lets the logger threads do their final write
+    _wait_for_loggers(loggers)
+    return 0
+
+
+def run_headless_async(streamer, loggers=()):
+    """
+    Run an AsyncBLEStreamer without a window on the current thread.
+
+    Returns:
+        int: 0 when the device was connected and streamed, 1 otherwise
+    """
+    try:
+        connected = asyncio.run(streamer.run())
+    except KeyboardInterrupt:
+        # asyncio.run cancels the streamer; its cleanup disconnects and flushes the loggers
+        print("\nInterrupted, stream stopped.")
+        connected = True
+    for logger in loggers:
+        print(f"✓ Data saved to: {logger.file_name}")
+    return 0 if connected else 1
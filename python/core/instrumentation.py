@@ -0,0 +1,38 @@
+# functions included: attach_instrumentation
+# note: the outputs every streaming front-end adds to its StreamingSession next to the CSVs
+# (step4_stream_usb.py, step4_stream_ble.py, step2_stream_ble_realtime.py and the
+# acquisition process of the split GUI mode), kept in one place so a new one reaches all of them.
+
+import os
+
+from python.core.capture import start_capture
+from python.core.latency import LatencyReport
+from python.core.metrics import start_metrics
+from python.core.profiling import start_profiling
+from python.core.sinks import GapLogSink
+from python.core.tracing import start_tracing
+
+
+def attach_instrumentation(config, output_dir, session, loggers, source, label=None):
+    """
+    Add the gap log, latency summary and metrics of a streaming run to its session, plus
+    tracing, profiling and the raw capture when heartrate_config (or --trace, --profile,
+    --capture) turns them on. Their files go to output_dir.
+
+    Args:
+        loggers: The session's (csv_logger, bpm_logger), for the metrics' queue depths
+        source: "serial" or "ble", recorded in the raw capture
+        label: Name of the profile (e.g. "acquisition" in the split GUI mode)
+    """
+    session.add_sink(GapLogSink(os.path.join(output_dir, "stream_gaps.json")))
+    session.add_sink(
+        LatencyReport(session.latency, os.path.join(output_dir, "latency_summary.json"))
+    )
+    # Counters on http://127.0.0.1:<metrics_port>/metrics and in metrics.json
+    start_metrics(config, output_dir, session, loggers=loggers)
+    # --trace: per-thread timeline in trace.json (chrome://tracing / ui.perfetto.dev)
+    start_tracing(config, output_dir, session)
+    # --profile: sampled CPU profile + tracemalloc snapshots in profile/
+    start_profiling(config, output_dir, session, label=label)
+    # --capture: raw bytes + arrival times in raw_capture.ecgcap, replayable later
+    start_capture(config, output_dir, session, source=source)
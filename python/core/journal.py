@@ -0,0 +1,342 @@
+# classes included: JournaledCSVLogger
+# functions included: recover_journal
+# note: crash-safe drop-in for CSVLogger. Every batch is appended to a journal as a
+# length-prefixed, CRC-checked block before it reaches the CSV, and a small checkpoint
+# file records how far both files are known to be durable on disk. Blocks behind a
+# checkpoint are compacted away, and the journal is removed after a clean stop.
+
+import csv
+import io
+import json
+import os
+import queue
+import struct
+import sys
+import threading
+import time
+import datetime
+import zlib
+
+from python.core.logging import CSVLogger
+from python.core.tracing import tracer
+
+# Block layout: magic (2) + block type (1) + payload length (4) + CRC32 of payload (4)
+BLOCK_MAGIC = b"EJ"
+BLOCK_HEADER = struct.Struct("<2sBII")
+
+BLOCK_SESSION = 1  # JSON: CSV path, header, metadata path
+BLOCK_ROWS = 2  # CSV-encoded rows, byte-identical to what is appended to the CSV
+BLOCK_CLOSE = 3  # JSON: stop time and totals, written on clean shutdown
+
+
+def _fsync(f):
+    """Flush a file object all the way to disk (fdatasync where available)."""
+    f.flush()
+    if hasattr(os, "fdatasync"):
+        os.fdatasync(f.fileno())
+    else:
+        os.fsync(f.fileno())
+
+
+def encode_block(block_type, payload):
+    return (
+        BLOCK_HEADER.pack(BLOCK_MAGIC, block_type, len(payload), zlib.crc32(payload))
+        + payload
+    )
+
+
+def read_blocks(f, offset):
+    """
+    Yield (block_type, payload, end_offset) for every valid block from offset onwards.
+    Stops at the first truncated or corrupt block, which marks the damaged tail.
+    """
+    f.seek(offset)
+    while True:
+        header = f.read(BLOCK_HEADER.size)
+        if len(header) < BLOCK_HEADER.size:
+            return
+        magic, block_type, length, crc = BLOCK_HEADER.unpack(header)
+        if magic != BLOCK_MAGIC:
+            return
+        payload = f.read(length)
+        if len(payload) < length or zlib.crc32(payload) != crc:
+            return
+        offset += BLOCK_HEADER.size + length
+        yield block_type, payload, offset
+
+
+class JournaledCSVLogger(CSVLogger):
+    """
+    CSVLogger that survives the process being killed mid-recording.
+
+    Rows are written in small blocks (every write_interval seconds) to both the journal
+    and the CSV. Every checkpoint_interval seconds both files are fsynced and the
+    checkpoint file is atomically replaced, so recover_journal() only has to look at
+    the journal written after the last checkpoint.
+
+    Everything behind a checkpoint is already durable in the CSV, so once the journal
+    holds compact_bytes of rows it is cut back to its session block, and after a clean
+    stop it is removed with its checkpoint: the journal never becomes a second copy of
+    the recording.
+
+    The run metadata goes next to the CSV (<csv>.metadata.json) unless metadata_file is
+    given, so the raw and BPM loggers of a session, and their recoveries, do not
+    overwrite each other's manifest.
+    """
+
+    def __init__(
+        self,
+        file_name,
+        stop_flag,
+        write_interval=0.1,
+        checkpoint_interval=1.0,
+        journal_file=None,
+        clock=None,
+        metadata_file=None,
+        compact_bytes=1 << 20,
+    ):
+        super().__init__(
+            file_name, stop_flag, write_interval=write_interval, clock=clock
+        )
+        self.file_name = os.path.abspath(file_name)
+        self.metadata_file = os.path.abspath(
+            metadata_file or self.file_name + ".metadata.json"
+        )
+        self.journal_file = journal_file or self.file_name + ".journal"
+        self.checkpoint_file = self.journal_file + ".ckpt"
+        self.checkpoint_interval = checkpoint_interval
+        self.compact_bytes = compact_bytes
+        self._session_end = None  # journal offset just after the session block
+        self._journal = None
+        self._csv = None
+        self._last_checkpoint = 0.0
+
+    def create_CSV(self, header=None):
+        self.header = header
+        self._csv = open(self.file_name, "w+b")
+        self._csv.write(self._encode_rows([self.header]))
+
+        self._journal = open(self.journal_file, "w+b")
+        session = {
+            "csv_file": self.file_name,
+            "header": self.header,
+            "metadata_file": self.metadata_file,
+        }
+        self._journal.write(
+            encode_block(BLOCK_SESSION, json.dumps(session).encode("utf-8"))
+        )
+        self._session_end = self._journal.tell()
+        self.checkpoint()
+
+        self._thread = threading.Thread(target=self.write_batch_to_csv, daemon=False)
+        self._thread.start()
+
+    @staticmethod
+    def _encode_rows(rows):
+        text = io.StringIO()
+        csv.writer(text).writerows(rows)
+        return text.getvalue().encode("utf-8")
+
+    def _drain_queue(self):
+        batch = []
+        while True:
+            try:
+                batch.append(self.csv_queue.get(block=False))
+            except queue.Empty:
+                return batch
+
+    def _append_rows(self, rows):
+        if tracer.enabled:
+            flush_start = time.perf_counter_ns()
+        payload = self._encode_rows(rows)
+        self._journal.write(encode_block(BLOCK_ROWS, payload))
+        self._csv.write(payload)
+        self.samples_written += len(rows)
+        if tracer.enabled:
+            tracer.span("csv_flush", flush_start, value=len(rows))
+
+    def checkpoint(self):
+        """Make everything written so far durable and record where it ends."""
+        if tracer.enabled:
+            checkpoint_start = time.perf_counter_ns()
+        _fsync(self._journal)
+        _fsync(self._csv)
+        journal_offset = self._journal.tell()
+        if journal_offset - self._session_end >= self.compact_bytes:
+            self._compact(journal_offset)
+        else:
+            self._write_checkpoint(journal_offset)
+        if tracer.enabled:
+            tracer.span("journal_checkpoint", checkpoint_start)
+
+    def _compact(self, journal_offset):
+        """
+        Cut the journal back to its session block: every row block up to journal_offset
+        is durable in the CSV. The checkpoint written before the cut records where it
+        started (compacted_from), so a recovery after a crash before the truncate does
+        not append those blocks to the CSV a second time.
+        """
+        self._write_checkpoint(self._session_end, compacted_from=journal_offset)
+        self._journal.truncate(self._session_end)
+        self._journal.seek(self._session_end)
+        _fsync(self._journal)
+        self._write_checkpoint(self._session_end)
+
+    def _write_checkpoint(self, journal_offset, compacted_from=None):
+        checkpoint = {
+            "journal_offset": journal_offset,
+            "csv_offset": self._csv.tell(),
+            "samples_written": self.samples_written,
+            "start_time": self.start_time,
+            "stop_time": self.stop_time,
+            "csv_file": self.file_name,
+            "header": self.header,
+            "metadata_file": self.metadata_file,
+        }
+        if compacted_from is not None:
+            checkpoint["compacted_from"] = compacted_from
+        tmp_path = self.checkpoint_file + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(checkpoint, f)
+            _fsync(f)
+        os.replace(tmp_path, self.checkpoint_file)
+        self._last_checkpoint = self.clock.time()
+
+    def write_batch_to_csv(self):
+        while not self.stop_flag.is_set():
+            self.clock.wait(self.stop_flag, self.write_interval)
+            batch = self._drain_queue()
+            if len(batch) > 0:
+                self._append_rows(batch)
+            if self.clock.time() - self._last_checkpoint >= self.checkpoint_interval:
+                self.checkpoint()
+
+        print("Streaming stopped, writing remaining data...")
+        final_batch = self._drain_queue()
+        if len(final_batch) > 0:
+            self._append_rows(final_batch)
+            print(f"📝 Final write: {len(final_batch)} samples")
+
+        self.stop_time = datetime.datetime.now().isoformat()
+        close = {"stop_time": self.stop_time, "samples_written": self.samples_written}
+        self._journal.write(
+            encode_block(BLOCK_CLOSE, json.dumps(close).encode("utf-8"))
+        )
+        self.checkpoint()
+        self._journal.close()
+        self._csv.close()
+
+        print(f"✅ CSV writer finished. Total samples written: {self.samples_written}")
+        self.save_metadata()
+        # The CSV and its metadata are complete: there is nothing left to recover
+        os.remove(self.journal_file)
+        os.remove(self.checkpoint_file)
+
+
+def recover_journal(journal_file):
+    """
+    Rebuild the CSV and run metadata of a session whose writer was killed.
+
+    Starts from the last checkpoint, so the work done is proportional to the journal
+    written after it (the damaged tail), not to the length of the recording. The CSV is
+    cut back to the checkpointed offset and every intact block after the checkpoint is
+    re-appended; the journal is truncated after its last intact block.
+
+    Args:
+        journal_file: Path to the .journal file written by JournaledCSVLogger
+
+    Returns:
+        dict: The manifest that was written to the session's metadata file
+    """
+    checkpoint_file = journal_file + ".ckpt"
+    checkpoint = None
+    if os.path.exists(checkpoint_file):
+        with open(checkpoint_file, "r") as f:
+            checkpoint = json.load(f)
+
+    with open(journal_file, "r+b") as journal:
+        if checkpoint is None:
+            # No checkpoint made it to disk: fall back to a full scan from the session block
+            blocks = read_blocks(journal, 0)
+            first = next(blocks, None)
+            if first is None or first[0] != BLOCK_SESSION:
+                raise ValueError(f"{journal_file} has no readable session block")
+            checkpoint = json.loads(first[1])
+            checkpoint.update(
+                journal_offset=first[2],
+                csv_offset=None,
+                samples_written=0,
+                start_time=None,
+                stop_time=None,
+            )
+
+        journal_offset = checkpoint["journal_offset"]
+        compacted_from = checkpoint.get("compacted_from")
+        journal.seek(0, os.SEEK_END)
+        if compacted_from is not None and journal.tell() >= compacted_from:
+            # Killed before a compaction cut the journal: its blocks up to
+            # compacted_from are already in the CSV
+            journal_offset = compacted_from
+
+        rows_recovered = 0
+        blocks_recovered = 0
+        stop_time = checkpoint.get("stop_time")
+        tail = []
+        end_offset = journal_offset
+        for block_type, payload, end_offset in read_blocks(journal, journal_offset):
+            blocks_recovered += 1
+            if block_type == BLOCK_ROWS:
+                tail.append(payload)
+                rows_recovered += payload.count(b"\n")
+            elif block_type == BLOCK_CLOSE:
+                stop_time = json.loads(payload).get("stop_time")
+
+        journal.seek(0, os.SEEK_END)
+        bytes_discarded = journal.tell() - end_offset
+        journal.truncate(end_offset)
+        _fsync(journal)
+
+    csv_file = checkpoint["csv_file"]
+    if checkpoint["csv_offset"] is None or not os.path.exists(csv_file):
+        csv_mode = "wb"
+    else:
+        csv_mode = "r+b"
+    with open(csv_file, csv_mode) as f:
+        if csv_mode == "wb":
+            f.write(JournaledCSVLogger._encode_rows([checkpoint["header"]]))
+        else:
+            f.truncate(checkpoint["csv_offset"])
+            f.seek(checkpoint["csv_offset"])
+        for payload in tail:
+            f.write(payload)
+        _fsync(f)
+
+    samples_written = checkpoint["samples_written"] + rows_recovered
+    if stop_time is None:
+        stop_time = datetime.datetime.fromtimestamp(
+            os.path.getmtime(journal_file)
+        ).isoformat()
+
+    manifest = {
+        "csv_file": csv_file,
+        "start_time": checkpoint["start_time"],
+        "stop_time": stop_time,
+        "samples_written": samples_written,
+        "recovered": True,
+        "blocks_recovered": blocks_recovered,
+        "bytes_discarded": bytes_discarded,
+    }
+    with open(checkpoint["metadata_file"], "w") as f:
+        json.dump(manifest, f, indent=4)
+
+    print(
+        f"🩹 Recovered {csv_file}: {samples_written} samples "
+        f"({rows_recovered} after last checkpoint, {bytes_discarded} damaged bytes dropped)"
+    )
+    return manifest
+
+
+if __name__ == "__main__":
+    # Usage: python3 -m python.core.journal <path/to/streamed_raw_packets.csv.journal> [...]
+    for path in sys.argv[1:]:
+        recover_journal(path)
@@ -0,0 +1,214 @@
+# classes included: LatencyHistogram, LatencyTracker, LatencyReport
+# note: per-stage latency of the streaming path. StreamingSession stamps every chunk it is fed
+# (arrival -> dequeue -> parsed -> detected -> sinks done) with time.perf_counter(). The
+# stamps are appended to a list and binned into fixed-size log-linear histograms with NumPy
+# every FLUSH_CHUNKS chunks (or when a summary is asked for), so the hot path pays for one
+# tuple append per chunk and nothing ever grows. Readers on other threads (metrics endpoint,
+# soak test) take copies with LatencyTracker.snapshot().
+
+import json
+import math
+import threading
+
+import numpy as np
+
+from python.core.sinks import Sink
+
+# Recorded stages, in pipeline order:
+#   mcu_to_arrival  MCU packet timestamp -> host arrival, relative to the fastest packet seen
+#                   (the two clocks are unrelated, so only the excess over the minimum counts)
+#   queue           arrival (BLE notify / serial read) -> taken off the transport queue
+#   parse           dequeue -> packets out of PacketParser
+#   detect          R-peak detector and BPM over the chunk's samples
+#   sink            on_packet/on_peak/on_bpm of every sink (CSV loggers, plot, ...)
+#   end_to_end      arrival -> last sink returned, for every chunk with packets
+#   peak            end_to_end of the chunks that produced an R-peak
+STAGES = ("mcu_to_arrival", "queue", "parse", "detect", "sink", "end_to_end", "peak")
+
+SUB_BUCKET_BITS = 6  # 32 buckets per power of two: values are kept to within ~3 %
+_HALF = 1 << (SUB_BUCKET_BITS - 1)
+_LINEAR = 1 << SUB_BUCKET_BITS
+MAX_BUCKETS = 40 * _HALF  # up to 2**40 µs, far beyond any latency we care about
+FLUSH_CHUNKS = 1024
+
+
+class LatencyHistogram:
+    """
+    HDR-style histogram of latencies in whole microseconds. Values below 64 µs get a bucket
+    each; above that every power of two is split into 32 buckets.
+    """
+
+    def __init__(self):
+        self.counts = np.zeros(MAX_BUCKETS, dtype=np.int64)
+        self.count = 0
+        self.total_us = 0
+        self.max_us = 0
+
+    @staticmethod
+    def _value(index):
+        """Midpoint (µs) of a bucket."""
+        if index < _LINEAR:
+            return index
+        shift = (index >> (SUB_BUCKET_BITS - 1)) - 1
+        mantissa = index - (shift << (SUB_BUCKET_BITS - 1))
+        return (mantissa << shift) + (1 << shift) // 2
+
+    def record_many(self, seconds):
+        """Add an array of latencies (seconds)."""
+        if len(seconds) == 0:
+            return
+        us = np.maximum((np.asarray(seconds) * 1e6).astype(np.int64), 0)
+        # For us >= 64: frexp's exponent is the bit length; keep the top SUB_BUCKET_BITS bits
+        shift = np.maximum(np.frexp(us)[1] - SUB_BUCKET_BITS, 0)
+        index = np.where(
+            us < _LINEAR, us, (shift << (SUB_BUCKET_BITS - 1)) + (us >> shift)
+        )
+        self.counts += np.bincount(
+            np.minimum(index, MAX_BUCKETS - 1), minlength=MAX_BUCKETS
+        )
+        self.count += len(us)
+        self.total_us += int(us.sum())
+        self.max_us = max(self.max_us, int(us.max()))
+
+    def record(self, seconds):
+        self.record_many([seconds])
+
+    def percentile(self, q):
+        """Latency in seconds below which q percent of the recorded values fall."""
+        if self.count == 0:
+            return 0.0
+        target = max(1, math.ceil(self.count * q / 100.0))
+        index = int(np.searchsorted(np.cumsum(self.counts), target))
+        return min(self._value(index), self.max_us) / 1e6
+
+    def copy(self):
+        histogram = LatencyHistogram()
+        histogram.merge(self)
+        return histogram
+
+    def merge(self, other):
+        self.counts += other.counts
+        self.count += other.count
+        self.total_us += other.total_us
+        self.max_us = max(self.max_us, other.max_us)
+
+    def summary(self):
+        """
+        Returns:
+            dict with count, mean_ms, p50_ms, p99_ms, max_ms
+        """
+        return {
+            "count": self.count,
+            "mean_ms": (
+                round(self.total_us / self.count / 1000.0, 3) if self.count else 0.0
+            ),
+            "p50_ms": round(self.percentile(50) * 1000.0, 3),
+            "p99_ms": round(self.percentile(99) * 1000.0, 3),
+            "max_ms": round(self.max_us / 1000.0, 3),
+        }
+
+
+class LatencyTracker:
+    """
+    One LatencyHistogram per stage (see STAGES), filled by StreamingSession.
+
+    The session thread records; any thread may flush or read. Appends and the swap of
+    the pending list share a short lock, and binning holds a second one, so no stamp is
+    lost or binned twice and the histograms never change under a snapshot().
+    """
+
+    def __init__(self):
+        self.histograms = {stage: LatencyHistogram() for stage in STAGES}
+        self.mcu_offset = None  # smallest (arrival - MCU time) seen, in seconds
+        self._pending = []
+        self._pending_lock = threading.Lock()
+        self._flush_lock = threading.RLock()
+
+    def record_chunk(
+        self, arrival, dequeued, parsed, done, sink_seconds, had_peak, mcu_time_s
+    ):
+        """Stamps of one chunk (called by the session for every chunk with packets)."""
+        with self._pending_lock:
+            pending = self._pending
+            pending.append(
+                (arrival, dequeued, parsed, done, sink_seconds, had_peak, mcu_time_s)
+            )
+        if len(pending) >= FLUSH_CHUNKS:
+            self.flush()
+
+    def reset_mcu_offset(self):
+        """Forget the MCU clock baseline (after a reconnect the device clock may restart)."""
+        with self._flush_lock:
+            self.flush()
+            self.mcu_offset = None
+
+    def flush(self):
+        """Bin the pending stamps (from any thread)."""
+        with self._flush_lock:
+            with self._pending_lock:
+                pending, self._pending = self._pending, []
+            if pending:
+                self._bin(pending)
+
+    def _bin(self, pending):
+        stamps = np.array(pending, dtype=np.float64)
+        arrival, dequeued, parsed, done, sink, had_peak, mcu = stamps.T
+        h = self.histograms
+        h["queue"].record_many(dequeued - arrival)
+        h["parse"].record_many(parsed - dequeued)
+        h["detect"].record_many(done - parsed - sink)
+        h["sink"].record_many(sink)
+        h["end_to_end"].record_many(done - arrival)
+        h["peak"].record_many((done - arrival)[had_peak > 0])
+
+        offsets = arrival - mcu
+        if self.mcu_offset is not None:
+            offsets = np.concatenate(([self.mcu_offset], offsets))
+        baseline = np.minimum.accumulate(offsets)
+        excess = offsets - baseline
+        h["mcu_to_arrival"].record_many(
+            excess[1:] if self.mcu_offset is not None else excess
+        )
+        self.mcu_offset = float(baseline[-1])
+
+    def snapshot(self):
+        """
+        Returns:
+            dict of stage -> copy of its LatencyHistogram, pending stamps included
+        """
+        with self._flush_lock:
+            self.flush()
+            return {
+                stage: histogram.copy() for stage, histogram in self.histograms.items()
+            }
+
+    def summary(self):
+        """dict of stage -> LatencyHistogram.summary(), stages with no data left out."""
+        return {
+            stage: histogram.summary()
+            for stage, histogram in self.snapshot().items()
+            if histogram.count
+        }
+
+    def write(self, path):
+        with open(path, "w") as f:
+            json.dump(self.summary(), f, indent=2)
+
+    def print_summary(self):
+        print("Stage latency (ms):      p50      p99      max   count")
+        for stage, s in self.summary().items():
+            print(
+                f"  {stage:16s} {s['p50_ms']:8.3f} {s['p99_ms']:8.3f} {s['max_ms']:8.3f} {s['count']:7d}"
+            )
+
+
+class LatencyReport(Sink):
+    """Writes the session's stage latencies to `path` (latency_summary.json) when it ends."""
+
+    def __init__(self, tracker, path):
+        self.tracker = tracker
+        self.path = path
+
+    def close(self):
+        self.tracker.write(self.path)
+        self.tracker.print_summary()
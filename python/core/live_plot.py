@@ -0,0 +1,325 @@
+# functions included: build_window, build_dashboard_window, run_live_plot, run_live_dashboard,
+#   run_live_plot_async, run_live_plot_process, run_dashboard_async, thread_stop_command
+# note: the PyQtGraph front-end shared by all streaming scripts. Only this module imports Qt.
+
+import asyncio
+import sys
+import threading
+import time
+
+import numpy as np
+from PyQt5 import QtWidgets, QtCore
+import pyqtgraph as pg
+
+from python.core.qt_asyncio import pump_qt_events
+from python.core.render import FrameBudget, minmax_decimate
+from python.core.tracing import tracer
+
+
+def keyboard_listener(stop):
+    while True:
+        cmd = input("Type STOP to halt data stream: ").strip().upper()
+        if cmd == "STOP":
+            stop()
+            print("Stop flag set.")
+            break
+
+
+def thread_stop_command(stop):
+    listen_for_stop_thread = threading.Thread(
+        target=keyboard_listener, args=(stop,), daemon=True
+    )
+    listen_for_stop_thread.start()
+
+
+def _create_ecg_plot(plot_title="Real-Time ECG Signal"):
+    """Return (plot_widget, curve) for one ECG trace."""
+    plot_widget = pg.PlotWidget()
+    plot_widget.setLabel("left", "ADC Value")
+    plot_widget.setLabel("bottom", "Time (s)")
+    plot_widget.setTitle(plot_title)
+    plot_widget.showGrid(x=True, y=True)
+    plot_widget.setYRange(1300, 2500)  # 12-bit ADC range
+    ax = plot_widget.getAxis("bottom")
+    ax.setTickSpacing(major=1.0, minor=0.5)  # 1 s major, 0.5 s minor
+
+    # Only draw what is in view; let PyQtGraph peak-downsample anything we still oversend
+    plot_widget.setClipToView(True)
+    plot_widget.setDownsampling(auto=True, mode="peak")
+
+    # Create plot line
+    curve = plot_widget.plot(pen=pg.mkPen(color="#00FF00", width=2))  # Green line
+    return plot_widget, curve
+
+
+def _draw_ecg(plot_widget, curve, x, y):
+    if len(x) > 0:
+        width = max(1, int(plot_widget.getViewBox().width()))
+        # Copy the decimated points: the buffer views keep being written
+        x_plot, y_plot = minmax_decimate(x, y, width)
+        curve.setData(np.array(x_plot, dtype=float), np.array(y_plot, dtype=float))
+    else:
+        curve.clear()
+    plot_widget.viewport().repaint()  # paint now so the frame cost includes drawing
+
+
+def build_window(plot_buffer, on_close, title="Real-Time ECG Monitor", cpu_budget=0.1):
+    """
+    Create the Qt application and the real-time ECG window.
+
+    Redraws are render-budgeted: the window only redraws when new samples arrived, sends
+    PyQtGraph at most 2 points per horizontal pixel (min/max per column, so R-peaks stay
+    visible) and stretches the redraw interval when drawing gets expensive, so a wide
+    plot_window_s or a fast sample rate costs about the same as the default 5 s window.
+
+    Args:
+        plot_buffer: PlotBuffer sink (or SharedRing) the window reads from
+        on_close: Called with the Qt close event when the window is closed
+        cpu_budget: Fraction of one core the redraws may use
+
+    Returns:
+        (app, win, timer) - the plot timer must be kept referenced while the window is open
+    """
+    return build_dashboard_window(
+        {"Real-Time ECG Signal": plot_buffer}, on_close, title, cpu_budget
+    )
+
+
+def build_dashboard_window(
+    plot_buffers, on_close, title="Real-Time ECG Monitor", cpu_budget=0.1
+):
+    """
+    Same as build_window with one stacked plot per buffer (multi-device recording).
+
+    Args:
+        plot_buffers: dict of plot title -> PlotBuffer
+    """
+    # Create Qt application
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication(sys.argv)
+
+    # Create main window
+    win = QtWidgets.QMainWindow()
+    win.setWindowTitle(title)
+    win.setGeometry(100, 100, 1200, 600 if len(plot_buffers) == 1 else 900)
+
+    # Create central widget and layout
+    central_widget = QtWidgets.QWidget()
+    win.setCentralWidget(central_widget)
+    layout = QtWidgets.QVBoxLayout(central_widget)
+
+    plots = []
+    for plot_title, plot_buffer in plot_buffers.items():
+        plot_widget, curve = _create_ecg_plot(plot_title)
+        layout.addWidget(plot_widget)
+        plots.append((plot_title, plot_buffer, plot_widget, curve, [-1]))
+
+    # Create status label
+    status_label = QtWidgets.QLabel("Status: Ready to receive data ")
+    layout.addWidget(status_label)
+
+    budget = FrameBudget(cpu_budget=cpu_budget)
+
+    def update_plot():
+        """Called by Qt timer: Updates every plot that received new samples"""
+        budget.begin()
+        if tracer.enabled:
+            redraw_start = time.perf_counter_ns()
+        redrawn = False
+        totals = []
+        for plot_title, plot_buffer, plot_widget, curve, last_drawn in plots:
+            x, y, total_received = plot_buffer.snapshot()
+            totals.append((plot_title, total_received))
+            if total_received == last_drawn[0]:
+                continue  # nothing new, skip this redraw entirely
+            last_drawn[0] = total_received
+            _draw_ecg(plot_widget, curve, x, y)
+            redrawn = True
+        if not redrawn:
+            return
+
+        if all(total == 0 for _, total in totals):
+            status_label.setText("Waiting for data...")
+        elif len(totals) == 1:
+            status_label.setText(f"Total samples received: {totals[0][1]}")
+        else:
+            status_label.setText(
+                " | ".join(f"{plot_title}: {total}" for plot_title, total in totals)
+            )
+        timer.setInterval(int(budget.end() * 1000))
+        if tracer.enabled:
+            tracer.span("plot_redraw", redraw_start, value=len(plots))
+
+    win.closeEvent = on_close
+
+    # Setup timer to update plot; the interval adapts to the measured frame cost
+    timer = QtCore.QTimer()
+    timer.timeout.connect(update_plot)
+    timer.start(int(budget.interval * 1000))
+
+    return app, win, timer
+
+
+def _wait_for_loggers(loggers, timeout=3.0):
+    # Wait for the logger threads to finish their final writes (raw data and R-peak/BPM)
+    print("Flushing CSV logs...")
+    for logger in loggers:
+        if logger._thread:
+            logger._thread.join(timeout=timeout)
+        print(f"✓ Data saved to: {logger.file_name}")
+
+
+def run_live_plot(session, plot_buffer, loggers=(), title="Real-Time ECG Monitor"):
+    """
+    Open the real-time ECG window, start the session shortly after the GUI loads and run
+    the Qt event loop until the window is closed.
+
+    Args:
+        session: StreamingSession (not started yet)
+        plot_buffer: PlotBuffer sink attached to the session
+        loggers: CSVLoggers to flush when the window closes
+
+    Returns:
+        int: Qt application exit code
+    """
+    return run_live_dashboard(
+        session, {"Real-Time ECG Signal": plot_buffer}, loggers, title
+    )
+
+
+def run_live_dashboard(runner, plot_buffers, loggers=(), title="Real-Time ECG Monitor"):
+    """
+    run_live_plot for anything with start()/stop() that feeds several PlotBuffers
+    (e.g. SerialHub: one plot per USB gateway).
+
+    Args:
+        runner: Object with start() (background thread) and stop() (blocks until stopped)
+        plot_buffers: dict of plot title -> PlotBuffer
+    """
+
+    def on_window_close(event):
+        print("Window is closing! Stopping threads...")
+        runner.stop()  # Tell the session(s), the device(s) and the loggers to stop
+        _wait_for_loggers(loggers)
+        event.accept()  # Allow the window to close
+
+    app, win, timer = build_dashboard_window(plot_buffers, on_window_close, title)
+
+    def start_everything():
+        runner.start()
+        thread_stop_command(runner.stop)
+
+    # Start streaming in background (after small delay for GUI to load)
+    QtCore.QTimer.singleShot(500, start_everything)
+    win.show()
+
+    # Run Qt application
+    return app.exec_()
+
+
+def run_live_plot_async(
+    streamer, plot_buffer, loggers=(), title="Real-Time ECG Monitor"
+):
+    """
+    Same window as run_live_plot, but the asyncio loop owns the main thread: the
+    AsyncBLEStreamer and the Qt event pump run side by side on one loop.
+
+    Args:
+        streamer: AsyncBLEStreamer (not started yet)
+        plot_buffer: PlotBuffer sink attached to the streamer's session
+        loggers: CSVLoggers of the session (flushed by the streamer before it returns)
+
+    Returns:
+        int: 0 when the window was closed normally
+    """
+    window_closed = threading.Event()
+
+    def on_window_close(event):
+        print("Window is closing! Stopping stream...")
+        streamer.stop()
+        window_closed.set()
+        event.accept()
+
+    app, win, timer = build_window(plot_buffer, on_window_close, title)
+
+    async def main():
+        win.show()
+        gui = asyncio.create_task(pump_qt_events(app, window_closed.is_set))
+        # Connect while the window comes up instead of after it
+        stream = asyncio.create_task(streamer.run())
+        await asyncio.sleep(0.5)  # small delay for GUI to load
+        thread_stop_command(streamer.stop)
+        await stream
+        # Streaming is done (and the loggers flushed); keep the window up until closed
+        await gui
+        _wait_for_loggers(loggers)
+
+    asyncio.run(main())
+    return 0
+
+
+def run_live_plot_process(acquisition, title="Real-Time ECG Monitor"):
+    """
+    Same window, with acquisition, detection and logging in their own process. The plot
+    reads the acquisition's SharedRing directly, so nothing the GUI does can hold up the
+    packet path.
+
+    Args:
+        acquisition: AcquisitionProcess (not started yet)
+
+    Returns:
+        int: Qt application exit code
+    """
+
+    def on_window_close(event):
+        print("Window is closing! Stopping acquisition process...")
+        acquisition.stop()
+        acquisition.join()  # the child flushes its CSV logs before exiting
+        event.accept()
+
+    app, win, timer = build_window(acquisition.ring, on_window_close, title)
+
+    def start_everything():
+        acquisition.start()
+        thread_stop_command(acquisition.stop)
+
+    QtCore.QTimer.singleShot(500, start_everything)
+    win.show()
+
+    return app.exec_()
+
+
+def run_dashboard_async(manager, title="Real-Time ECG Monitor - all devices"):
+    """
+    Multi-device window: discovers the devices, then streams all of them and runs the
+    Qt event pump on one asyncio loop (see run_live_plot_async).
+
+    Args:
+        manager: MultiDeviceBLEManager created with plot=True (not started yet)
+
+    Returns:
+        int: 0 when the window was closed normally, 1 if no device was found
+    """
+    window_closed = threading.Event()
+
+    def on_window_close(event):
+        print("Window is closing! Stopping all devices...")
+        manager.stop()
+        window_closed.set()
+        event.accept()
+
+    async def main():
+        streams = await manager.discover()
+        if not streams:
+            print("ERROR: no ECG devices found")
+            return 1
+        plot_buffers = {stream.label: stream.plot_buffer for stream in streams}
+        app, win, timer = build_dashboard_window(plot_buffers, on_window_close, title)
+        win.show()
+        gui = asyncio.create_task(pump_qt_events(app, window_closed.is_set))
+        thread_stop_command(manager.stop)
+        await manager.run()
+        # Streaming is done (and the loggers flushed); keep the window up until closed
+        await gui
+        return 0
+
+    return asyncio.run(main())
@@ -1,26 +1,35 @@
-# classes included: CSV_Logger
+# classes included: CSV_Logger, AsyncCSVLogger
 # pulled from Desktop/Heart Rate Project/heartrate_project_v10.py
 # note: used for logging raw data CSV and BPM, R-peak CSV
 
+import asyncio
 import queue
 import csv
 import threading
 import json
 import time
 import datetime
+import os
+
+from python.core.clock import SYSTEM_CLOCK
+from python.core.console import console
+from python.core.tracing import tracer
 
 
 class CSVLogger:
-    def __init__(self, file_name, stop_flag, write_interval=1.0):
+    def __init__(
+        self, file_name, stop_flag, write_interval=1.0, clock=None, metadata_file=None
+    ):
         self.file_name = file_name
         self.csv_queue = queue.Queue()
         self.stop_flag = stop_flag
         self.samples_written = 0
         self._thread = None
         self.write_interval = write_interval
+        self.clock = clock if clock is not None else SYSTEM_CLOCK
         self.start_time = None
         self.stop_time = None
-        self.metadata_file = "run_metadata.json"
+        self.metadata_file = metadata_file or "run_metadata.json"
         self.header = None
 
     def create_CSV(self, header=None):
@@ -30,17 +39,26 @@ class CSVLogger:
             writer = csv.writer(f)
             writer.writerow(self.header)
 
-        self._thread = threading.Thread(target=self.write_batch_to_csv, daemon=False)
+        self._thread = threading.Thread(
+            target=self.write_batch_to_csv,
+            name=f"csv-writer {os.path.basename(self.file_name)}",
+            daemon=False,
+        )
         self._thread.start()
 
     def log(self, *args):
         """Add a sample to the queue (thread-safe)"""
         self.csv_queue.put(list(args))
 
+    def queue_depth(self):
+        """Rows logged but not yet written."""
+        return self.csv_queue.qsize()
+
     def write_batch_to_csv(self):
         batch = []
         while not self.stop_flag.is_set():
-            time.sleep(self.write_interval)  # Wait 1 second between writes
+            # Wait 1 second between writes
+            self.clock.wait(self.stop_flag, self.write_interval)
 
             while not self.csv_queue.empty():
                 try:
@@ -49,13 +67,18 @@ class CSVLogger:
                 except queue.Empty:
                     break
             if len(batch) > 0:
+                if tracer.enabled:
+                    flush_start = time.perf_counter_ns()
                 with open(self.file_name, "a", newline="") as f:
                     writer = csv.writer(f)
                     writer.writerows(batch)  # Write all rows at once
+                if tracer.enabled:
+                    tracer.span("csv_flush", flush_start, value=len(batch))
 
                 self.samples_written += len(batch)
-                print(
-                    f"📝 Wrote {len(batch)} samples to CSV (total: {self.samples_written})"
+                console.debug(
+                    self.file_name,
+                    f"📝 Wrote {len(batch)} samples to CSV (total: {self.samples_written})",
                 )
                 batch.clear()
 
@@ -90,3 +113,73 @@ class CSVLogger:
         with open(self.metadata_file, "w") as f:
             json.dump(metadata, f, indent=4)
         print(f"📄 Saved metadata to {self.metadata_file}")
+
+
+class AsyncCSVLogger(CSVLogger):
+    """
+    CSVLogger for the single-event-loop BLE pipeline. log() is called on the event loop
+    and only appends to a list; run() is a task on the same loop that hands the batch to
+    a worker every write_interval seconds, so no thread polls a queue. Its sleeps follow
+    the event loop's clock (see VirtualClock.run).
+    """
+
+    def __init__(
+        self, file_name, stop_flag, write_interval=1.0, clock=None, metadata_file=None
+    ):
+        super().__init__(
+            file_name,
+            stop_flag,
+            write_interval=write_interval,
+            clock=clock,
+            metadata_file=metadata_file,
+        )
+        self._pending = []
+
+    def create_CSV(self, header=None):
+        self.header = header
+        with open(self.file_name, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(self.header)
+
+    def log(self, *args):
+        """Add a sample to the pending batch (event loop only)"""
+        self._pending.append(args)
+
+    def queue_depth(self):
+        return len(self._pending)
+
+    def _write_rows(self, rows):
+        if tracer.enabled:
+            flush_start = time.perf_counter_ns()
+        with open(self.file_name, "a", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerows(rows)
+        if tracer.enabled:
+            tracer.span("csv_flush", flush_start, value=len(rows))
+
+    async def _flush(self):
+        if not self._pending:
+            return 0
+        batch, self._pending = self._pending, []
+        # File I/O runs in the default executor so a slow disk never stalls notifications
+        await asyncio.get_running_loop().run_in_executor(None, self._write_rows, batch)
+        self.samples_written += len(batch)
+        return len(batch)
+
+    async def run(self):
+        while not self.stop_flag.is_set():
+            await asyncio.sleep(self.write_interval)
+            written = await self._flush()
+            if written:
+                console.debug(
+                    self.file_name,
+                    f"📝 Wrote {written} samples to CSV (total: {self.samples_written})",
+                )
+
+        written = await self._flush()
+        if written:
+            print(f"📝 Final write: {written} samples")
+
+        self.stop_time = datetime.datetime.now().isoformat()
+        print(f"✅ CSV writer finished. Total samples written: {self.samples_written}")
+        self.save_metadata()
@@ -0,0 +1,371 @@
+# classes included: MetricsRegistry, MetricsServer, MetricsExporter
+# functions included: start_metrics
+# note: operational metrics of a running stream. The registry only holds callables that read
+# counters the pipeline already keeps (parser, session, loggers, latency tracker), so nothing
+# is added to the hot path; values are computed when someone scrapes them. They are served
+# as Prometheus text on a localhost port and mirrored to metrics.json in the run folder.
+
+import datetime
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from python.core.sinks import Sink
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in labels.items()) + "}"
+
+
+class MetricsRegistry:
+    """
+    Named counters and gauges, each with one or more labelled series.
+
+    A series is a callable returning either a number, or a list of
+    (name_suffix, extra_labels, value) for metrics that expand into several samples
+    (like the latency quantiles).
+    """
+
+    def __init__(self):
+        self._metrics = {}  # name -> (kind, help, [(labels, fn)])
+        self._lock = threading.Lock()
+
+    def _add(self, kind, name, help_text, fn, labels):
+        with self._lock:
+            entry = self._metrics.setdefault(name, (kind, help_text, []))
+            entry[2].append((dict(labels or {}), fn))
+
+    def counter(self, name, help_text, fn, labels=None):
+        self._add("counter", name, help_text, fn, labels)
+
+    def gauge(self, name, help_text, fn, labels=None):
+        self._add("gauge", name, help_text, fn, labels)
+
+    def summary(self, name, help_text, fn, labels=None):
+        self._add("summary", name, help_text, fn, labels)
+
+    def add_session(self, session, labels=None, loggers=()):
+        """
+        Register the standard metrics of one StreamingSession.
+
+        Args:
+            session: StreamingSession (its transport may be set later)
+            labels: e.g. {"stream": "device_EC6000000001"} when several sessions share
+                the registry
+            loggers: The session's CSV loggers, for their queue depths
+        """
+        self.counter(
+            "ecg_samples_total",
+            "Samples run through the R-peak detector",
+            lambda: session.global_sample_counter,
+            labels,
+        )
+        self.counter(
+            "ecg_packets_total",
+            "Gateway packets parsed",
+            lambda: session.parser.packet_count,
+            labels,
+        )
+        self.counter(
+            "ecg_packets_lost_total",
+            "Packets missing from the firmware packet ID sequence",
+            lambda: session.packets_lost,
+            labels,
+        )
+        self.counter(
+            "ecg_packets_duplicated_total",
+            "Packets whose ID had already been received",
+            lambda: session.packets_duplicated,
+            labels,
+        )
+        self.counter(
+            "ecg_packets_reordered_total",
+            "Packets that arrived after a later packet ID",
+            lambda: session.packets_reordered,
+            labels,
+        )
+        self.counter(
+            "ecg_parse_errors_total",
+            "Frames rejected for a bad end marker",
+            lambda: session.parser.parse_errors,
+            labels,
+        )
+        self.counter(
+            "ecg_skipped_bytes_total",
+            "Bytes skipped while resynchronising on the packet header",
+            lambda: session.parser.skipped_bytes,
+            labels,
+        )
+        self.counter(
+            "ecg_peaks_total",
+            "R-peaks detected",
+            lambda: len(session.detector.detected_peaks),
+            labels,
+        )
+        self.counter(
+            "ecg_bpm_updates_total",
+            "Windowed BPM recalculations",
+            lambda: session.bpm_updates,
+            labels,
+        )
+        self.counter(
+            "ecg_stream_gaps_total",
+            "Recorded stretches without data (BLE reconnects)",
+            lambda: len(session.gaps),
+            labels,
+        )
+        self.gauge(
+            "ecg_bpm", "Current windowed BPM", lambda: session.current_bpm, labels
+        )
+        self.gauge(
+            "ecg_transport_queue_depth",
+            "Chunks received by the transport but not processed yet",
+            lambda: (
+                session.transport.queue_depth() if session.transport is not None else 0
+            ),
+            labels,
+        )
+        for logger in loggers:
+            logger_labels = dict(
+                labels or {}, logger=os.path.basename(logger.file_name)
+            )
+            self.gauge(
+                "ecg_logger_queue_depth",
+                "Rows logged but not written to the CSV yet",
+                logger.queue_depth,
+                logger_labels,
+            )
+        if session.latency is not None:
+            self.add_latency(session.latency, labels)
+
+    def add_latency(self, tracker, labels=None):
+        """Stage latencies of a LatencyTracker as a Prometheus summary (p50/p99) plus max."""
+
+        def quantiles():
+            samples = []
+            for stage, histogram in tracker.snapshot().items():
+                if not histogram.count:
+                    continue
+                for q in (0.5, 0.99):
+                    samples.append(
+                        (
+                            "",
+                            {"stage": stage, "quantile": str(q)},
+                            histogram.percentile(q * 100),
+                        )
+                    )
+                samples.append(("_sum", {"stage": stage}, histogram.total_us / 1e6))
+                samples.append(("_count", {"stage": stage}, histogram.count))
+            return samples
+
+        def maxima():
+            return [
+                ("", {"stage": stage}, histogram.max_us / 1e6)
+                for stage, histogram in tracker.snapshot().items()
+                if histogram.count
+            ]
+
+        self.summary(
+            "ecg_stage_latency_seconds",
+            "Per-chunk latency of each streaming stage",
+            quantiles,
+            labels,
+        )
+        self.gauge(
+            "ecg_stage_latency_max_seconds",
+            "Slowest chunk seen in each streaming stage",
+            maxima,
+            labels,
+        )
+
+    def collect(self):
+        """
+        Returns:
+            list of (name, kind, help, [(sample_name, labels, value)])
+        """
+        with self._lock:
+            metrics = [
+                (name, kind, help_text, list(series))
+                for name, (kind, help_text, series) in self._metrics.items()
+            ]
+        collected = []
+        for name, kind, help_text, series in metrics:
+            samples = []
+            for labels, fn in series:
+                try:
+                    value = fn()
+                except Exception:
+                    continue  # e.g. a session torn down between scrapes
+                if isinstance(value, list):
+                    for suffix, extra, v in value:
+                        samples.append((name + suffix, dict(labels, **extra), v))
+                else:
+                    samples.append((name, labels, value))
+            collected.append((name, kind, help_text, samples))
+        return collected
+
+    def prometheus_text(self):
+        lines = []
+        for name, kind, help_text, samples in self.collect():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for sample_name, labels, value in samples:
+                lines.append(f"{sample_name}{_format_labels(labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self):
+        """Flat dict of 'name{labels}' -> value, plus the kind of each metric name."""
+        values, kinds = {}, {}
+        for name, kind, _, samples in self.collect():
+            kinds[name] = kind
+            for sample_name, labels, value in samples:
+                values[sample_name + _format_labels(labels)] = value
+        return values, kinds
+
+
+class MetricsServer:
+    """Serves GET /metrics (Prometheus text) and /metrics.json from a daemon thread."""
+
+    def __init__(self, registry, port=9108, host="127.0.0.1"):
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self._server = None
+        self._thread = None
+
+    def start(self):
+        registry = self.registry
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.startswith("/metrics.json"):
+                    body = json.dumps(registry.snapshot()[0], indent=2).encode()
+                    content_type = "application/json"
+                elif self.path.startswith("/metrics"):
+                    body = registry.prometheus_text().encode()
+                    content_type = "text/plain; version=0.0.4"
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # no per-request lines in the streaming terminal
+
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        print(f"📈 Metrics on http://{self.host}:{self.port}/metrics")
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+class MetricsExporter(Sink):
+    """
+    Runs the MetricsServer and writes a JSON snapshot (values and per-second rates of the
+    counters) to `snapshot_path` every `interval` seconds. As a sink it stops, and writes
+    the final snapshot, when the session ends; call close() yourself otherwise.
+
+    Args:
+        registry: MetricsRegistry
+        snapshot_path: metrics.json in the run folder (None = no file)
+        port: Localhost port for the Prometheus endpoint (None/0 = no server)
+        interval: Seconds between snapshots
+    """
+
+    def __init__(self, registry, snapshot_path=None, port=None, interval=5.0):
+        self.registry = registry
+        self.snapshot_path = snapshot_path
+        self.port = port
+        self.interval = interval
+        self.server = None
+        self.start_time = None
+        self._previous = None  # (time, values) of the last snapshot, for the rates
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self.start_time = time.time()
+        if self.port:
+            server = MetricsServer(self.registry, self.port)
+            try:
+                server.start()
+                self.server = server
+            except OSError as e:
+                print(f"⚠️ Metrics endpoint not started (port {self.port}): {e}")
+        if self.snapshot_path is not None:
+            self._thread = threading.Thread(target=self._snapshot_loop, daemon=True)
+            self._thread.start()
+        return self
+
+    def _snapshot_loop(self):
+        while not self._stop.wait(self.interval):
+            self.write_snapshot()
+
+    def write_snapshot(self):
+        now = time.time()
+        values, kinds = self.registry.snapshot()
+        rates = {}
+        if self._previous is not None:
+            then, previous = self._previous
+            for key, value in values.items():
+                if kinds.get(key.split("{", 1)[0]) == "counter" and key in previous:
+                    rates[key] = round((value - previous[key]) / (now - then), 3)
+        self._previous = (now, values)
+
+        snapshot = {
+            "time": datetime.datetime.now().isoformat(),
+            "elapsed_s": round(now - self.start_time, 3),
+            "rates_per_s": rates,
+            "metrics": values,
+        }
+        # Write then rename, so a reader never sees half a file
+        tmp_path = self.snapshot_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(snapshot, f, indent=2)
+        os.replace(tmp_path, self.snapshot_path)
+
+    def close(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+            self.write_snapshot()
+        if self.server is not None:
+            self.server.stop()
+
+
+def start_metrics(config, output_dir, session=None, loggers=()):
+    """
+    Registry + exporter for one streaming run, configured from heartrate_config
+    (metrics_port, metrics_interval_s). With a session, its metrics are registered and
+    the exporter is added as a sink, so it shuts down with the session.
+
+    Returns:
+        (registry, exporter)
+    """
+    registry = MetricsRegistry()
+    if session is not None:
+        registry.add_session(session, loggers=loggers)
+    exporter = MetricsExporter(
+        registry,
+        snapshot_path=os.path.join(output_dir, "metrics.json"),
+        port=config.metrics_port,
+        interval=config.metrics_interval_s,
+    ).start()
+    if session is not None:
+        session.add_sink(exporter)
+    return registry, exporter
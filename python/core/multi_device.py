@@ -0,0 +1,234 @@
+# classes included: DeviceStream, MultiDeviceBLEManager
+# functions included: discover_devices, run_dashboard
+# note: records from several ESP32 monitors at once. Every device gets its own
+# StreamingSession (parser, detector, BPM), AsyncCSVLoggers and AsyncBLEStreamer, and all
+# of them run side by side on one asyncio loop - no thread per device.
+
+import asyncio
+import os
+import threading
+
+from bleak import BleakScanner, BleakClient
+
+from python.core.async_streaming import AsyncBLEStreamer
+from python.core.latency import LatencyReport
+from python.core.capture import start_capture
+from python.core.sinks import CSVSink, GapLogSink, PlotBuffer
+from python.core.streaming import StreamingSession, create_csv_loggers
+from python.tests.ble.ble_config import TARGET_DEVICE_NAME
+
+
+async def discover_devices(
+    name_prefix=TARGET_DEVICE_NAME, scan_timeout=5.0, scanner_class=BleakScanner
+):
+    """
+    One scan for every advertising ECG gateway.
+
+    Returns:
+        list of BLEDevice whose name starts with name_prefix, sorted by address
+    """
+    print(f"Scanning {scan_timeout:g} s for devices named '{name_prefix}*'...")
+    devices = await scanner_class.discover(timeout=scan_timeout)
+    found = [d for d in devices if d.name and d.name.startswith(name_prefix)]
+    found.sort(key=lambda d: d.address)
+    for device in found:
+        print(f"Found '{device.name}' at {device.address}")
+    return found
+
+
+class DeviceStream:
+    """
+    Everything that belongs to one device: session, loggers, streamer and its own
+    output folder (<output_dir>/<label>/streamed_*.csv).
+    """
+
+    def __init__(
+        self,
+        config,
+        name,
+        address,
+        output_dir,
+        duration_sec=None,
+        scanner_class=BleakScanner,
+        client_class=BleakClient,
+        verbose=False,
+        plot=False,
+    ):
+        self.name = name
+        self.address = address
+        self.label = "device_" + address.replace(":", "").replace("-", "")
+        self.output_dir = os.path.join(output_dir, self.label)
+        os.makedirs(self.output_dir, exist_ok=True)
+
+        # Per-device flag: one device finishing does not stop the others
+        self.stop_flag = threading.Event()
+        self.loggers = create_csv_loggers(
+            config,
+            self.output_dir,
+            self.stop_flag,
+            asynchronous=True,
+            metadata_file=os.path.join(self.output_dir, "run_metadata.json"),
+        )
+        self.session = StreamingSession(
+            config,
+            stop_flag=self.stop_flag,
+            duration_sec=duration_sec,
+            verbose=verbose,
+        )
+        self.session.add_sink(CSVSink(*self.loggers))
+        self.session.add_sink(
+            GapLogSink(os.path.join(self.output_dir, "stream_gaps.json"))
+        )
+        self.session.add_sink(
+            LatencyReport(
+                self.session.latency,
+                os.path.join(self.output_dir, "latency_summary.json"),
+            )
+        )
+        start_capture(config, self.output_dir, self.session, source=f"ble {address}")
+        self.plot_buffer = (
+            self.session.add_sink(PlotBuffer(config.max_samples_plotted))
+            if plot
+            else None
+        )
+        self.streamer = AsyncBLEStreamer(
+            self.session,
+            loggers=self.loggers,
+            device_name=name,
+            scanner_class=scanner_class,
+            client_class=client_class,
+            device_address=address,
+        )
+        self.connected = None  # result of the streamer once it has finished
+
+    async def run(self):
+        self.connected = await self.streamer.run()
+        return self.connected
+
+    def stop(self):
+        self.streamer.stop()
+
+
+class MultiDeviceBLEManager:
+    """
+    Discovers, connects and streams from N ECG gateways concurrently.
+
+    Args:
+        config: Config shared by all devices
+        output_dir: Run folder; each device writes into its own subfolder
+        max_devices: Stream from at most this many of the discovered devices
+        addresses: Skip discovery and use these addresses
+        plot: Give every device a PlotBuffer (for the dashboard window)
+        metrics: Optional MetricsRegistry; each device's session is registered with a
+            stream=<label> label
+    """
+
+    def __init__(
+        self,
+        config,
+        output_dir,
+        name_prefix=TARGET_DEVICE_NAME,
+        max_devices=None,
+        addresses=None,
+        duration_sec=None,
+        scan_timeout=5.0,
+        scanner_class=BleakScanner,
+        client_class=BleakClient,
+        verbose=False,
+        plot=False,
+        metrics=None,
+    ):
+        self.config = config
+        self.output_dir = output_dir
+        self.name_prefix = name_prefix
+        self.max_devices = max_devices
+        self.addresses = addresses
+        self.duration_sec = duration_sec
+        self.scan_timeout = scan_timeout
+        self.scanner_class = scanner_class
+        self.client_class = client_class
+        self.verbose = verbose
+        self.plot = plot
+        self.metrics = metrics
+        self.streams = []
+        self._stopped = threading.Event()
+
+    def add_device(self, name, address):
+        stream = DeviceStream(
+            self.config,
+            name,
+            address,
+            self.output_dir,
+            duration_sec=self.duration_sec,
+            scanner_class=self.scanner_class,
+            client_class=self.client_class,
+            verbose=self.verbose,
+            plot=self.plot,
+        )
+        self.streams.append(stream)
+        if self.metrics is not None:
+            self.metrics.add_session(
+                stream.session, {"stream": stream.label}, stream.loggers
+            )
+        return stream
+
+    async def discover(self):
+        """Create one DeviceStream per discovered (or configured) device."""
+        if self.addresses:
+            for address in self.addresses:
+                self.add_device(self.name_prefix, address)
+        else:
+            devices = await discover_devices(
+                self.name_prefix, self.scan_timeout, self.scanner_class
+            )
+            for device in devices[: self.max_devices]:
+                self.add_device(device.name, device.address)
+        return self.streams
+
+    def stop(self):
+        """Thread-safe: stops every device."""
+        self._stopped.set()
+        for stream in self.streams:
+            stream.stop()
+
+    async def run(self):
+        """
+        Stream from all devices until each has stopped.
+
+        Returns:
+            dict: label -> True if that device was connected
+        """
+        if not self.streams:
+            await self.discover()
+        if not self.streams:
+            print("ERROR: no ECG devices found")
+            return {}
+        if self._stopped.is_set():  # stop() arrived during discovery
+            self.stop()
+
+        print(f"Streaming from {len(self.streams)} device(s)...")
+        results = await asyncio.gather(*(stream.run() for stream in self.streams))
+        return {stream.label: result for stream, result in zip(self.streams, results)}
+
+
+async def run_dashboard(manager, interval=1.0):
+    """
+    Combined terminal view: one line per device, printed every `interval` seconds until
+    all devices have stopped. Run it as a task next to manager.run().
+    """
+    while not manager.streams:
+        await asyncio.sleep(0.1)
+    while True:
+        done = all(stream.connected is not None for stream in manager.streams)
+        lines = [f"---- {len(manager.streams)} device(s) ----"]
+        for stream in manager.streams:
+            session = stream.session
+            state = "done" if stream.connected is not None else "live"
+            lines.append(
+                f"{stream.label:20s} {state} | packets {session.parser.packet_count:7d} | "
+                f"peaks {len(session.detector.detected_peaks):5d} | BPM {session.current_bpm:5.1f}"
+            )
+        print("\n".join(lines))
+        if done:
+            return
+        await asyncio.sleep(interval)
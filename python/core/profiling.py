@@ -0,0 +1,316 @@
+# classes included: SamplingProfiler, ProfileDump
+# functions included: start_profiling
+# note: opt-in profiler for slow live sessions and batch jobs, so nobody has to wire cProfile in by
+# hand. Nothing is instrumented: a "profiler" thread samples the Python stack of every other thread
+# at a fixed interval and weights each sample by the CPU that thread used since the previous one,
+# so the streaming threads only lose the GIL for the few µs a sample takes. The same thread takes
+# the tracemalloc snapshots. Everything is written to <run dir>/profile/.
+#
+# A thread only drops the GIL for the sampler between switch intervals (5 ms) or when it blocks,
+# so work in bursts shorter than that (one packet at 250 Hz) is credited to where the thread
+# waits next, e.g. SerialTransport.read. Long or CPU-bound work - the slow case - is sampled
+# where it runs; for per-packet stage timings use --trace.
+
+import atexit
+import collections
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+
+from python.core.sinks import Sink
+
+# Frames of these modules are left out of allocation statistics (the profiler's own work)
+_IGNORED_ALLOCATIONS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, __file__),
+    tracemalloc.Filter(False, "*/fnmatch.py"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+# The profiler currently running in this process (only one at a time)
+_active = None
+
+
+def _thread_cpu_clock(thread):
+    """
+    Function returning the CPU seconds `thread` has used, or None where the platform has no
+    per-thread CPU clock (e.g. Windows): samples then count wall-clock time.
+    """
+    try:
+        clock_id = time.pthread_getcpuclockid(thread.ident)
+        time.clock_gettime(clock_id)
+    except (AttributeError, OSError):
+        return None
+    return lambda: time.clock_gettime(clock_id)
+
+
+def _code_name(code):
+    return f"{os.path.basename(code.co_filename)}:{code.co_qualname}"
+
+
+class SamplingProfiler:
+    """
+    Sampled CPU profile of every thread plus tracemalloc snapshots at intervals.
+
+    Written to output_dir when stopped (label = name of the script by default):
+      <label>.collapsed           stacks in the collapsed format ("thread;f;g;h µs"), for
+                                  speedscope.app or flamegraph.pl
+      <label>.mem.<n>.tracemalloc every snapshot (tracemalloc.Snapshot.load() reads them)
+      <label>_summary.txt         CPU per thread, top-N functions by self and total time,
+                                  top-N allocation sites and their growth since the first snapshot
+
+    Args:
+        output_dir: Folder for the files (created if missing)
+        label: Prefix of the file names
+        interval: Seconds between stack samples
+        memory: Trace allocations with tracemalloc (slows every allocation down while on)
+        snapshot_interval: Seconds between tracemalloc snapshots
+        top: Rows per table in the summary
+    """
+
+    def __init__(
+        self,
+        output_dir,
+        label=None,
+        interval=0.005,
+        memory=True,
+        snapshot_interval=30.0,
+        top=20,
+    ):
+        self.output_dir = output_dir
+        self.label = label or os.path.splitext(os.path.basename(sys.argv[0]))[0]
+        self.interval = interval
+        self.memory = memory
+        self.snapshot_interval = snapshot_interval
+        self.top = top
+        self.samples = 0
+        self.stacks = collections.Counter()  # (thread, frames...) -> seconds
+        self.thread_cpu = collections.Counter()  # thread name -> seconds
+        self.snapshots = []  # paths of the dumped snapshots
+        self._first_snapshot = None
+        self._last_snapshot = None
+        self._clocks = {}  # thread ident -> (cpu clock, last reading)
+        self._stop = threading.Event()
+        self._thread = None
+        self._start_wall = None
+        self._start_cpu = None
+        self.wall_seconds = 0.0
+        self.cpu_seconds = 0.0
+
+    # ------------------------------------------------------------------ lifecycle
+    def start(self):
+        global _active
+        os.makedirs(self.output_dir, exist_ok=True)
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        self._start_wall = time.perf_counter()
+        self._start_cpu = time.process_time()
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+        self._thread.start()
+        _active = self
+        return self
+
+    def stop(self):
+        """Stop sampling and write the profile files (safe to call more than once)."""
+        global _active
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        self.wall_seconds = time.perf_counter() - self._start_wall
+        self.cpu_seconds = time.process_time() - self._start_cpu
+        if self.memory and tracemalloc.is_tracing():
+            self._snapshot()
+            tracemalloc.stop()
+        if _active is self:
+            _active = None
+        self.write()
+
+    # ------------------------------------------------------------------ sampling
+    def _run(self):
+        own = threading.get_ident()
+        if self.memory:
+            self._snapshot()  # the baseline that the growth table compares against
+        next_snapshot = time.perf_counter() + self.snapshot_interval
+        while not self._stop.wait(self.interval):
+            self._sample(own)
+            if self.memory and time.perf_counter() >= next_snapshot:
+                self._snapshot()
+                next_snapshot = time.perf_counter() + self.snapshot_interval
+
+    def _sample(self, own):
+        frames = sys._current_frames()
+        threads = {thread.ident: thread for thread in threading.enumerate()}
+        self.samples += 1
+        for ident, frame in frames.items():
+            thread = threads.get(ident)
+            if ident == own or thread is None:
+                continue
+            weight = self._cpu_since_last_sample(thread)
+            if not weight:
+                continue  # blocked since the last sample (waiting on I/O, a lock, sleep)
+            self.thread_cpu[thread.name] += weight
+            stack = []
+            while frame is not None:
+                stack.append(_code_name(frame.f_code))
+                frame = frame.f_back
+            stack.append(thread.name)
+            self.stacks[tuple(reversed(stack))] += weight
+
+    def _cpu_since_last_sample(self, thread):
+        entry = self._clocks.get(thread.ident)
+        if entry is None:
+            clock = _thread_cpu_clock(thread)
+            entry = self._clocks[thread.ident] = [clock, clock() if clock else 0.0]
+        clock, last = entry
+        if clock is None:
+            return self.interval
+        try:
+            now = clock()
+        except OSError:
+            return 0.0  # the thread has just ended
+        entry[1] = now
+        return now - last
+
+    def _snapshot(self):
+        snapshot = tracemalloc.take_snapshot().filter_traces(_IGNORED_ALLOCATIONS)
+        path = os.path.join(
+            self.output_dir, f"{self.label}.mem.{len(self.snapshots)}.tracemalloc"
+        )
+        snapshot.dump(path)
+        self.snapshots.append(path)
+        if self._first_snapshot is None:
+            self._first_snapshot = snapshot
+        self._last_snapshot = snapshot
+
+    # ------------------------------------------------------------------ output
+    def top_functions(self):
+        """
+        Returns:
+            (self, total): lists of (function, seconds) sorted by seconds, at most `top` each
+        """
+        own = collections.Counter()
+        total = collections.Counter()
+        for stack, seconds in self.stacks.items():
+            own[stack[-1]] += seconds
+            for function in set(stack[1:]):
+                total[function] += seconds
+        return own.most_common(self.top), total.most_common(self.top)
+
+    def summary_lines(self):
+        sampled = sum(self.stacks.values())
+        lines = [
+            f"Profile of {self.label}: {self.wall_seconds:.1f} s wall, "
+            f"{self.cpu_seconds:.2f} s process CPU, sampled every "
+            f"{1000 * self.interval:g} ms ({sampled:.2f} s of CPU in the stacks)",
+            "",
+            "CPU per thread (s):",
+        ]
+        for name, seconds in self.thread_cpu.most_common():
+            lines.append(f"  {seconds:9.3f}  {name}")
+        own, total = self.top_functions()
+        for title, rows in (("self", own), ("total (incl. callees)", total)):
+            lines += ["", f"Top {self.top} functions by {title} CPU:"]
+            for function, seconds in rows:
+                share = 100.0 * seconds / sampled if sampled else 0.0
+                lines.append(f"  {seconds:9.3f} s {share:5.1f} %  {function}")
+
+        if self._last_snapshot is not None:
+            lines += ["", f"Top {self.top} allocation sites (last snapshot):"]
+            for stat in self._last_snapshot.statistics("lineno")[: self.top]:
+                lines.append(
+                    f"  {stat.size / 1024:10.1f} KiB {stat.count:8d}  {stat.traceback}"
+                )
+            if len(self.snapshots) > 1:
+                lines += [
+                    "",
+                    f"Top {self.top} allocation growth since the first snapshot "
+                    f"({len(self.snapshots)} snapshots):",
+                ]
+                growth = self._last_snapshot.compare_to(self._first_snapshot, "lineno")
+                for stat in growth[: self.top]:
+                    lines.append(
+                        f"  {stat.size_diff / 1024:+10.1f} KiB {stat.count_diff:+8d}  {stat.traceback}"
+                    )
+        return lines
+
+    def write(self):
+        collapsed_path = os.path.join(self.output_dir, f"{self.label}.collapsed")
+        with open(collapsed_path, "w") as f:
+            for stack, seconds in self.stacks.items():
+                f.write(f"{';'.join(stack)} {int(seconds * 1e6)}\n")
+        lines = self.summary_lines()
+        summary_path = os.path.join(self.output_dir, f"{self.label}_summary.txt")
+        with open(summary_path, "w") as f:
+            f.write("\n".join(lines) + "\n")
+        with open(
+            os.path.join(self.output_dir, f"{self.label}_summary.json"), "w"
+        ) as f:
+            own, total = self.top_functions()
+            json.dump(
+                {
+                    "wall_s": round(self.wall_seconds, 3),
+                    "process_cpu_s": round(self.cpu_seconds, 3),
+                    "samples": self.samples,
+                    "thread_cpu_s": {
+                        name: round(seconds, 4)
+                        for name, seconds in self.thread_cpu.items()
+                    },
+                    "top_self_s": [[name, round(s, 4)] for name, s in own],
+                    "top_total_s": [[name, round(s, 4)] for name, s in total],
+                    "snapshots": [os.path.basename(path) for path in self.snapshots],
+                },
+                f,
+                indent=2,
+            )
+        print("\n".join(lines[: 12 + min(self.top, 10)]))
+        print(f"🔬 Profile saved to {summary_path}")
+
+
+class ProfileDump(Sink):
+    """Stops the profiler and writes its files when the session ends."""
+
+    def __init__(self, profiler):
+        self.profiler = profiler
+
+    def close(self):
+        self.profiler.stop()
+
+
+def start_profiling(config, output_dir, session=None, label=None):
+    """
+    Start a SamplingProfiler if heartrate_config "profile" is set or ECG_PROFILE is (scripts
+    also accept --profile): true / "1" profiles CPU and memory, "cpu" leaves tracemalloc off
+    (tracing every allocation makes pure-Python loops several times slower). Its files go to
+    <output_dir>/profile/ when the session ends, or at exit when no session is given. Does
+    nothing if a profiler is already running in this process (e.g. the batch step inside a
+    profiled master controller).
+
+    Returns:
+        The SamplingProfiler, or None if profiling is off
+    """
+    mode = os.environ.get("ECG_PROFILE") or config.profile
+    if mode in (False, None, "", "0") or _active is not None:
+        return None
+    profiler = SamplingProfiler(
+        os.path.join(output_dir, "profile"),
+        label=label,
+        interval=config.profile_interval_ms / 1000.0,
+        memory=mode != "cpu",
+        snapshot_interval=config.profile_snapshot_s,
+    ).start()
+    if session is not None:
+        session.add_sink(ProfileDump(profiler))
+    else:
+        atexit.register(profiler.stop)
+    print(
+        f"🔬 Profiling enabled ({profiler.label}"
+        f"{'' if profiler.memory else ', CPU only'})"
+    )
+    return profiler
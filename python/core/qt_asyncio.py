@@ -0,0 +1,22 @@
+# functions included: pump_qt_events
+# note: minimal Qt <-> asyncio bridge. Instead of running Qt's event loop (app.exec_()) on the
+# main thread and asyncio in another thread, the asyncio loop owns the main thread and
+# processes pending Qt events at the GUI frame rate. BLE notifications are then handled as
+# soon as they arrive, and Qt timers/paint events still run on time.
+
+import asyncio
+
+
+async def pump_qt_events(app, until, interval=1 / 60):
+    """
+    Process Qt events from inside the running asyncio loop.
+
+    Args:
+        app: QApplication
+        until: Callable returning True once the GUI is done (e.g. the window was closed)
+        interval: Seconds between event-processing passes (1/60 = 60 FPS)
+    """
+    while not until():
+        app.processEvents()
+        await asyncio.sleep(interval)
+    app.processEvents()
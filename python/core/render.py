@@ -0,0 +1,77 @@
+# classes included: FrameBudget
+# functions included: minmax_decimate
+# note: Qt-free helpers behind the live plot, so the redraw cost can be measured (and tuned)
+# without a display. python.core.live_plot wires them into the PyQtGraph window.
+
+import time
+
+import numpy as np
+
+
+def minmax_decimate(x, y, bins):
+    """
+    Reduce a window to at most 2 points per horizontal pixel, keeping each pixel's min and
+    max so R-peaks survive (plain striding would drop them).
+
+    Args:
+        x, y: 1-D arrays of equal length (times, samples)
+        bins: Number of output columns, normally the plot's width in pixels
+
+    Returns:
+        (x_out, y_out): the input unchanged if it already fits in 2 * bins points,
+        otherwise 2 * bins points alternating min and max of each column
+    """
+    n = len(y)
+    if bins <= 0 or n <= 2 * bins:
+        return x, y
+
+    per = n // bins
+    start = n - bins * per  # drop the oldest remainder so the newest sample is kept
+    columns = y[start:].reshape(bins, per)
+
+    y_out = np.empty(2 * bins, dtype=y.dtype)
+    y_out[0::2] = columns.min(axis=1)
+    y_out[1::2] = columns.max(axis=1)
+
+    x_columns = x[start:].reshape(bins, per)
+    x_out = np.empty(2 * bins, dtype=x.dtype)
+    x_out[0::2] = x_columns[:, 0]
+    x_out[1::2] = x_columns[:, -1]
+    return x_out, y_out
+
+
+class FrameBudget:
+    """
+    Adaptive redraw interval: keeps redraw time at or below `cpu_budget` of one core.
+
+    A redraw that took d seconds allows the next one d / cpu_budget seconds later,
+    clamped to [min_interval, max_interval] and smoothed so one slow frame does not
+    stall the plot.
+
+    Args:
+        cpu_budget: Fraction of one core the plot may use (0.1 = 10 %)
+        min_interval: Fastest redraw period in seconds (default 30 FPS)
+        max_interval: Slowest redraw period in seconds (default 2 FPS)
+    """
+
+    def __init__(self, cpu_budget=0.1, min_interval=1 / 30, max_interval=0.5):
+        self.cpu_budget = cpu_budget
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.frame_cost = 0.0  # smoothed seconds per redraw
+        self.interval = min_interval
+        self._frame_start = None
+
+    def begin(self):
+        self._frame_start = time.perf_counter()
+
+    def end(self):
+        """Finish timing a redraw and return the next interval in seconds."""
+        cost = time.perf_counter() - self._frame_start
+        self.frame_cost = (
+            cost if self.frame_cost == 0.0 else 0.8 * self.frame_cost + 0.2 * cost
+        )
+        self.interval = min(
+            self.max_interval, max(self.min_interval, self.frame_cost / self.cpu_budget)
+        )
+        return self.interval
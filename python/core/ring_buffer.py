@@ -0,0 +1,93 @@
+# classes included: RingBuffer, ChunkedArray
+# note: typed, preallocated storage for the streaming hot path. Appending a packet costs
+# O(samples in packet) and memory stays fixed no matter how long the session runs.
+
+import numpy as np
+
+
+class RingBuffer:
+    """
+    Fixed-capacity ring of one NumPy dtype.
+
+    Every value is stored twice, at i and i + capacity, so the newest n <= capacity values
+    are always one contiguous slice: latest() returns a view, never a copy, and the reader
+    needs no wrap-around logic.
+
+    Args:
+        capacity: Number of most recent values kept
+        dtype: NumPy dtype (np.uint16 for 12-bit samples, np.float64 for times)
+    """
+
+    def __init__(self, capacity, dtype):
+        self.capacity = capacity
+        self.data = np.zeros(2 * capacity, dtype=dtype)
+        self.total = 0  # values ever appended
+
+    def append(self, values):
+        """Append a batch of values (e.g. one packet). Only the last `capacity` are kept."""
+        n = len(values)
+        cap = self.capacity
+        if n > cap:
+            values = values[-cap:]
+            self.total += n - cap
+            n = cap
+        start = self.total % cap
+        first = min(n, cap - start)
+        self.data[start : start + first] = values[:first]
+        self.data[start + cap : start + cap + first] = values[:first]
+        if first < n:
+            rest = n - first
+            self.data[:rest] = values[first:]
+            self.data[cap : cap + rest] = values[first:]
+        self.total += n
+
+    def latest(self, n=None):
+        """Zero-copy view of the newest n values (all stored values by default), oldest first."""
+        if n is None or n > self.capacity:
+            n = self.capacity
+        n = min(n, self.total)
+        end = self.total % self.capacity + self.capacity
+        return self.data[end - n : end]
+
+    def __len__(self):
+        return min(self.total, self.capacity)
+
+
+class ChunkedArray:
+    """
+    Growable typed array for full-session history. Values go into preallocated chunks,
+    so growing never copies what is already stored (unlike list -> array conversions
+    or np.append).
+
+    Args:
+        dtype: NumPy dtype of the values
+        chunk_size: Values per chunk (default: one minute at 250 Hz)
+    """
+
+    def __init__(self, dtype, chunk_size=250 * 60):
+        self.dtype = dtype
+        self.chunk_size = chunk_size
+        self.chunks = []
+        self.total = 0
+
+    def append(self, values):
+        values = np.asarray(values, dtype=self.dtype)
+        pos = 0
+        while pos < len(values):
+            offset = self.total % self.chunk_size
+            if offset == 0:
+                self.chunks.append(np.empty(self.chunk_size, dtype=self.dtype))
+            take = min(len(values) - pos, self.chunk_size - offset)
+            self.chunks[-1][offset : offset + take] = values[pos : pos + take]
+            pos += take
+            self.total += take
+
+    def to_array(self):
+        """Copy of the whole history as one array."""
+        if not self.chunks:
+            return np.empty(0, dtype=self.dtype)
+        used = self.total - (len(self.chunks) - 1) * self.chunk_size
+        return np.concatenate(self.chunks[:-1] + [self.chunks[-1][:used]])
+
+    def __len__(self):
+        return self.total
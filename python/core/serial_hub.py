@@ -0,0 +1,302 @@
+# classes included: PortStats, PortStream, SerialHub
+# note: many USB gateways, one reader thread. Every ESP32 on the host is opened as a
+# SerialTransport, all of their file descriptors sit in one selector, and each chunk is
+# routed to that port's own StreamingSession (parser, detector, BPM, CSV loggers).
+
+import os
+import selectors
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+from python.core.latency import LatencyReport
+from python.core.capture import start_capture
+from python.core.sinks import CSVSink, PlotBuffer
+from python.core.streaming import StreamingSession, create_csv_loggers
+from python.core.transports import SerialTransport, detect_serial_ports
+
+
+class PortStats:
+    """Throughput and arrival-to-processed latency of one port (updated by the hub thread)."""
+
+    def __init__(self, latency_window=2000):
+        self.bytes = 0
+        self.chunks = 0
+        self.packets = 0
+        self.first_data = None
+        self.last_data = None
+        self.latencies = deque(maxlen=latency_window)  # seconds, most recent chunks
+
+    def record(self, arrival, n_bytes, n_packets, done):
+        if self.first_data is None:
+            self.first_data = arrival
+        self.last_data = arrival
+        self.bytes += n_bytes
+        self.chunks += 1
+        self.packets += n_packets
+        if n_packets:
+            self.latencies.append(done - arrival)
+
+    def summary(self):
+        """
+        Returns:
+            dict with bytes, packets, bytes_per_s, packets_per_s, latency_p50_ms, latency_p99_ms
+        """
+        elapsed = (
+            self.last_data - self.first_data
+            if self.first_data is not None and self.last_data > self.first_data
+            else 0.0
+        )
+        latencies = np.array(self.latencies) * 1000.0
+        return {
+            "bytes": self.bytes,
+            "chunks": self.chunks,
+            "packets": self.packets,
+            "bytes_per_s": self.bytes / elapsed if elapsed else 0.0,
+            "packets_per_s": self.packets / elapsed if elapsed else 0.0,
+            "latency_p50_ms": (
+                float(np.percentile(latencies, 50)) if len(latencies) else 0.0
+            ),
+            "latency_p99_ms": (
+                float(np.percentile(latencies, 99)) if len(latencies) else 0.0
+            ),
+        }
+
+
+class PortStream:
+    """One gateway: its transport, session, loggers, stats and output subfolder."""
+
+    def __init__(
+        self, config, port, output_dir, baudrate=115200, verbose=False, plot=False
+    ):
+        self.port = port
+        self.label = "port_" + os.path.basename(port).replace(".", "_")
+        self.output_dir = os.path.join(output_dir, self.label)
+        os.makedirs(self.output_dir, exist_ok=True)
+
+        self.transport = SerialTransport(port, baudrate, settle_time=0)
+        # Per port: one board ending keeps the rest going
+        self.stop_flag = threading.Event()
+        self.loggers = create_csv_loggers(
+            config,
+            self.output_dir,
+            self.stop_flag,
+            metadata_file=os.path.join(self.output_dir, "run_metadata.json"),
+        )
+        self.session = StreamingSession(
+            config, stop_flag=self.stop_flag, verbose=verbose
+        )
+        self.session.add_sink(CSVSink(*self.loggers))
+        self.session.add_sink(
+            LatencyReport(
+                self.session.latency,
+                os.path.join(self.output_dir, "latency_summary.json"),
+            )
+        )
+        start_capture(config, self.output_dir, self.session, source=f"serial {port}")
+        self.plot_buffer = (
+            self.session.add_sink(PlotBuffer(config.max_samples_plotted))
+            if plot
+            else None
+        )
+        self.stats = PortStats()
+        self.last_packet_time = 0.0
+        self.done = False
+
+
+class SerialHub:
+    """
+    Reads every attached ESP32 gateway from a single selector-driven thread.
+
+    Args:
+        config: Config shared by all ports
+        output_dir: Run folder; each port writes to <output_dir>/port_<name>/
+        ports: Serial device paths (default: every port detect_serial_ports() finds).
+            pty slave paths work too, which is how the hub is tested without boards.
+        settle_time: One wait after opening all ports (the ESP32s reset on open in
+            parallel instead of 2 s each)
+        duration_sec, no_data_timeout, startup_grace: as in StreamingSession, per port
+        plot: Give every port a PlotBuffer (for the dashboard window)
+        metrics: Optional MetricsRegistry; each port's session is registered with a
+            stream=<label> label
+    """
+
+    def __init__(
+        self,
+        config,
+        output_dir,
+        ports=None,
+        baudrate=115200,
+        settle_time=2.0,
+        duration_sec=None,
+        no_data_timeout=2.0,
+        startup_grace=5.0,
+        verbose=False,
+        plot=False,
+        metrics=None,
+    ):
+        self.config = config
+        self.output_dir = output_dir
+        self.ports = ports
+        self.baudrate = baudrate
+        self.settle_time = settle_time
+        self.duration_sec = duration_sec
+        self.no_data_timeout = no_data_timeout
+        self.startup_grace = startup_grace
+        self.verbose = verbose
+        self.plot = plot
+        self.metrics = metrics
+        self.streams = []
+        self.stop_flag = threading.Event()
+        self._selector = None
+        self._thread = None
+
+    def open(self):
+        """Open every port, wait once for the boards to settle, then START them all."""
+        ports = self.ports if self.ports is not None else detect_serial_ports()
+        if not ports:
+            print("Error: no ESP32 gateway ports found.")
+            return False
+        print(f"Found {len(ports)} port(s): {', '.join(ports)}")
+
+        for port in ports:
+            stream = PortStream(
+                self.config,
+                port,
+                self.output_dir,
+                self.baudrate,
+                self.verbose,
+                self.plot,
+            )
+            try:
+                stream.transport.open_port()
+            except Exception as e:
+                print(f"⚠️ Could not open {port}: {e}")
+                stream.stop_flag.set()
+                continue
+            self.streams.append(stream)
+            if self.metrics is not None:
+                self.metrics.add_session(
+                    stream.session, {"stream": stream.label}, stream.loggers
+                )
+        if not self.streams:
+            return False
+
+        time.sleep(self.settle_time)  # Wait for all boards to stabilize at once
+        self._selector = selectors.DefaultSelector()
+        for stream in self.streams:
+            stream.transport.start_stream()
+            fd = stream.transport.fileno()
+            if fd is None:
+                raise RuntimeError(
+                    f"{stream.port} has no selectable file descriptor (SerialHub needs Linux/macOS)"
+                )
+            self._selector.register(fd, selectors.EVENT_READ, stream)
+        return True
+
+    def _finish_stream(self, stream, reason):
+        if stream.done:
+            return
+        stream.done = True
+        print(
+            f"{stream.label}: {reason}. Received {stream.session.parser.packet_count} packets"
+        )
+        fd = stream.transport.fileno()
+        if fd is not None:
+            try:
+                self._selector.unregister(fd)
+            except (KeyError, ValueError):
+                pass
+        stream.session.transport = stream.transport  # finish() closes it (sends STOP)
+        stream.session.finish()
+        stream.stop_flag.set()  # final CSV writes for this port
+
+    def run(self):
+        """Hub loop: wait on all ports at once, route each chunk to its port's session."""
+        print(f"Listening on {len(self.streams)} port(s)...\n")
+        start_time = time.time()
+        for stream in self.streams:
+            stream.last_packet_time = start_time + self.startup_grace
+        select = self._selector.select
+
+        while not self.stop_flag.is_set():
+            live = [stream for stream in self.streams if not stream.done]
+            if not live:
+                break
+
+            for key, _ in select(timeout=0.05):
+                stream = key.data
+                arrival = time.perf_counter()
+                data = stream.transport.read_available()
+                if data is None:
+                    self._finish_stream(stream, "port closed")
+                    continue
+                if not data:
+                    continue
+                packets = stream.session.feed(data, arrival)
+                stream.stats.record(
+                    arrival, len(data), len(packets), time.perf_counter()
+                )
+                stream.last_packet_time = time.time()
+
+            now = time.time()
+            for stream in live:
+                if now - stream.last_packet_time > self.no_data_timeout:
+                    self._finish_stream(
+                        stream, f"no data for {self.no_data_timeout:g} seconds"
+                    )
+            if self.duration_sec is not None and now - start_time >= self.duration_sec:
+                print(
+                    f"\nRecording finished (user-set duration: {self.duration_sec}s)."
+                )
+                break
+
+        for stream in self.streams:
+            self._finish_stream(stream, "stopped")
+        self._selector.close()
+
+    def start(self):
+        """
+        Run the hub loop in one background thread, opening the ports first unless open()
+        was already called (the dashboard opens them to get the plot buffers).
+        """
+
+        def open_and_run():
+            if self._selector is None and not self.open():
+                print("ERROR: no port could be opened, nothing to stream.")
+                return
+            self.run()
+
+        self._thread = threading.Thread(target=open_and_run, daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def stop(self, timeout=3.0):
+        """Stop all ports and wait for the hub thread to send STOP and release the loggers."""
+        self.stop_flag.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=timeout)
+
+    def join_loggers(self, timeout=3.0):
+        for stream in self.streams:
+            for logger in stream.loggers:
+                if logger._thread:
+                    logger._thread.join(timeout=timeout)
+
+    @property
+    def loggers(self):
+        return [logger for stream in self.streams for logger in stream.loggers]
+
+    def stats(self):
+        """Per-port throughput and latency: dict of label -> PortStats.summary()."""
+        return {stream.label: stream.stats.summary() for stream in self.streams}
+
+    def print_stats(self):
+        for label, s in self.stats().items():
+            print(
+                f"{label:24s} {s['packets']:7d} packets | {s['bytes_per_s'] / 1000:6.2f} kB/s | "
+                f"{s['packets_per_s']:5.1f} packets/s | latency p50 {s['latency_p50_ms']:.3f} ms "
+                f"p99 {s['latency_p99_ms']:.3f} ms"
+            )
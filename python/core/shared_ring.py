@@ -0,0 +1,206 @@
+# classes included: SharedRing, SharedRingSink
+# note: lock-free single-writer ring in multiprocessing.shared_memory. The acquisition process
+# publishes samples, sample times, R-peaks and BPM; the GUI process maps the same block and
+# reads zero-copy NumPy views of the latest window.
+
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from python.core.sinks import Sink
+
+# int64 header slots
+SAMPLE_SEQ = 0  # total samples published
+PEAK_SEQ = 1  # total R-peaks published
+PACKET_COUNT = 2  # packets parsed by the acquisition process
+WRITER_DONE = 3  # 1 once the acquisition session has finished
+SAMPLE_CAPACITY = 4
+PEAK_CAPACITY = 5
+WINDOW = 6  # samples returned by snapshot() (the plot window)
+HEADER_SLOTS = 8
+
+# float64 status slots
+CURRENT_BPM = 0
+INSTANTANEOUS_BPM = 1
+STATUS_SLOTS = 4
+
+
+class SharedRing:
+    """
+    Plot window shared between the acquisition process and the GUI process.
+
+    Layout of the shared block (all little-endian, 8-byte aligned):
+
+        header    int64[8]           sequence counters and capacities
+        status    float64[4]         windowed and instantaneous BPM
+        samples   uint16[2 * cap]    every sample is written twice, at i and i + cap,
+        times     float64[2 * cap]   so the newest n <= cap values are always one
+                                     contiguous slice (no wrap handling for readers)
+        peaks     int64[peak_cap]    R-peak sample indices (plain ring)
+
+    There is exactly one writer. It writes the data first and bumps the sequence counter
+    last. A view of the newest n samples stays intact until the writer has published
+    another capacity - n, so the ring holds twice the plot window: snapshot() views are
+    good for a whole window of new data (5 s at the default settings) after they are
+    taken, far longer than a redraw. Readers that keep views longer check
+    still_valid(seq, n) after using them (seqlock style).
+
+    Args:
+        capacity: Samples kept
+        window: Samples in a snapshot() (default: half the capacity)
+    """
+
+    def __init__(
+        self,
+        name=None,
+        capacity=250 * 60,
+        peak_capacity=1024,
+        create=True,
+        window=None,
+    ):
+        if create:
+            size = self._size(capacity, peak_capacity)
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+        self.owner = create
+        buf = self.shm.buf
+
+        self.header = np.ndarray((HEADER_SLOTS,), dtype=np.int64, buffer=buf)
+        if create:
+            self.header[:] = 0
+            self.header[SAMPLE_CAPACITY] = capacity
+            self.header[PEAK_CAPACITY] = peak_capacity
+            self.header[WINDOW] = window or capacity // 2
+        self.capacity = int(self.header[SAMPLE_CAPACITY])
+        self.window = int(self.header[WINDOW])
+        self.peak_capacity = int(self.header[PEAK_CAPACITY])
+
+        offset = HEADER_SLOTS * 8
+        self.status = np.ndarray(
+            (STATUS_SLOTS,), dtype=np.float64, buffer=buf, offset=offset
+        )
+        offset += STATUS_SLOTS * 8
+        self.times = np.ndarray(
+            (2 * self.capacity,), dtype=np.float64, buffer=buf, offset=offset
+        )
+        offset += 2 * self.capacity * 8
+        self.peaks = np.ndarray(
+            (self.peak_capacity,), dtype=np.int64, buffer=buf, offset=offset
+        )
+        offset += self.peak_capacity * 8
+        self.samples = np.ndarray(
+            (2 * self.capacity,), dtype=np.uint16, buffer=buf, offset=offset
+        )
+
+    @staticmethod
+    def _size(capacity, peak_capacity):
+        return (
+            HEADER_SLOTS * 8
+            + STATUS_SLOTS * 8
+            + 2 * capacity * 8
+            + peak_capacity * 8
+            + 2 * capacity * 2
+        )
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    @classmethod
+    def attach(cls, name):
+        return cls(name=name, create=False)
+
+    # ---------------------------------------------------------------- writer side
+    def write_samples(self, samples, times):
+        """Publish one packet's worth (or any batch <= capacity) of samples."""
+        n = len(samples)
+        seq = int(self.header[SAMPLE_SEQ])
+        cap = self.capacity
+        start = seq % cap
+        first = min(n, cap - start)
+        for base in (start, start + cap):
+            self.samples[base : base + first] = samples[:first]
+            self.times[base : base + first] = times[:first]
+        if first < n:
+            rest = n - first
+            for base in (0, cap):
+                self.samples[base : base + rest] = samples[first:]
+                self.times[base : base + rest] = times[first:]
+        self.header[SAMPLE_SEQ] = seq + n  # publish last
+
+    def write_peak(self, peak_index):
+        seq = int(self.header[PEAK_SEQ])
+        self.peaks[seq % self.peak_capacity] = peak_index
+        self.header[PEAK_SEQ] = seq + 1
+
+    # ---------------------------------------------------------------- reader side
+    def latest_samples(self, n):
+        """
+        Zero-copy views of the newest n samples and their times.
+
+        Returns:
+            (times_view, samples_view, sample_seq)
+        """
+        seq = int(self.header[SAMPLE_SEQ])
+        n = min(n, seq, self.capacity)
+        end = seq % self.capacity + self.capacity
+        return self.times[end - n : end], self.samples[end - n : end], seq
+
+    def still_valid(self, seq, n):
+        """
+        True if the views of the newest n samples returned at sample_seq `seq` have not
+        been overwritten since (check after using them).
+        """
+        return int(self.header[SAMPLE_SEQ]) - seq <= self.capacity - n
+
+    def latest_peaks(self, n):
+        """Copy of the newest n R-peak sample indices (oldest first)."""
+        seq = int(self.header[PEAK_SEQ])
+        n = min(n, seq, self.peak_capacity)
+        idx = np.arange(seq - n, seq) % self.peak_capacity
+        return self.peaks[idx]
+
+    def snapshot(self):
+        """
+        Same contract as PlotBuffer.snapshot, so build_window can draw from either: the
+        newest `window` samples. The arrays are views into shared memory, not copies
+        (see the class docstring for how long they stay intact).
+        """
+        return self.latest_samples(self.window)
+
+    @property
+    def sample_seq(self):
+        return int(self.header[SAMPLE_SEQ])
+
+    @property
+    def writer_done(self):
+        return bool(self.header[WRITER_DONE])
+
+    def close(self):
+        # Drop the NumPy views before closing the mapping
+        self.header = self.status = self.times = self.peaks = self.samples = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+class SharedRingSink(Sink):
+    """StreamingSession sink that publishes into a SharedRing (acquisition process side)."""
+
+    def __init__(self, ring):
+        self.ring = ring
+
+    def on_packet(self, packet, packet_count):
+        self.ring.write_samples(packet.samples, packet.sample_times)
+        self.ring.header[PACKET_COUNT] = packet_count
+
+    def on_peak(self, peak_index, sample_value, instantaneous_bpm):
+        self.ring.write_peak(peak_index)
+        self.ring.status[INSTANTANEOUS_BPM] = instantaneous_bpm
+
+    def on_bpm(self, windowed_bpm):
+        self.ring.status[CURRENT_BPM] = windowed_bpm
+
+    def close(self):
+        self.ring.header[WRITER_DONE] = 1
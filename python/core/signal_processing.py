@@ -1,5 +1,4 @@
 import numpy as np
-from scipy.signal import butter, sosfilt, sosfilt_zi
 
 from datetime import datetime
 import csv
@@ -118,7 +117,12 @@ class BPMDetector:
 
     def calculate_bpm_in_window(self, current_time):
         cutoff_time = current_time - self.window_of_averaging
-        peaks_in_window = [p for p in self.peak_history if p[1] >= cutoff_time]
+        # Peaks are added in time order, so the window is the tail of the history: walk back
+        # from the end instead of scanning hours of peaks every second
+        start = len(self.peak_history)
+        while start > 0 and self.peak_history[start - 1][1] >= cutoff_time:
+            start -= 1
+        peaks_in_window = self.peak_history[start:]
         rr_intervals = []
         for i in range(1, len(peaks_in_window)):
             rr_samples = peaks_in_window[i][0] - peaks_in_window[i - 1][0]
@@ -136,12 +140,17 @@ class AD8232_Bandpass_Simulator:
         self.hp_cut = hp_cutoff
         self.lp_cut = lp_cutoff
         self.order = order
+        # scipy.signal takes about a second to import; only the batch filter needs it,
+        # so the streaming scripts (which import this module) don't pay for it at launch
+        from scipy.signal import butter, sosfilt, sosfilt_zi
+
         nyq = 0.5 * fs
         low = hp_cutoff / nyq
         high = lp_cutoff / nyq
         self.sos = butter(order, [low, high], btype="bandpass", output="sos")
         self.zi = sosfilt_zi(self.sos)
+        self._sosfilt = sosfilt
 
     def filter_array(self, data):
-        y, _ = sosfilt(self.sos, data, zi=self.zi * len(data))
+        y, _ = self._sosfilt(self.sos, data, zi=self.zi * len(data))
         return y
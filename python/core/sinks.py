@@ -0,0 +1,115 @@
+# classes included: Sink, CSVSink, GapLogSink, PlotBuffer
+# note: outputs of StreamingSession. The session calls every sink in the order they were added.
+
+import datetime
+import json
+import threading
+
+import numpy as np
+
+from python.core.ring_buffer import RingBuffer, ChunkedArray
+
+
+class Sink:
+    """No-op base class; override only the callbacks you need."""
+
+    def on_packet(self, packet, packet_count):
+        """Called once per parsed packet, after its samples went through the detector."""
+
+    def on_peak(self, peak_index, sample_value, instantaneous_bpm):
+        """Called for every new R-peak."""
+
+    def on_bpm(self, windowed_bpm):
+        """Called whenever the windowed BPM is recomputed (about once per second)."""
+
+    def on_gap(self, gap):
+        """Called when the session records a stretch with no data (see record_gap)."""
+
+    def close(self):
+        """Called once when the session ends."""
+
+
+class CSVSink(Sink):
+    """Writes streamed_raw_packets.csv and streamed_data_outputs.csv through CSVLoggers."""
+
+    def __init__(self, csv_logger, bpm_logger):
+        self.csv_logger = csv_logger
+        self.bpm_logger = bpm_logger
+
+    def on_packet(self, packet, packet_count):
+        if packet_count == 1:
+            self.csv_logger.start_time = datetime.datetime.now().isoformat()
+        log = self.csv_logger.log
+        for sample_time, sample in zip(packet.sample_times, packet.samples):
+            log(sample_time, sample, packet.packet_id, packet_count)
+
+    def on_peak(self, peak_index, sample_value, instantaneous_bpm):
+        self.bpm_logger.log(peak_index, sample_value, round(instantaneous_bpm, 1))
+
+
+class GapLogSink(Sink):
+    """
+    Writes every recorded gap to stream_gaps.json next to the CSVs, so analysis can tell a
+    reconnect from a missing beat. The file is rewritten on each gap (gaps are rare).
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.gaps = []
+
+    def on_gap(self, gap):
+        self.gaps.append(gap)
+        with open(self.path, "w") as f:
+            json.dump(self.gaps, f, indent=2)
+
+
+class PlotBuffer(Sink):
+    """
+    Samples shared with the live plot, in preallocated NumPy rings (nothing grows, nothing
+    is trimmed). The session thread appends, the Qt timer reads zero-copy views.
+
+    The rings hold two plot windows, so a view handed to the GUI is only overwritten after
+    another full window of samples has arrived - far longer than a redraw takes.
+
+    Args:
+        max_samples_plotted: Plot window in samples
+        keep_history: Also keep every sample and time in ChunkedArrays (full_samples /
+            full_timestamps). Off by default: the CSV recorder already has the full session.
+    """
+
+    def __init__(self, max_samples_plotted, keep_history=False):
+        self.max_samples_plotted = max_samples_plotted
+        self.data_lock = threading.Lock()
+        self.samples_plot = RingBuffer(2 * max_samples_plotted, np.uint16)
+        self.timestamps_plot = RingBuffer(2 * max_samples_plotted, np.float64)
+        self.peak_indices = RingBuffer(1024, np.int64)
+        self.full_samples = ChunkedArray(np.uint16) if keep_history else None
+        self.full_timestamps = ChunkedArray(np.float64) if keep_history else None
+        self.current_bpm = 0.0
+        self.instantaneous_bpm = 0.0
+
+    def on_packet(self, packet, packet_count):
+        with self.data_lock:
+            self.samples_plot.append(packet.samples)
+            self.timestamps_plot.append(packet.sample_times)
+            if self.full_samples is not None:
+                self.full_samples.append(packet.samples)
+                self.full_timestamps.append(packet.sample_times)
+
+    def on_peak(self, peak_index, sample_value, instantaneous_bpm):
+        with self.data_lock:
+            self.peak_indices.append((peak_index,))
+            self.instantaneous_bpm = instantaneous_bpm
+
+    def on_bpm(self, windowed_bpm):
+        self.current_bpm = windowed_bpm
+
+    def snapshot(self):
+        """Return views of (timestamps, samples) in the plot window and the total sample count."""
+        with self.data_lock:
+            n = self.max_samples_plotted
+            return (
+                self.timestamps_plot.latest(n),
+                self.samples_plot.latest(n),
+                self.samples_plot.total,
+            )
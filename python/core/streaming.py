@@ -0,0 +1,408 @@
+# classes included: StreamingSession
+# functions included: create_csv_loggers
+# note: the one copy of the read_from_mcu pipeline (parse -> detect -> BPM -> sinks) shared by
+# step4_stream_usb.py, step4_stream_ble.py and step2_stream_ble_realtime.py. The transport
+# decides where the bytes come from (serial, BLE, TCP, replay).
+
+import os
+import threading
+import time
+
+from python.core.clock import SYSTEM_CLOCK
+from python.core.data_handling import PacketParser
+from python.core.signal_processing import R_peak_detector, BPMDetector
+from python.core.logging import CSVLogger, AsyncCSVLogger
+from python.core.journal import JournaledCSVLogger
+from python.core.latency import LatencyTracker
+from python.core.console import console
+from python.core.tracing import tracer
+
+# Packet IDs run 1..255: a step of this much or more, with an MCU timestamp no later than
+# the last packet's, is taken as a step back (a late or repeated packet) rather than that
+# many lost packets
+BACKWARD_ID_STEP = 128
+
+
+def create_csv_loggers(
+    config, output_dir, stop_flag, asynchronous=False, clock=None, metadata_file=None
+):
+    """
+    Create and start the raw-packet and R-peak/BPM loggers for one run.
+
+    Args:
+        asynchronous: Use AsyncCSVLogger (for AsyncBLEStreamer, which runs the loggers
+            as tasks on its event loop). Journaled recording always uses its own thread.
+        clock: Clock of the writers' flush interval (the session's, see clock.py)
+        metadata_file: Where the plain loggers save run_metadata.json (default: the
+            working directory). Journaled loggers save theirs next to each CSV.
+
+    Returns:
+        (csv_logger, bpm_logger)
+    """
+    raw_csv_path = os.path.join(output_dir, "streamed_raw_packets.csv")
+    bpm_csv_path = os.path.join(output_dir, "streamed_data_outputs.csv")
+
+    # Journaled mode keeps the recording recoverable if this process is killed
+    # (recover with: python3 -m python.core.journal <csv path>.journal)
+    options = {"clock": clock}
+    if config.journaled_recording:
+        logger_class = JournaledCSVLogger
+    else:
+        logger_class = AsyncCSVLogger if asynchronous else CSVLogger
+        options["metadata_file"] = metadata_file
+
+    csv_logger = logger_class(raw_csv_path, stop_flag, **options)
+    csv_logger.create_CSV(header=["Time", "Sample", "Packet ID", "Packet Count"])
+
+    bpm_logger = logger_class(bpm_csv_path, stop_flag, **options)
+    bpm_logger.create_CSV(
+        header=["Detected R_peak_index", "Digital Value", "Instantaneous_BPM"]
+    )
+    return csv_logger, bpm_logger
+
+
+class StreamingSession:
+    """
+    Parses gateway packets from a transport, runs every sample through the R-peak detector,
+    updates BPM and hands the results to the sinks.
+
+    The pipeline can be driven two ways:
+      - start()/run(): read from the transport until stopped, timed out or exhausted
+      - feed(data): push a chunk of bytes directly (no transport, no threads) - this is
+        what benchmarks and replays use
+
+    batch_hooks are called as hook(session, packets) after every chunk fed through the
+    pipeline, so callers can time or inspect batches without touching the hot path.
+
+    Every chunk is also timed stage by stage into self.latency (a LatencyTracker; pass
+    track_latency=False to turn it off).
+
+    Timeouts, the BPM update interval and the duration follow `clock` (the wall clock by
+    default), which is handed on to the transport; pass a VirtualClock to run a paced
+    replay in simulated time.
+    """
+
+    def __init__(
+        self,
+        config,
+        transport=None,
+        sinks=None,
+        stop_flag=None,
+        duration_sec=None,
+        no_data_timeout=2.0,
+        startup_grace=5.0,
+        read_timeout=0.05,
+        verbose=True,
+        track_latency=True,
+        clock=None,
+    ):
+        self.config = config
+        self.clock = clock if clock is not None else SYSTEM_CLOCK
+        self.transport = transport
+        if transport is not None:
+            transport.clock = self.clock
+        self.sinks = list(sinks) if sinks else []
+        self.stop_flag = stop_flag if stop_flag is not None else threading.Event()
+        self.duration_sec = duration_sec
+        self.no_data_timeout = no_data_timeout
+        self.startup_grace = startup_grace  # ESP32 startup delay before first packet
+        self.read_timeout = (
+            read_timeout  # longest a read blocks before stop_flag is rechecked
+        )
+        self.verbose = verbose
+        self.batch_hooks = []
+        self.latency = LatencyTracker() if track_latency else None
+        self.capture = None  # CaptureWriter teeing the raw chunks (see capture.py)
+        self._sink_seconds = 0.0
+        self._thread = None
+        self.reset()
+
+    def reset(self):
+        """Fresh parser, detector and BPM state (start of a new recording)."""
+        self.parser = PacketParser(self.config.packet_size)
+        self.detector = R_peak_detector(
+            fs=self.config.fs, sec_of_calibration=2, slope_spacing=4, mov_ave_window=15
+        )
+        self.bpm_detector = BPMDetector(fs=self.config.fs, window_of_averaging=5)
+        self.global_sample_counter = 0
+        self.current_bpm = 0.0
+        self.instantaneous_bpm = 0.0
+        self.mcu_timestamps = []
+        self.gaps = []
+        self.packets_lost = 0  # packet IDs skipped by the firmware counter
+        self.packets_duplicated = 0  # packet IDs received again
+        self.packets_reordered = 0  # skipped packet IDs that arrived late
+        self._missing_ids = set()  # skipped IDs that may still arrive late
+        self.bpm_updates = 0
+        self._last_packet_id = None
+        self._last_packet_time = None
+        self.last_bpm_calculation = self.clock.time()
+
+    def add_sink(self, sink):
+        self.sinks.append(sink)
+        return sink
+
+    # ---------------------------------------------------------------- pipeline
+    def feed(self, data, arrival=None):
+        """
+        Push raw transport bytes through parse -> detect -> BPM -> sinks.
+
+        Args:
+            data: Bytes from the transport
+            arrival: time.perf_counter() when the bytes reached the host (BLE notify,
+                serial read); defaults to now
+        """
+        latency = self.latency
+        if latency is not None:
+            dequeued = time.perf_counter()
+            if arrival is None:
+                arrival = dequeued
+        if self.capture is not None:
+            self.capture.write(
+                data, arrival if arrival is not None else time.perf_counter()
+            )
+        tracing = tracer.enabled
+        if tracing:
+            parse_start = time.perf_counter_ns()
+
+        parser = self.parser
+        parser.update_buffer(data)
+
+        if b"RESET_REASON" in data:
+            print(f"⚠️ ESP32 RESET DETECTED: {data}")
+        if b"BOOT_TIME" in data:
+            print(f"⚠️ ESP32 RESTARTED: {data}")
+
+        packets = parser.get_packets()
+        if latency is not None and packets:
+            parsed = time.perf_counter()
+            peaks_before = len(self.detector.detected_peaks)
+            self._sink_seconds = 0.0
+        if tracing:
+            detect_start = time.perf_counter_ns()
+            tracer.span("parse", parse_start, detect_start, len(data))
+
+        for packet in packets:
+            self.process_packet(packet)
+
+        if tracing and packets:
+            # detect includes the sinks (CSV log calls, plot buffer) run per packet
+            tracer.span("detect", detect_start, value=len(packets))
+
+        if latency is not None and packets:
+            latency.record_chunk(
+                arrival,
+                dequeued,
+                parsed,
+                time.perf_counter(),
+                self._sink_seconds,
+                len(self.detector.detected_peaks) > peaks_before,
+                packets[-1].timestamp / 1000.0,
+            )
+
+        for hook in self.batch_hooks:
+            hook(self, packets)
+        return packets
+
+    def _count_out_of_sequence(self, packet, last_id):
+        """
+        A packet whose ID is not the next one: a step forward means the IDs in between
+        were lost; a step back is a skipped ID arriving late (reordered, so no longer
+        lost) or an ID already received (duplicated). The MCU timestamp tells a step back
+        from a long outage, whose IDs can wrap past the last one.
+        """
+        packet_id = packet.packet_id
+        step = (packet_id - last_id) % 255
+        backward = (
+            step == 0 or step >= BACKWARD_ID_STEP
+        ) and packet.timestamp <= self._last_packet_time
+        if backward and packet_id in self._missing_ids:
+            self._missing_ids.discard(packet_id)
+            self.packets_reordered += 1
+            self.packets_lost -= 1
+        elif backward:
+            self.packets_duplicated += 1
+        else:
+            step = step or 255  # the same ID, a whole cycle later
+            for skipped in range(last_id + 1, last_id + step):
+                self._missing_ids.add((skipped - 1) % 255 + 1)
+            self._missing_ids.discard(packet_id)
+            self.packets_lost += step - 1
+            self._last_packet_id = packet_id
+            self._last_packet_time = packet.timestamp
+
+    def process_packet(self, packet):
+        parser = self.parser
+        parser.packet_count += 1
+        self.mcu_timestamps.append(packet.timestamp)  # in ms for now
+
+        # Packet IDs run 1..255 and wrap; a jump means packets were lost on the link
+        last_id = self._last_packet_id
+        if last_id is None or packet.packet_id == last_id % 255 + 1:
+            self._last_packet_id = packet.packet_id
+            self._last_packet_time = packet.timestamp
+            if self._missing_ids:
+                self._missing_ids.discard(packet.packet_id)
+        else:
+            self._count_out_of_sequence(packet, last_id)
+
+        timed = self.latency is not None
+
+        # Bind hot-path lookups once per packet instead of once per sample
+        detected_peaks = self.detector.detected_peaks
+        process_sample = self.detector.process_sample
+        bpm_detector = self.bpm_detector
+
+        for sample_value, sample_time in zip(packet.samples, packet.sample_times):
+            peaks_before = len(detected_peaks)
+            process_sample(sample_value)  # currently processing UNFILTERED VALUES
+
+            if len(detected_peaks) > peaks_before:
+                peak_sample_index = detected_peaks[-1]
+                # The peak is confirmed a few samples after it happened: time it at the
+                # peak itself, as BatchTester does, so the 5 s BPM window holds the same beats
+                peak_time = (
+                    sample_time
+                    - (self.global_sample_counter - peak_sample_index) / self.config.fs
+                )
+                bpm_detector.add_peak(peak_sample_index, peak_time)
+                self.instantaneous_bpm = bpm_detector.instantaneous_bpm
+
+                if self.verbose:
+                    console.debug(
+                        "peak",
+                        f"💓 Peak detected at sample {peak_sample_index} (global: {self.global_sample_counter}) | Instant BPM: {self.instantaneous_bpm:.1f}",
+                    )
+                if timed:
+                    sink_start = time.perf_counter()
+                for sink in self.sinks:
+                    sink.on_peak(
+                        peak_sample_index, sample_value, self.instantaneous_bpm
+                    )
+                if timed:
+                    self._sink_seconds += time.perf_counter() - sink_start
+            self.global_sample_counter += 1
+
+        if timed:
+            sink_start = time.perf_counter()
+        for sink in self.sinks:
+            sink.on_packet(packet, parser.packet_count)
+        if timed:
+            self._sink_seconds += time.perf_counter() - sink_start
+
+        current_time = self.clock.time()
+        if current_time - self.last_bpm_calculation >= 1.0:
+            self.current_bpm = bpm_detector.calculate_bpm_in_window(
+                packet.sample_times[-1]
+            )
+            self.last_bpm_calculation = current_time
+            self.bpm_updates += 1
+            if self.verbose:
+                console.info(
+                    "bpm", f"📊 Windowed BPM (5s avg): {self.current_bpm:.1f} BPM"
+                )
+            if timed:
+                sink_start = time.perf_counter()
+            for sink in self.sinks:
+                sink.on_bpm(self.current_bpm)
+            if timed:
+                self._sink_seconds += time.perf_counter() - sink_start
+
+    def record_gap(self, start_time, end_time, reason):
+        """
+        Note a stretch with no data (e.g. a BLE reconnect) without resetting anything: the
+        detector, BPM window and loggers carry on as if the samples had simply arrived late.
+
+        Args:
+            start_time, end_time: clock.time() when the link was lost / streaming resumed
+            reason: Short label, e.g. "ble_disconnect"
+
+        Returns:
+            dict: The gap as handed to every sink's on_gap()
+        """
+        gap = {
+            "start_time": start_time,
+            "end_time": end_time,
+            "duration_s": round(end_time - start_time, 3),
+            "sample_index": self.global_sample_counter,
+            "packet_count": self.parser.packet_count,
+            "reason": reason,
+        }
+        self.gaps.append(gap)
+        if self.latency is not None:
+            self.latency.reset_mcu_offset()
+        self._last_packet_id = None  # the firmware restarts its packet IDs on START
+        self._missing_ids.clear()
+        print(
+            f"⚠️ Gap of {gap['duration_s']:.2f} s ({reason}) at sample {gap['sample_index']}"
+        )
+        for sink in self.sinks:
+            sink.on_gap(gap)
+        return gap
+
+    # ---------------------------------------------------------------- transport loop
+    def run(self):
+        """Read from the transport until stop_flag, duration, no-data timeout or end of data."""
+        print("Listening for packets...\n")
+        clock = self.clock
+        start_time = clock.time()
+        last_packet_time = start_time + self.startup_grace
+        self.last_bpm_calculation = start_time  # not session creation (open() may settle)
+        transport = self.transport
+        read = transport.read
+
+        while not self.stop_flag.is_set():
+            data = read(timeout=self.read_timeout)
+            if data is None:
+                print("Transport has no more data.")
+                break
+            if data:
+                last_packet_time = clock.time()
+                self.feed(data, transport.last_arrival)
+            elif clock.time() - last_packet_time > self.no_data_timeout:
+                print(
+                    f"No data for {self.no_data_timeout:g} seconds, assuming done. Received {self.parser.packet_count} packets"
+                )
+                break
+
+            if (
+                self.duration_sec is not None
+                and clock.time() - start_time >= self.duration_sec
+            ):
+                print(
+                    f"\nRecording finished (user-set duration: {self.duration_sec}s). Stopping now..."
+                )
+                self.stop_flag.set()
+
+        self.finish()
+
+    def finish(self):
+        print(
+            f"Exited read loop. stop_flag={self.stop_flag.is_set()}, packet_count={self.parser.packet_count}"
+        )
+        print("Full set of BPM: ")
+        print(self.bpm_detector.bpm_history)
+        print("Detected R-peaks (sample indices):", self.detector.detected_peaks)
+        if self.transport is not None:
+            self.transport.close()
+        for sink in self.sinks:
+            sink.close()
+
+    def start(self):
+        """Open the transport and run the pipeline in a background thread."""
+
+        def open_and_run():
+            if not self.transport.open():
+                print("ERROR: transport could not be opened, nothing to stream.")
+                return
+            self.run()
+
+        self._thread = threading.Thread(target=open_and_run, daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def stop(self):
+        """Stop the pipeline and tell the device to stop streaming."""
+        self.stop_flag.set()
+        if self.transport is not None:
+            self.transport.close()
@@ -0,0 +1,276 @@
+# classes included: SyntheticECG
+# functions included: synthetic_ecg
+# note: license-free ECG for the benchmarks, simulators and soak tests, built from the
+# heartrate_config parameters (bpm, num_beats, heartbeat_type, P/PR/QRS/ST/T/TP durations).
+# Every wave is a Gaussian placed by beat, evaluated with NumPy a block of samples at a time
+# (hours of 250 Hz data in a fraction of a second, in constant memory), then put through the
+# same analog -> 12-bit ADC conversion as the PhysioNet datasets (step1_generate_dataset_physionet).
+
+import sys
+
+import numpy as np
+
+# Segment durations (s) of one beat at 60 BPM when heartrate_config has none
+DEFAULT_DURATIONS = {"P": 0.1, "PR": 0.05, "QRS": 0.1, "ST": 0.15, "T": 0.2, "TP": 0.4}
+# Waves of one beat: (segment, offset of the peak within it as a fraction, width as a
+# fraction of the segment (Gaussian sigma), amplitude in mV)
+WAVES = (
+    ("P", 0.5, 1 / 6, 0.15),
+    ("QRS", 0.15, 0.08, -0.1),  # Q
+    ("QRS", 0.45, 0.09, 1.0),  # R
+    ("QRS", 0.75, 0.08, -0.25),  # S
+    ("T", 0.5, 1 / 6, 0.3),
+)
+R_WAVE = 2  # index in WAVES of the R wave (the ground-truth peak)
+BLOCK_SAMPLES = 65536  # samples rendered at a time
+HEARTBEAT_TYPES = ("regular", "irregular")
+# Shortest TP (fraction of the RR interval) before the other segments shrink
+MIN_TP_FRACTION = 0.05
+
+
+class SyntheticECG:
+    """
+    Synthetic ECG generator.
+
+    Each beat lays out P, PR, QRS, ST, T and TP segments from `durations`. The RR interval
+    comes from the heart rate; TP absorbs the difference, and when the RR interval is too
+    short for the other segments they are all shortened by the same factor.
+
+    Args:
+        bpm: Mean heart rate
+        fs: Sample rate (Hz)
+        durations: Segment durations in seconds (heartrate_config "durations")
+        heartbeat_type: "regular" (sinus rhythm with breathing-related variability) or
+            "irregular" (atrial-fibrillation-like: random RR intervals and no P waves)
+        hrv: Heart-rate variability, as the standard deviation of the RR interval relative
+            to its mean (at least 0.15 for "irregular")
+        noise_mv: Standard deviation of the white measurement noise (mV)
+        wander_mv: Amplitude of the 0.3 Hz baseline wander (mV)
+        bits, gain, baseline, vref: ADC conversion, as for the PhysioNet datasets
+            (mV * gain -> V around `baseline`, clipped to 0..vref, quantized to `bits`)
+        seed: Seed of the variability and the noise
+    """
+
+    def __init__(
+        self,
+        bpm=75,
+        fs=250,
+        durations=None,
+        heartbeat_type="regular",
+        hrv=0.03,
+        noise_mv=0.01,
+        wander_mv=0.05,
+        bits=12,
+        gain=500,
+        baseline=1.5,
+        vref=3.3,
+        seed=0,
+    ):
+        if heartbeat_type not in HEARTBEAT_TYPES:
+            raise ValueError(
+                f"heartbeat_type must be one of {', '.join(HEARTBEAT_TYPES)}, got {heartbeat_type!r}"
+            )
+        self.bpm = bpm
+        self.fs = fs
+        self.durations = dict(DEFAULT_DURATIONS, **(durations or {}))
+        self.heartbeat_type = heartbeat_type
+        self.hrv = hrv
+        self.noise_mv = noise_mv
+        self.wander_mv = wander_mv
+        self.bits = bits
+        self.gain = gain
+        self.baseline = baseline
+        self.vref = vref
+        self.seed = seed
+
+    @classmethod
+    def from_config(cls, config, **overrides):
+        """Generator for the bpm, sampling_hz, heartbeat_type and durations of a Config."""
+        options = {
+            "bpm": config.bpm,
+            "fs": config.sampling_hz,
+            "durations": config.durations,
+            "heartbeat_type": config.heartbeat_type,
+        }
+        options.update(overrides)
+        return cls(**options)
+
+    def rr_intervals(self, num_beats, rng):
+        """
+        Returns:
+            array of num_beats RR intervals (s)
+        """
+        mean_rr = 60.0 / self.bpm
+        if self.heartbeat_type == "irregular":
+            # Atrial fibrillation: intervals are independent of each other
+            spread = max(self.hrv, 0.15)
+            rr = mean_rr * (1 + spread * rng.standard_normal(num_beats))
+        else:
+            # Sinus rhythm: breathing (about 0.25 Hz) speeds up and slows down the heart.
+            # 80 % of the variability (as standard deviation) is breathing, the rest random
+            beat_times = np.arange(num_beats) * mean_rr
+            breathing = np.sin(
+                2 * np.pi * 0.25 * beat_times + rng.uniform(0, 2 * np.pi)
+            )
+            rr = mean_rr * (
+                1
+                + self.hrv * np.sqrt(2) * 0.8 * breathing
+                + self.hrv * 0.6 * rng.standard_normal(num_beats)
+            )
+        return np.clip(rr, 0.3 * mean_rr, 2.0 * mean_rr)
+
+    def _beats(self, seconds, num_beats, rng):
+        """
+        Returns:
+            (n, onsets, scale, r_peaks): number of samples, start time of every beat, how
+            much its waves are shortened, and the sample index of every R peak
+        """
+        if seconds is None and num_beats is None:
+            raise ValueError("give the length of the signal: seconds or num_beats")
+        mean_rr = 60.0 / self.bpm
+        if num_beats is None:
+            # Enough beats for `seconds` even if every RR interval is the shortest one
+            num_beats = int(np.ceil(seconds / (mean_rr * 0.3))) + 1
+        rr = self.rr_intervals(num_beats, rng)
+        onsets = np.cumsum(rr) - rr
+        if seconds is None:
+            seconds = onsets[-1] + rr[-1]
+        n = int(round(seconds * self.fs))
+        kept = np.searchsorted(onsets, seconds)
+        onsets, rr = onsets[:kept], rr[:kept]
+
+        # TP takes up what the other segments leave of the RR interval; when they do not
+        # fit, all of them shrink together
+        scale = np.minimum(1.0, rr * (1 - MIN_TP_FRACTION) / self._waves_length())
+        _, r_offset = self._wave_centers()[R_WAVE]
+        r_peaks = np.round((onsets + r_offset * scale) * self.fs).astype(np.int64)
+        return n, onsets, scale, r_peaks[r_peaks < n]
+
+    def _waves_length(self):
+        return sum(self.durations[name] for name in ("P", "PR", "QRS", "ST", "T"))
+
+    def _wave_centers(self):
+        """(sigma, center) of every wave of WAVES, in seconds from the beat onset, unscaled."""
+        starts = {}
+        position = 0.0
+        for name in ("P", "PR", "QRS", "ST", "T"):
+            starts[name] = position
+            position += self.durations[name]
+        return [
+            (
+                width * self.durations[segment],
+                starts[segment] + offset * self.durations[segment],
+            )
+            for segment, offset, width, _ in WAVES
+        ]
+
+    def _render(self, n, onsets, scale, rng):
+        """
+        Yields (start, mV array) blocks of BLOCK_SAMPLES: memory stays the same for any
+        length, and the arrays stay small enough to be fast.
+        """
+        centers = self._wave_centers()
+        fibrillation_phase = rng.uniform(0, 2 * np.pi)
+        for start in range(0, n, BLOCK_SAMPLES):
+            t = np.arange(start, min(n, start + BLOCK_SAMPLES)) / self.fs
+            beat = np.searchsorted(onsets, t, side="right") - 1
+            local = t - onsets[beat]
+            beat_scale = scale[beat]
+            signal = self.wander_mv * np.sin(2 * np.pi * 0.3 * t)
+            for (segment, _, _, amplitude), (sigma, center) in zip(WAVES, centers):
+                if segment == "P" and self.heartbeat_type == "irregular":
+                    continue  # no organized atrial activity in atrial fibrillation
+                z = (local - center * beat_scale) / (sigma * beat_scale)
+                signal += amplitude * np.exp(-0.5 * z * z)
+            if self.heartbeat_type == "irregular":
+                # Fibrillatory waves in place of P waves
+                signal += 0.04 * np.sin(2 * np.pi * 6.0 * t + fibrillation_phase)
+            if self.noise_mv:
+                signal += rng.normal(0.0, self.noise_mv, len(t))
+            yield start, signal
+
+    def generate_mv(self, seconds=None, num_beats=None):
+        """
+        Analog signal (mV, before the ADC).
+
+        Args:
+            seconds: Length of the signal; or
+            num_beats: Number of beats (the signal ends after the last one). One of the
+                two is required (ValueError otherwise)
+
+        Returns:
+            (signal, r_peaks): float array of mV and the sample index of every R peak
+        """
+        rng = np.random.default_rng(self.seed)
+        n, onsets, scale, r_peaks = self._beats(seconds, num_beats, rng)
+        signal = np.empty(n)
+        for start, block in self._render(n, onsets, scale, rng):
+            signal[start : start + len(block)] = block
+        return signal, r_peaks
+
+    def to_adc(self, signal_mv):
+        """Analog mV -> ADC codes, like generateData.float_to_adc (vectorized)."""
+        adc_max = 2**self.bits - 1
+        volts = np.clip(self.baseline + signal_mv * self.gain / 1000.0, 0.0, self.vref)
+        return np.round(volts / self.vref * adc_max).astype(np.uint16)
+
+    def generate(self, seconds=None, num_beats=None):
+        """
+        Args:
+            seconds: Length of the signal; or
+            num_beats: Number of beats (the signal ends after the last one). One of the
+                two is required (ValueError otherwise)
+
+        Returns:
+            (samples, r_peaks): uint16 array of ADC codes and the sample index of every R peak
+        """
+        rng = np.random.default_rng(self.seed)
+        n, onsets, scale, r_peaks = self._beats(seconds, num_beats, rng)
+        samples = np.empty(n, dtype=np.uint16)
+        for start, block in self._render(n, onsets, scale, rng):
+            samples[start : start + len(block)] = self.to_adc(block)
+        return samples, r_peaks
+
+
+def synthetic_ecg(seconds, bpm=75, fs=250, **options):
+    """
+    `seconds` of 12-bit synthetic ECG with the default waveform (options as for
+    SyntheticECG). Deterministic for a given seed, so benchmark inputs do not change
+    between runs.
+
+    Returns:
+        list of int ADC values
+    """
+    samples, _ = SyntheticECG(bpm=bpm, fs=fs, **options).generate(seconds=seconds)
+    return samples.tolist()
+
+
+if __name__ == "__main__":
+    # Usage: python3 -m python.core.synthetic <output.csv> [seconds] [--seed=N] [--bpm=N]
+    #        (otherwise num_beats, bpm, sampling_hz, heartbeat_type and durations come from
+    #        heartrate_config.JSON). The CSV is in the "ECG Digital Dataset.csv" format.
+    import csv
+
+    from python.core.config import Config
+
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    options = dict(
+        arg[2:].split("=", 1) for arg in sys.argv[1:] if arg.startswith("--")
+    )
+    config = Config()
+    overrides = {"seed": int(options.get("seed", 0))}
+    if "bpm" in options:
+        overrides["bpm"] = float(options["bpm"])
+    generator = SyntheticECG.from_config(config, **overrides)
+    if len(args) > 1:
+        samples, r_peaks = generator.generate(seconds=float(args[1]))
+    else:
+        samples, r_peaks = generator.generate(num_beats=config.num_beats)
+    with open(args[0], "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["Expected (Calculated in SW)"])
+        writer.writerows([sample] for sample in samples.tolist())
+    print(
+        f"✅ Saved {len(samples)} samples ({len(samples) / generator.fs:.1f} s at "
+        f"{generator.fs} Hz, {len(r_peaks)} beats, {generator.heartbeat_type}) to {args[0]}"
+    )
@@ -0,0 +1,173 @@
+# classes included: Tracer, TraceDump
+# functions included: start_tracing
+# note: opt-in timeline of what every thread of a streaming run was doing (BLE notifications,
+# parsing, detection, CSV flushes, plot redraws), saved as a Chrome Trace Event file that
+# chrome://tracing or https://ui.perfetto.dev opens directly. Each thread appends its spans to
+# its own list (no lock on the hot path); call sites check `tracer.enabled` first, so with
+# tracing off a stage costs one attribute lookup.
+
+import atexit
+import json
+import os
+import threading
+import time
+
+from python.core.sinks import Sink
+
+# ~2 h of BLE chunks per thread; later spans are counted, not kept
+MAX_EVENTS_PER_THREAD = 1_000_000
+
+# A span carries one number; this is what it is called in the trace viewer
+VALUE_NAMES = {
+    "notify": "bytes",
+    "parse": "bytes",
+    "detect": "packets",
+    "csv_flush": "rows",
+    "plot_redraw": "plots",
+}
+
+
+class Tracer:
+    """
+    Span recorder. Usage at a call site:
+
+        if tracer.enabled:
+            start = time.perf_counter_ns()
+        ...  # the traced work
+        if tracer.enabled:
+            tracer.span("parse", start, value=len(data))
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.epoch_ns = time.perf_counter_ns()
+        self.dropped = 0
+        self._local = threading.local()
+        self._buffers = []  # (tid, thread name, events) of every thread that traced
+        # Taken once per thread, on its first span
+        self._register_lock = threading.Lock()
+
+    def enable(self):
+        self.epoch_ns = time.perf_counter_ns()
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def _events(self):
+        try:
+            return self._local.events
+        except AttributeError:
+            events = self._local.events = []
+            thread = threading.current_thread()
+            with self._register_lock:
+                self._buffers.append((threading.get_native_id(), thread.name, events))
+            return events
+
+    def span(self, name, start_ns, end_ns=None, value=None):
+        """
+        Record one completed span of the calling thread.
+
+        Args:
+            name: Stage name ("notify", "parse", "detect", "csv_flush", "plot_redraw", ...)
+            start_ns: time.perf_counter_ns() when the stage started
+            end_ns: When it ended (default: now)
+            value: Optional number shown with the span (bytes, packets, rows; see
+                VALUE_NAMES). Kept as a plain number so recording stays cheap.
+        """
+        if end_ns is None:
+            end_ns = time.perf_counter_ns()
+        try:
+            events = self._local.events
+        except AttributeError:
+            events = self._events()
+        if len(events) < MAX_EVENTS_PER_THREAD:
+            events.append((name, start_ns, end_ns, value))
+        else:
+            self.dropped += 1
+
+    def clear(self):
+        for _, _, events in self._buffers:
+            events.clear()
+        self.dropped = 0
+
+    def trace_events(self):
+        """All spans as Chrome Trace Event dicts ("X" events, times in µs)."""
+        pid = os.getpid()
+        with self._register_lock:
+            buffers = list(self._buffers)
+        trace = []
+        for tid, thread_name, events in buffers:
+            trace.append(
+                {
+                    "name": "thread_name",
+                    "ph": "M",
+                    "pid": pid,
+                    "tid": tid,
+                    "args": {"name": thread_name},
+                }
+            )
+            for name, start_ns, end_ns, value in list(events):
+                event = {
+                    "name": name,
+                    "ph": "X",
+                    "pid": pid,
+                    "tid": tid,
+                    "ts": (start_ns - self.epoch_ns) / 1000.0,
+                    "dur": (end_ns - start_ns) / 1000.0,
+                }
+                if value is not None:
+                    event["args"] = {VALUE_NAMES.get(name, "value"): value}
+                trace.append(event)
+        return trace
+
+    def dump(self, path):
+        """Write the Chrome Trace Event JSON file and return the number of spans in it."""
+        events = self.trace_events()
+        with open(path, "w") as f:
+            json.dump(
+                {
+                    "traceEvents": events,
+                    "displayTimeUnit": "ms",
+                    "otherData": {"dropped_spans": self.dropped},
+                },
+                f,
+            )
+        spans = sum(1 for event in events if event["ph"] == "X")
+        print(f"🧵 Trace with {spans} spans saved to {path} (open in ui.perfetto.dev)")
+        return spans
+
+
+# Shared by every instrumented module; start_tracing() switches it on
+tracer = Tracer()
+
+
+class TraceDump(Sink):
+    """Writes the trace to `path` (trace.json) when the session ends."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def close(self):
+        tracer.dump(self.path)
+
+
+def start_tracing(config, output_dir, session=None):
+    """
+    Turn tracing on if heartrate_config "trace" is true or ECG_TRACE=1 is set (scripts
+    also accept --trace). The trace is written to <output_dir>/trace.json when the session
+    ends, or at exit when no session is given (multi-device / multi-port runs).
+
+    Returns:
+        True if tracing was turned on
+    """
+    if not (config.trace or os.environ.get("ECG_TRACE") == "1"):
+        return False
+    tracer.enable()
+    path = os.path.join(output_dir, "trace.json")
+    if session is not None:
+        session.add_sink(TraceDump(path))
+    else:
+        atexit.register(tracer.dump, path)
+    print("🧵 Tracing enabled")
+    return True
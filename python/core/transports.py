@@ -0,0 +1,351 @@
+# classes included: Transport, SerialTransport, TCPTransport, ReplayTransport
+# functions included: detect_serial_ports
+# note: byte sources for StreamingSession. BLETransport lives in ble_transport.py so that
+# bleak is only imported by the scripts that actually use BLE.
+
+import csv
+import os
+import selectors
+import socket
+
+from python.core.clock import SYSTEM_CLOCK
+from python.core.data_handling import encode_packet
+
+
+class Transport:
+    """
+    Base class for anything that delivers gateway bytes to a StreamingSession.
+
+    open()  connects and tells the device to start streaming (returns True on success)
+    read()  returns the bytes that arrived within `timeout` seconds (b"" if none), or
+            None once the transport has nothing more to deliver
+    write() sends a command to the device
+    close() tells the device to stop streaming and releases the connection
+
+    Transports that queue data between arrival and read() set last_arrival to the
+    time.perf_counter() at which the chunk last returned by read() arrived, so the
+    session can time the queue wait. The rest leave it None (arrival = read).
+
+    Waits that are not on the device (settling, pacing) go through `clock`, which
+    StreamingSession sets to its own.
+    """
+
+    name = "transport"
+    last_arrival = None
+    clock = SYSTEM_CLOCK
+
+    def open(self):
+        return True
+
+    def read(self, timeout=0.01):
+        raise NotImplementedError
+
+    def write(self, data):
+        pass
+
+    def close(self):
+        pass
+
+    def queue_depth(self):
+        """Chunks received but not read yet (0 for transports without a queue)."""
+        return 0
+
+
+# Keywords that identify the ESP32's USB-UART bridge in the port description
+SERIAL_PORT_KEYWORDS = ["usb", "serial", "ch340", "cp210", "ftdi"]
+
+
+def detect_serial_ports():
+    """
+    Return every serial port that looks like an ESP32 gateway (same matching rules as the
+    detect_port() helpers in the flashing and collection scripts). ECG_SERIAL_PORT (one
+    path, or several separated by commas) overrides the detection, e.g. to point the
+    scripts at python.simulation.esp32_gateway.
+    """
+    import serial.tools.list_ports
+
+    if os.environ.get("ECG_SERIAL_PORT"):
+        return [port for port in os.environ["ECG_SERIAL_PORT"].split(",") if port]
+
+    found = []
+    for p in serial.tools.list_ports.comports():
+        # p.device = /dev/cu.usbserial-0001, p.description = CP2102 USB to UART Bridge Controller
+        if "usbserial" in p.device or any(
+            keyword in (p.description or "").lower() for keyword in SERIAL_PORT_KEYWORDS
+        ):
+            found.append(p.device)
+    return found
+
+
+class SerialTransport(Transport):
+    """
+    USB/UART connection to the gateway firmware (gateway_template.ino).
+
+    The port is opened lazily in open(), auto-detected if none was given. read() blocks
+    on the port's file descriptor with a selector instead of polling in_waiting, and
+    drains everything that is available in one os.read() call. Platforms without
+    selectable serial handles (Windows) fall back to a blocking pyserial read.
+    """
+
+    name = "usb"
+    CHUNK_SIZE = 65536
+
+    def __init__(self, port=None, baudrate=115200, settle_time=2.0):
+        self.port = port
+        self.baudrate = baudrate
+        self.settle_time = settle_time
+        self.ser = None
+        self._fd = None
+        self._selector = None
+
+    def open(self):
+        if not self.open_port():
+            return False
+        self.clock.sleep(
+            self.settle_time
+        )  # Wait for connection to stabilize (ESP32 resets on open)
+        self.start_stream()
+        return True
+
+    def open_port(self):
+        """First half of open(): find and open the port (the ESP32 resets now)."""
+        import serial
+
+        if self.port is None:
+            ports = detect_serial_ports()
+            if not ports:
+                print("Error: Port not found.")
+                return False
+            self.port = ports[0]
+            print(f"Found port: {self.port}")
+
+        self.ser = serial.Serial(self.port, self.baudrate, timeout=0)
+        return True
+
+    def start_stream(self):
+        """Second half of open(), once the board has settled: flush and send START."""
+        # Clear any leftover data in buffers
+        self.ser.reset_input_buffer()
+        self.ser.reset_output_buffer()
+
+        try:
+            self._fd = self.ser.fileno()
+            self._selector = selectors.DefaultSelector()
+            self._selector.register(self._fd, selectors.EVENT_READ)
+        except (AttributeError, OSError, ValueError):
+            self._fd = None  # no file descriptor to wait on
+
+        self.ser.write(b"START\n")  # <--- tell firmware to start
+        print(f"START command written to MCU ({self.port})")
+
+    def fileno(self):
+        """File descriptor of the open port (for selectors or loop.add_reader)."""
+        return self._fd
+
+    def read(self, timeout=0.05):
+        if self._fd is None:
+            # Blocking read of at least one byte, then whatever else has arrived
+            self.ser.timeout = timeout
+            data = self.ser.read(1)
+            if data and self.ser.in_waiting:
+                data += self.ser.read(self.ser.in_waiting)
+            return data
+
+        if not self._selector.select(timeout):
+            return b""
+        return self.read_available()
+
+    def read_available(self):
+        """
+        Non-blocking drain of the port, for callers that already know it is readable
+        (e.g. one selector watching many ports).
+
+        Returns:
+            bytes (b"" if nothing was there), or None if the port is gone
+        """
+        try:
+            data = os.read(self._fd, self.CHUNK_SIZE)
+        except BlockingIOError:
+            return b""
+        except OSError:
+            return None  # device unplugged
+        if not data:
+            return None  # readable but empty: port closed
+        return data
+
+    def write(self, data):
+        self.ser.write(data)
+
+    def close(self):
+        if self.ser is None or not self.ser.is_open:
+            return
+        try:
+            self.ser.write(b"STOP\n")
+            self.clock.sleep(0.05)  # let firmware stop
+            self.ser.reset_input_buffer()
+            self.ser.reset_output_buffer()
+        except Exception as e:
+            print(f"Warning: Error sending STOP: {e}")
+        if self._selector is not None:
+            self._selector.close()
+            self._selector = None
+        self.ser.close()
+
+
+class TCPTransport(Transport):
+    """Gateway bytes forwarded over a TCP socket (e.g. ser2net or a network bridge)."""
+
+    name = "tcp"
+
+    def __init__(self, host, port, connect_timeout=5.0):
+        self.host = host
+        self.port = port
+        self.connect_timeout = connect_timeout
+        self.sock = None
+
+    def open(self):
+        self.sock = socket.create_connection(
+            (self.host, self.port), timeout=self.connect_timeout
+        )
+        self.sock.sendall(b"START\n")
+        return True
+
+    def read(self, timeout=0.01):
+        self.sock.settimeout(timeout)
+        try:
+            data = self.sock.recv(65536)
+        except socket.timeout:
+            return b""
+        if not data:
+            return None  # peer closed the connection
+        return data
+
+    def write(self, data):
+        self.sock.sendall(data)
+
+    def close(self):
+        if self.sock is None:
+            return
+        try:
+            self.sock.sendall(b"STOP\n")
+        except OSError:
+            pass
+        self.sock.close()
+        self.sock = None
+
+
+class ReplayTransport(Transport):
+    """
+    Feeds recorded gateway bytes back through the pipeline, one chunk per read.
+
+    Args:
+        frames: Chunks of bytes (pre-encoded frames, or raw chunks from a capture)
+        times: Optional recorded time of each chunk in seconds (only differences matter)
+        speed: None = as fast as the session consumes them (default), 1.0 = at the
+            recorded pace, N = N times faster. Pacing needs `times`. On a VirtualClock
+            the pace is in simulated time (use 1.0: it costs nothing).
+    """
+
+    name = "replay"
+
+    def __init__(self, frames, times=None, speed=None):
+        self.frames = list(frames)
+        self.times = list(times) if times is not None else None
+        self.speed = speed if times is not None else None
+        self.position = 0
+        self._start = None
+
+    @classmethod
+    def from_samples(
+        cls, samples, samples_per_packet=10, sample_interval_ms=4, speed=None
+    ):
+        """Packetize a digital dataset exactly like gateway_template.ino does."""
+        frames = []
+        times = []
+        packet_id = 1
+        usable = len(samples) - len(samples) % samples_per_packet
+        for start in range(0, usable, samples_per_packet):
+            timestamp = start * sample_interval_ms
+            frames.append(
+                encode_packet(
+                    packet_id, timestamp, samples[start : start + samples_per_packet]
+                )
+            )
+            # The gateway sends a packet once its last sample is taken
+            times.append((timestamp + samples_per_packet * sample_interval_ms) / 1000.0)
+            packet_id = packet_id + 1 if packet_id < 255 else 1
+        return cls(frames, times, speed)
+
+    @classmethod
+    def from_csv(cls, csv_path, speed=None):
+        """
+        Rebuild the frames of a previous run from its streamed_raw_packets.csv, paced by the
+        MCU packet timestamps.
+        """
+        frames = []
+        timestamps = []
+        with open(csv_path, "r", newline="") as f:
+            reader = csv.DictReader(f)
+            current_count = None
+            packet_id = timestamp = None
+            samples = []
+            for row in reader:
+                if row["Packet Count"] != current_count:
+                    if len(samples) == 10:
+                        frames.append(encode_packet(packet_id, timestamp, samples))
+                        timestamps.append(timestamp)
+                    current_count = row["Packet Count"]
+                    packet_id = int(row["Packet ID"])
+                    timestamp = int(round(float(row["Time"]) * 1000))
+                    samples = []
+                samples.append(int(row["Sample"]))
+            if len(samples) == 10:
+                frames.append(encode_packet(packet_id, timestamp, samples))
+                timestamps.append(timestamp)
+
+        # The MCU clock restarts when the firmware does (e.g. after a BLE reconnect):
+        # treat a jump backwards as no time passing
+        times = []
+        elapsed = 0.0
+        for previous, timestamp in zip([None] + timestamps, timestamps):
+            if previous is not None and timestamp > previous:
+                elapsed += (timestamp - previous) / 1000.0
+            times.append(elapsed)
+        return cls(frames, times, speed)
+
+    @classmethod
+    def from_capture(cls, capture_path, speed=None):
+        """Replay the raw chunks of a capture file (see capture.py) with their arrival times."""
+        from python.core.capture import read_capture
+
+        _, chunks = read_capture(capture_path)
+        return cls(
+            [data for _, data in chunks], [arrival for arrival, _ in chunks], speed
+        )
+
+    def duration(self):
+        """Recorded time from the first to the last chunk (0 without times)."""
+        if not self.times:
+            return 0.0
+        return self.times[-1] - self.times[0]
+
+    def read(self, timeout=0.01):
+        if self.position >= len(self.frames):
+            return None
+        if self.speed:
+            clock = self.clock
+            now = clock.perf_counter()
+            if self._start is None:
+                self._start = now
+            due = self._start + (self.times[self.position] - self.times[0]) / self.speed
+            wait = due - now
+            if wait > timeout:
+                clock.sleep(timeout)
+                return b""
+            if wait > 0:
+                clock.sleep(wait)
+            # Latency is measured in real time: simulated arrivals do not mix with it
+            self.last_arrival = None if clock.virtual else due
+        frame = self.frames[self.position]
+        self.position += 1
+        return frame
@@ -24,6 +24,9 @@ import time
 
 
 def detect_port():
+    # ECG_SERIAL_PORT overrides the detection (e.g. python.simulation.esp32_gateway --firmware=ad8232)
+    if os.environ.get("ECG_SERIAL_PORT"):
+        return os.environ["ECG_SERIAL_PORT"]
     ports = serial.tools.list_ports.comports()
     # ports.name = cu.usbserial-0001
     # ports.device = /dev/cu.usbserial-0001
@@ -1,5 +1,6 @@
 import os
 import subprocess
+import sys
 import time
 from datetime import datetime
 
@@ -17,7 +18,6 @@ from python.pre_recorded_testing_pipeline.step2_flash_firmware_usb import (
     main as generate_and_flash_firmware_usb,
 )
 
-
 # Batch processing modules
 from python.pre_recorded_testing_pipeline.step3_batchprocess import (
     main as batch_test_main,
@@ -28,7 +28,8 @@ from python.validation.compare_rpeak_bpm_ad8232 import main as compare_data_main
 
 # Output dir
 from python.pre_recorded_testing_pipeline.config import get_output_dir
-
+from python.core.config import Config
+from python.core.profiling import start_profiling
 
 # # FILE DESCRIPTION
 # CONDITION = "walk_new_electrodes_on_chest_and_ribs"  # or "movement", "post_exercise"
@@ -110,6 +111,9 @@ def run_full_pipeline():
     os.makedirs(output_dir, exist_ok=True)
 
     print(f"✅ Output directory: {output_dir}")
+    # --profile / ECG_PROFILE=1: profile of this process in <output_dir>/profile/ (written at
+    # exit); the streaming script inherits ECG_PROFILE and profiles itself
+    start_profiling(Config(), output_dir)
     # === STEP 1: Converting data to digital form ===
 
     # ADD SOMETHING HERE THAT ALLOWS USER TO ACCEPT OR REJECT COLLECTED DATASET AND TRY AGAIN OR QUIT
@@ -168,5 +172,7 @@ def run_full_pipeline():
 
 
 if __name__ == "__main__":
-
+    # Usage: python3 -m python.pre_recorded_testing_pipeline.master_controller_ad8232 [--profile]
+    if "--profile" in sys.argv:
+        os.environ["ECG_PROFILE"] = "1"  # inherited by the streaming subprocess
     run_full_pipeline()
@@ -1,5 +1,6 @@
 import os
 import subprocess
+import sys
 import time
 from datetime import datetime
 
@@ -17,7 +18,6 @@ from python.pre_recorded_testing_pipeline.step2_flash_firmware_usb import (
     main as generate_and_flash_firmware_usb,
 )
 
-
 # Batch processing modules
 from python.pre_recorded_testing_pipeline.step3_batchprocess import (
     main as batch_test_main,
@@ -28,7 +28,8 @@ from python.validation.compare_rpeak_bpm_physionet import main as compare_data_m
 
 # Output dir
 from python.pre_recorded_testing_pipeline.config import get_output_dir
-
+from python.core.config import Config
+from python.core.profiling import start_profiling
 
 # === Path to your streaming script ===
 STREAM_SCRIPT_BLE = os.path.join(os.path.dirname(__file__), "step4_stream_ble.py")
@@ -128,6 +129,9 @@ def run_full_pipeline():
     )
     output_dir = get_output_dir(patient_id, segment_id, data_transport_method.upper())
     print(f"✅ Output directory: {output_dir}")
+    # --profile / ECG_PROFILE=1: profile of this process in <output_dir>/profile/ (written at
+    # exit); the streaming script inherits ECG_PROFILE and profiles itself
+    start_profiling(Config(), output_dir)
     # === STEP 1: Generate dataset ===
     print("=== STEP 1: Generating ECG dataset ===")
     digital_dataset, r_peaks, num_peaks, inst_bpms = generate_dataset_main(
@@ -184,5 +188,7 @@ def run_full_pipeline():
 
 
 if __name__ == "__main__":
-
+    # Usage: python3 -m python.pre_recorded_testing_pipeline.master_controller_physionet [--profile]
+    if "--profile" in sys.argv:
+        os.environ["ECG_PROFILE"] = "1"  # inherited by the streaming subprocess
     run_full_pipeline()
@@ -14,12 +14,15 @@ from python.core.signal_processing import (
     AD8232_Bandpass_Simulator,
 )
 from python.core.logging import CSVLogger
+from python.core.config import Config
+from python.core.profiling import start_profiling
 
 # ====================================================================================================================================
 
 
 import csv
 import os
+import sys
 
 
 class R_peak_detector:
@@ -223,8 +226,16 @@ def main(file_name=None, output_csv_path=None, digital_dataset=None):
             file_name, output_csv_path=output_csv_path, bit_res=12, start_s=0, end_s=30
         )
 
+    # --profile / ECG_PROFILE=1: sampled CPU profile + tracemalloc snapshots in profile/
+    # (skipped when a master controller is already profiling this process)
+    profiler = start_profiling(Config(), output_csv_path, label="batch_tester")
     tester = BatchTester(fs=250, use_filter=False)
-    results = tester.run(digital_dataset)
+    try:
+        results = tester.run(digital_dataset)
+    finally:
+        # Written even if the run fails: that is when the profile is wanted most
+        if profiler is not None:
+            profiler.stop()
 
     detected_peaks = results["r_peaks"]
     bpm_history = results["instantaneous_bpm"]
@@ -250,4 +261,6 @@ def main(file_name=None, output_csv_path=None, digital_dataset=None):
 
 
 if __name__ == "__main__":
+    if "--profile" in sys.argv:
+        os.environ["ECG_PROFILE"] = "1"
     main()
@@ -0,0 +1,97 @@
+import os, sys
+
+# Add project root to Python path before importing internal packages
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+import atexit
+
+# ========= IMPORT CLASSES FROM CORE ===================================================================
+from python.core.config import Config
+from python.core.serial_hub import SerialHub
+from python.core.metrics import start_metrics
+from python.core.tracing import start_tracing
+from python.core.profiling import start_profiling
+from python.core.console import console
+
+# None = every ESP32 gateway attached to this host (or list the ports to use)
+SERIAL_PORTS = None
+BAUDRATE = 115200
+STATS_INTERVAL_S = 5.0
+
+# ========================================================================================================
+
+
+def main(output_csv_path=None, duration_sec=None):
+    """
+    Stream from every USB gateway at once, all read by one thread.
+
+    Format: python stream_multi_port_usb.py <output_path> [duration_sec] [--headless] [--trace] [--profile] [--capture]
+    Each port writes its CSVs to <output_path>/port_<name>/.
+    """
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    if len(args) > 0:
+        output_csv_path = args[0]
+    if len(args) > 1:
+        try:
+            duration_sec = int(args[1])
+            print(f"Recording duration set to {duration_sec} seconds")
+        except ValueError:
+            print(f"Warning: Invalid duration '{args[1]}', ignoring...")
+
+    if output_csv_path is None:
+        output_csv_path = os.path.join(os.getcwd(), "data_logs/default_run")
+
+    config = Config()
+    console.set_level(config.log_level)
+    headless = config.headless or "--headless" in sys.argv
+    config.trace = config.trace or "--trace" in sys.argv
+    config.profile = config.profile or "--profile" in sys.argv
+    config.capture_raw = config.capture_raw or "--capture" in sys.argv
+    os.makedirs(output_csv_path, exist_ok=True)
+
+    # One endpoint for all streams (label stream=<device>); final metrics.json at exit
+    metrics, exporter = start_metrics(config, output_csv_path)
+    atexit.register(exporter.close)
+    # --trace: per-thread timeline in trace.json (chrome://tracing / ui.perfetto.dev)
+    start_tracing(config, output_csv_path)
+    # --profile: sampled CPU profile + tracemalloc snapshots in profile/
+    start_profiling(config, output_csv_path)
+
+    hub = SerialHub(
+        config,
+        output_csv_path,
+        ports=SERIAL_PORTS,
+        baudrate=BAUDRATE,
+        duration_sec=duration_sec,
+        plot=not headless,
+        metrics=metrics,
+    )
+
+    if headless:
+        thread = hub.start()
+        try:
+            while thread.is_alive():
+                thread.join(timeout=STATS_INTERVAL_S)
+                hub.print_stats()
+        except KeyboardInterrupt:
+            print("\nInterrupted, stopping all ports...")
+            hub.stop()
+        hub.join_loggers()
+        hub.print_stats()
+        sys.exit(0)
+
+    # The window needs the plot buffers, so open the ports before building it
+    from python.core.live_plot import run_live_dashboard
+
+    if not hub.open():
+        sys.exit(1)
+    plot_buffers = {stream.label: stream.plot_buffer for stream in hub.streams}
+    exit_code = run_live_dashboard(hub, plot_buffers, loggers=hub.loggers)
+    hub.print_stats()
+    sys.exit(exit_code)
+
+
+if __name__ == "__main__":
+    main()
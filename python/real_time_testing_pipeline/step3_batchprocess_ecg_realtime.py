@@ -11,13 +11,15 @@ from python.core.signal_processing import (
     AD8232_Bandpass_Simulator,
 )
 from python.core.logging import CSVLogger
+from python.core.config import Config
+from python.core.profiling import start_profiling
 
 # ====================================================================================================================================
 
 
 import csv
 import os
-
+import sys
 
 # ----------------------------
 # CSV Data Loader
@@ -133,8 +135,16 @@ def main(csv_file_path=None, output_csv_path=None):
 
     # Run batch processing
     print(f"Running batch processing on {len(digital_dataset)} samples...")
+    # --profile / ECG_PROFILE=1: sampled CPU profile + tracemalloc snapshots in profile/
+    # (skipped when a master controller is already profiling this process)
+    profiler = start_profiling(Config(), output_csv_path, label="batch_tester")
     tester = BatchTester(fs=250, use_filter=False)
-    results = tester.run(digital_dataset)
+    try:
+        results = tester.run(digital_dataset)
+    finally:
+        # Written even if the run fails: that is when the profile is wanted most
+        if profiler is not None:
+            profiler.stop()
 
     detected_peaks = results["r_peaks"]
     bpm_history = results["instantaneous_bpm"]
@@ -160,4 +170,6 @@ def main(csv_file_path=None, output_csv_path=None):
 
 
 if __name__ == "__main__":
+    if "--profile" in sys.argv:
+        os.environ["ECG_PROFILE"] = "1"
     main()
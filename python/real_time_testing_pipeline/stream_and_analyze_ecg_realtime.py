@@ -1,5 +1,6 @@
 import os
 import subprocess
+import sys
 import time
 from datetime import datetime
 
@@ -22,6 +23,8 @@ from python.validation.compare_rpeak_bpm_ad8232_livestreamed import (
     main as compare_ad8232_data_main_livestreamed,
 )
 from python.real_time_testing_pipeline.config import get_output_dir
+from python.core.config import Config
+from python.core.profiling import start_profiling
 
 # SAMPLING RATE HARD-CODED FOR NOW - CAN BE CHANGED TO BE USER-DETERMINED LATER
 SAMPLING_RATE = 250
@@ -229,6 +232,9 @@ def run_full_pipeline():
     os.makedirs(output_dir, exist_ok=True)
 
     print(f"Output directory for data logs: {output_dir}")
+    # --profile / ECG_PROFILE=1: profile of this process in <output_dir>/profile/ (written at
+    # exit); the streaming script inherits ECG_PROFILE and profiles itself
+    start_profiling(Config(), output_dir)
 
     # ask user to whether or not to flash firmware to ESP32 - step can be skipped if firmware is already uploaded to ESP32
     flash_firmware_yn = (
@@ -290,5 +296,7 @@ def run_full_pipeline():
 
 
 if __name__ == "__main__":
-
+    # Usage: python3 -m python.real_time_testing_pipeline.stream_and_analyze_ecg_realtime [--profile]
+    if "--profile" in sys.argv:
+        os.environ["ECG_PROFILE"] = "1"  # inherited by the streaming subprocess
     run_full_pipeline()
@@ -0,0 +1,101 @@
+import os, sys
+
+# Add project root to Python path before importing internal packages
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+import asyncio
+import atexit
+
+# ========= IMPORT CLASSES FROM CORE ===================================================================
+from python.core.config import Config
+from python.core.multi_device import MultiDeviceBLEManager, run_dashboard
+from python.core.metrics import start_metrics
+from python.core.tracing import start_tracing
+from python.core.profiling import start_profiling
+from python.core.console import console
+from python.core.ble_transport import bleak_classes
+
+# ========================================================================================================
+
+
+def main(output_csv_path=None, duration_sec=None):
+    """
+    Record from every ECG gateway in range at once (one asyncio loop, one session per device).
+
+    Format: python stream_multi_device_ble.py <output_path> [duration_sec] [--headless] [--trace] [--profile] [--capture] [--max-devices=N]
+    Each device writes its CSVs to <output_path>/device_<address>/.
+    """
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    if len(args) > 0:
+        output_csv_path = args[0]
+    if len(args) > 1:
+        try:
+            duration_sec = int(args[1])
+            print(f"Recording duration set to {duration_sec} seconds")
+        except ValueError:
+            print(f"Warning: Invalid duration '{args[1]}', ignoring...")
+
+    max_devices = None
+    for arg in sys.argv[1:]:
+        if arg.startswith("--max-devices="):
+            max_devices = int(arg.split("=", 1)[1])
+
+    if output_csv_path is None:
+        output_csv_path = os.path.join(os.getcwd(), "data_logs/default_run")
+
+    config = Config()
+    console.set_level(config.log_level)
+    headless = config.headless or "--headless" in sys.argv
+    config.trace = config.trace or "--trace" in sys.argv
+    config.profile = config.profile or "--profile" in sys.argv
+    config.capture_raw = config.capture_raw or "--capture" in sys.argv
+    os.makedirs(output_csv_path, exist_ok=True)
+
+    # One endpoint for all streams (label stream=<device>); final metrics.json at exit
+    metrics, exporter = start_metrics(config, output_csv_path)
+    atexit.register(exporter.close)
+    # --trace: per-thread timeline in trace.json (chrome://tracing / ui.perfetto.dev)
+    start_tracing(config, output_csv_path)
+    # --profile: sampled CPU profile + tracemalloc snapshots in profile/
+    start_profiling(config, output_csv_path)
+
+    # ECG_BLE_STANDIN=1 (+ ECG_BLE_STANDIN_DEVICES=N): simulated ESP32s instead of the radio
+    scanner_class, client_class = bleak_classes()
+    manager = MultiDeviceBLEManager(
+        config,
+        output_csv_path,
+        max_devices=max_devices,
+        scanner_class=scanner_class,
+        client_class=client_class,
+        duration_sec=duration_sec,
+        plot=not headless,
+        metrics=metrics,
+    )
+
+    if headless:
+
+        async def run_headless():
+            dashboard = asyncio.create_task(run_dashboard(manager))
+            results = await manager.run()
+            if not results:
+                dashboard.cancel()
+            else:
+                await dashboard
+            return 0 if any(results.values()) else 1
+
+        try:
+            sys.exit(asyncio.run(run_headless()))
+        except KeyboardInterrupt:
+            print("\nInterrupted, streams stopped.")
+            sys.exit(0)
+
+    # One stacked plot per device, sharing the streaming loop
+    from python.core.live_plot import run_dashboard_async
+
+    sys.exit(run_dashboard_async(manager))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,445 @@
+# classes included: LinkModel, StandinDevice, StandinBackend
+# functions included: bleak_classes
+# note: in-process stand-in for the BLE gateway firmware (gateway_template_ble_version.ino).
+# StandinBackend.scanner_class / client_class are drop-in replacements for BleakScanner /
+# BleakClient, so the streaming code can run with no radio and no ESP32. A LinkModel adds
+# what the radio does to the notifications (connection events, MTU, losses, dropouts).
+# Scripts and tests/ble switch to it with ECG_BLE_STANDIN=1 (see bleak_classes).
+
+import asyncio
+import os
+import random
+import time
+
+from python.core.data_handling import encode_packet
+from python.tests.ble.ble_config import (
+    TARGET_DEVICE_NAME,
+    ECG_SERVICE_UUID,
+    ECG_DATA_CHARACTERISTIC_UUID,
+    ECG_COMMAND_CHARACTERISTIC_UUID,
+)
+
+# startStreaming(): 100 ms trigger pulse, two LED blinks, 3 s for the BLE stack to settle
+FIRMWARE_START_DELAY_S = 4.6
+# START_SIMPLE mode (test_ble_simple.py): one text message every 2 s
+SIMPLE_MESSAGE_INTERVAL_S = 2.0
+USER_DESCRIPTION_UUID = "00002901-0000-1000-8000-00805f9b34fb"
+CCCD_UUID = "00002902-0000-1000-8000-00805f9b34fb"
+
+
+class LinkModel:
+    """
+    What the BLE link does to the firmware's notifications. Without one, every packet is
+    delivered the moment it is sent.
+
+    Args:
+        connection_interval: Seconds between connection events (7.5 ms - 4 s; macOS picks
+            15-30 ms). Notifications queue on the ESP32 and arrive together at the next
+            event. None = no batching.
+        max_per_event: Notifications one connection event can carry; more than that
+            overflow the ESP32's notify buffer and are lost
+        mtu: ATT MTU; a notification carries at most mtu - 3 bytes and the rest of the
+            packet is cut off (23 = no MTU exchange). None = the firmware's 512.
+        drop_rate: Probability that a notification is lost on air
+        disconnects_per_hour: Mean rate of spontaneous link losses
+        supervision_timeout: Seconds from the radio going quiet to Bleak reporting the
+            disconnect (no notifications meanwhile)
+        down_for: Seconds the device stays unreachable after a spontaneous disconnect
+        seed: Seed of the random drops and disconnects, so a run can be repeated
+    """
+
+    def __init__(
+        self,
+        connection_interval=None,
+        max_per_event=4,
+        mtu=None,
+        drop_rate=0.0,
+        disconnects_per_hour=0.0,
+        supervision_timeout=2.0,
+        down_for=1.0,
+        seed=0,
+    ):
+        self.connection_interval = connection_interval
+        self.max_per_event = max_per_event
+        self.mtu = mtu
+        self.drop_rate = drop_rate
+        self.disconnects_per_hour = disconnects_per_hour
+        self.supervision_timeout = supervision_timeout
+        self.down_for = down_for
+        self.random = random.Random(seed)
+
+    @classmethod
+    def from_spec(cls, spec):
+        """
+        Build from "key=value,..." (ECG_BLE_LINK), e.g.
+        "interval=0.03,mtu=23,drop=0.01,disconnects=6,seed=1".
+        """
+        names = {
+            "interval": "connection_interval",
+            "drop": "drop_rate",
+            "disconnects": "disconnects_per_hour",
+        }
+        kwargs = {}
+        for item in spec.split(","):
+            if not item.strip():
+                continue
+            key, value = item.split("=", 1)
+            key = names.get(key.strip(), key.strip())
+            kwargs[key] = (
+                int(value) if key in ("max_per_event", "mtu", "seed") else float(value)
+            )
+        return cls(**kwargs)
+
+    def payload(self, frame):
+        if self.mtu is not None and len(frame) > self.mtu - 3:
+            return frame[: self.mtu - 3]
+        return frame
+
+    def event_time(self, send_time, anchor):
+        """Time of the first connection event at or after send_time."""
+        if not self.connection_interval:
+            return send_time
+        events = -(-(send_time - anchor) // self.connection_interval)  # ceil
+        return anchor + events * self.connection_interval
+
+    def lost(self):
+        return self.drop_rate > 0 and self.random.random() < self.drop_rate
+
+    def disconnects(self, elapsed):
+        """True if the link fails during the next `elapsed` seconds."""
+        if self.disconnects_per_hour <= 0:
+            return False
+        return self.random.random() < self.disconnects_per_hour * elapsed / 3600.0
+
+
+class StandinDevice:
+    """
+    One simulated ESP32. After START it notifies one 28-byte packet every packet_interval
+    seconds, built from `samples` the same way the firmware packetizes its dataset.
+
+    By default every START replays the dataset from the beginning, like
+    gateway_template_ble_version.ino. With live=True the device behaves like a board
+    sampling a real sensor (real_time_streaming_ble.ino): it keeps its place across
+    reconnects, and whatever it sampled while the link was down is lost.
+
+    Args (besides the above):
+        link: LinkModel applied to the notifications (None = ideal link)
+        start_delay: Seconds from START to the first packet (the firmware takes
+            FIRMWARE_START_DELAY_S; 0 keeps tests and benchmarks short)
+    """
+
+    def __init__(
+        self,
+        samples,
+        name=TARGET_DEVICE_NAME,
+        address="EC:60:00:00:00:01",
+        packet_interval=0.040,
+        connect_delay=0.05,
+        live=False,
+        link=None,
+        start_delay=0.0,
+    ):
+        self.samples = list(samples)
+        self.name = name
+        self.address = address
+        self.packet_interval = packet_interval
+        self.connect_delay = connect_delay
+        self.link = link
+        self.start_delay = start_delay
+        self.notify_times = {}  # packet timestamp (ms) -> time.perf_counter() at notify
+        self.packets_sent = 0
+        self.packets_dropped = 0  # lost on air or in a full notify buffer
+        self.packets_truncated = 0  # cut to the MTU
+        self.disconnects = 0  # spontaneous link losses from the LinkModel
+        self.live = live
+        self.cursor = 0  # next packet to sample (live devices only)
+        self.lost_at = None  # time.monotonic() when the link dropped
+
+    def frames(self, first_packet=0):
+        usable = len(self.samples) - len(self.samples) % 10
+        for start in range(first_packet * 10, usable, 10):
+            packet_id = (start // 10) % 255 + 1  # 1..255, wraps like the firmware
+            yield start * 4, encode_packet(
+                packet_id, start * 4, self.samples[start : start + 10]
+            )
+
+
+class StandinBackend:
+    """
+    A set of StandinDevices plus Bleak-compatible scanner/client classes bound to them.
+
+    Args:
+        devices: StandinDevices in range
+        scan_delay: Seconds before a scan sees a device (a real scan waits for an
+            advertisement, typically one to a few seconds)
+    """
+
+    def __init__(self, devices, scan_delay=0.0):
+        self.devices = {device.address: device for device in devices}
+        self.scan_delay = scan_delay
+        self.clients = []  # every client created, so links can be dropped from outside
+        self.unavailable_until = {}  # address -> time.monotonic() when it can reconnect
+        backend = self
+
+        class StandinBLEDevice:
+            def __init__(self, device):
+                self.name = device.name
+                self.address = device.address
+
+        class StandinDescriptor:
+            def __init__(self, uuid, handle):
+                self.uuid = uuid
+                self.handle = handle
+
+        class StandinCharacteristic:
+            def __init__(self, uuid, properties, description, handle):
+                self.uuid = uuid
+                self.properties = properties
+                self.description = description
+                self.descriptors = [
+                    StandinDescriptor(USER_DESCRIPTION_UUID, handle + 1)
+                ]
+                if "notify" in properties:
+                    self.descriptors.append(StandinDescriptor(CCCD_UUID, handle + 2))
+
+        class StandinService:
+            # The GATT table set up in the firmware's setup()
+            uuid = ECG_SERVICE_UUID
+            characteristics = [
+                StandinCharacteristic(
+                    ECG_DATA_CHARACTERISTIC_UUID, ["notify"], "ECG Test Data", 10
+                ),
+                StandinCharacteristic(
+                    ECG_COMMAND_CHARACTERISTIC_UUID,
+                    ["write"],
+                    "Commands (START_SIMPLE, STOP_SIMPLE, START_STREAM, STOP_STREAM)",
+                    20,
+                ),
+            ]
+
+        class StandinScanner:
+            @staticmethod
+            async def find_device_by_name(name, timeout=10.0):
+                for device in backend.devices.values():
+                    if device.name == name and backend.scan_delay <= timeout:
+                        await asyncio.sleep(backend.scan_delay)
+                        return StandinBLEDevice(device)
+                await asyncio.sleep(timeout)
+                return None
+
+            @staticmethod
+            async def discover(timeout=5.0):
+                if backend.scan_delay > timeout:
+                    await asyncio.sleep(timeout)
+                    return []
+                await asyncio.sleep(backend.scan_delay)
+                return [StandinBLEDevice(d) for d in backend.devices.values()]
+
+        class StandinClient:
+            def __init__(self, address, disconnected_callback=None, **kwargs):
+                self.address = address
+                self.device = backend.devices.get(address)
+                self.is_connected = False
+                self.disconnected_callback = disconnected_callback
+                self._callback = None
+                self._stream_task = None
+                self.services = [StandinService()]
+                backend.clients.append(self)
+
+            async def __aenter__(self):
+                await self.connect()
+                return self
+
+            async def __aexit__(self, *exc_info):
+                await self.disconnect()
+
+            async def connect(self, **kwargs):
+                if self.device is None:
+                    raise OSError(f"Device {self.address} not found")
+                await asyncio.sleep(self.device.connect_delay)
+                if time.monotonic() < backend.unavailable_until.get(self.address, 0.0):
+                    raise OSError(f"Device {self.address} is out of range")
+                self.is_connected = True
+                return True
+
+            async def disconnect(self):
+                await self._stop_stream()
+                self.is_connected = False
+                return True
+
+            async def start_notify(self, char_uuid, callback, **kwargs):
+                self._callback = callback
+
+            async def stop_notify(self, char_uuid):
+                self._callback = None
+
+            async def read_gatt_descriptor(self, handle):
+                for characteristic in StandinService.characteristics:
+                    if characteristic.descriptors[0].handle == handle:
+                        return bytearray(characteristic.description.encode("utf-8"))
+                raise OSError(f"No descriptor with handle {handle}")
+
+            async def write_gatt_char(self, char_uuid, data, response=None):
+                command = bytes(data).strip()
+                if command == b"START_SIMPLE":
+                    await self._stop_stream()
+                    self._stream_task = asyncio.create_task(self._simple())
+                elif command.startswith(b"START"):  # START / START_STREAM
+                    await self._stop_stream()
+                    self._stream_task = asyncio.create_task(self._stream())
+                elif command.startswith(b"STOP"):
+                    await self._stop_stream()
+
+            async def _stop_stream(self):
+                if self._stream_task is not None:
+                    self._stream_task.cancel()
+                    try:
+                        await self._stream_task
+                    except asyncio.CancelledError:
+                        pass
+                    self._stream_task = None
+
+            async def _simple(self):
+                count = 0
+                while True:
+                    await asyncio.sleep(SIMPLE_MESSAGE_INTERVAL_S)
+                    count += 1
+                    if self._callback is not None and self.is_connected:
+                        message = f"Message {count}: Received".encode("utf-8")
+                        self._callback(None, bytearray(message))
+
+            async def _stream(self):
+                device = self.device
+                link = device.link
+                loop = asyncio.get_running_loop()
+                if device.start_delay:
+                    await asyncio.sleep(device.start_delay)
+                next_time = loop.time()
+                anchor = next_time  # first connection event after START
+                event = None
+                in_event = 0
+                first_packet = 0
+                if device.live:
+                    first_packet = device.cursor
+                    if device.lost_at is not None:
+                        down = time.monotonic() - device.lost_at
+                        first_packet += int(down / device.packet_interval)
+                        device.lost_at = None
+                for index, (timestamp, frame) in enumerate(
+                    device.frames(first_packet), first_packet
+                ):
+                    device.cursor = index + 1
+                    next_time += device.packet_interval
+                    if link is None:
+                        await asyncio.sleep(max(0.0, next_time - loop.time()))
+                    else:
+                        if link.disconnects(device.packet_interval):
+                            # The radio goes quiet; Bleak notices after the supervision timeout
+                            device.disconnects += 1
+                            loop.call_later(
+                                link.supervision_timeout,
+                                backend.drop_link,
+                                device.address,
+                                link.down_for,
+                            )
+                            return
+                        # Queued on the ESP32 until the next connection event
+                        due = link.event_time(next_time, anchor)
+                        if due != event:
+                            event, in_event = due, 0
+                        in_event += 1
+                        if in_event > link.max_per_event or link.lost():
+                            device.packets_dropped += 1
+                            continue
+                        await asyncio.sleep(max(0.0, due - loop.time()))
+                        payload = link.payload(frame)
+                        if len(payload) < len(frame):
+                            device.packets_truncated += 1
+                        frame = payload
+                    if self._callback is None or not self.is_connected:
+                        continue
+                    device.notify_times[timestamp] = time.perf_counter()
+                    device.packets_sent += 1
+                    self._callback(None, bytearray(frame))
+
+        self.scanner_class = StandinScanner
+        self.client_class = StandinClient
+
+    def drop_link(self, address=None, down_for=0.0):
+        """
+        Simulate a radio dropout (call on the event loop): every connected client of the
+        device loses its link, Bleak's disconnected_callback fires, and reconnects fail
+        for `down_for` seconds. A live device keeps sampling meanwhile (see StandinDevice).
+        """
+        address = address or next(iter(self.devices))
+        self.devices[address].lost_at = time.monotonic()
+        self.unavailable_until[address] = time.monotonic() + down_for
+        for client in self.clients:
+            if client.address == address and client.is_connected:
+                client.is_connected = False
+                client._callback = None
+                if client._stream_task is not None:
+                    client._stream_task.cancel()
+                    client._stream_task = None
+                if client.disconnected_callback is not None:
+                    client.disconnected_callback(client)
+
+
+_backend = None
+
+
+def bleak_classes():
+    """
+    BleakScanner / BleakClient, or the stand-in's classes when ECG_BLE_STANDIN is set:
+      ECG_BLE_STANDIN=1                 30 s of synthetic ECG (shaped by heartrate_config)
+      ECG_BLE_STANDIN=<dataset>         "Digital Dataset.txt" or a one-column CSV
+      ECG_BLE_STANDIN_DEVICES=N         N devices (for the multi-device script)
+      ECG_BLE_LINK=interval=0.03,...    LinkModel.from_spec (one seeded model per device)
+    The firmware's start delay is kept. Every call in a process shares one backend.
+
+    Returns:
+        (scanner_class, client_class)
+    """
+    global _backend
+    source = os.environ.get("ECG_BLE_STANDIN")
+    if not source:
+        from bleak import BleakScanner, BleakClient
+
+        return BleakScanner, BleakClient
+
+    if _backend is None:
+        if source == "1":
+            from python.core.config import Config
+            from python.core.synthetic import SyntheticECG
+
+            samples, _ = SyntheticECG.from_config(Config()).generate(seconds=30)
+            samples = samples.tolist()
+        else:
+            from python.simulation.esp32_gateway import load_dataset
+
+            samples = load_dataset(source)
+        link_spec = os.environ.get("ECG_BLE_LINK")
+        devices = []
+        for i in range(int(os.environ.get("ECG_BLE_STANDIN_DEVICES", "1"))):
+            link = None
+            if link_spec:
+                link = LinkModel.from_spec(link_spec)
+                link.random.seed(link.random.random() + i)  # independent per device
+            devices.append(
+                StandinDevice(
+                    samples,
+                    name=(
+                        TARGET_DEVICE_NAME
+                        if i == 0
+                        else f"{TARGET_DEVICE_NAME} {i + 1}"
+                    ),
+                    address=f"EC:60:00:00:00:{i + 1:02X}",
+                    link=link,
+                    start_delay=FIRMWARE_START_DELAY_S,
+                )
+            )
+        _backend = StandinBackend(devices)
+        print(
+            f"🧪 BLE stand-in: {len(devices)} simulated device(s), link {link_spec or 'ideal'}"
+        )
+    return _backend.scanner_class, _backend.client_class
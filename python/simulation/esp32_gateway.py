@@ -0,0 +1,286 @@
+# classes included: SimulatedGateway
+# functions included: load_dataset
+# note: stand-in for an ESP32 on a USB cable, for the serial streaming path. It creates a Linux
+# pseudo-terminal pair and behaves like the firmware on the board side: the serial scripts open
+# the slave path (/dev/pts/N) exactly as they would open /dev/cu.usbserial-0001. Two firmwares:
+#   "gateway"  gateway_template.ino - boot text, START/STOP, 28-byte packets of a dataset
+#   "ad8232"   stream_ad8232_data_usb.ino - banner, START/STOP, one ASCII sample per line
+# Point the scripts at it with ECG_SERIAL_PORT=<slave path> (see transports.detect_serial_ports).
+
+import os
+import select
+import sys
+import threading
+import time
+import tty
+
+from python.core.data_handling import encode_packet
+
+SAMPLE_INTERVAL_S = 0.004  # 250 Hz
+PACKET_SAMPLES = 10
+# startStreaming() holds the loop for the trigger pulse and LED blinks before sampling
+START_DELAY_S = 2.1
+
+
+def load_dataset(path):
+    """
+    Read a digital dataset: "Digital Dataset.txt" (comma-separated values on one line) or a
+    one-column CSV such as "ECG Digital Dataset.csv" or an AD8232 recording (header skipped).
+
+    Returns:
+        list of int ADC values
+    """
+    samples = []
+    with open(path, "r") as f:
+        for line in f:
+            for token in line.replace(",", " ").split():
+                try:
+                    samples.append(int(float(token)))
+                except ValueError:
+                    continue  # header / column name
+                if not path.endswith(".txt"):
+                    break  # CSV: first column only
+    return samples
+
+
+class SimulatedGateway:
+    """
+    Args:
+        samples: Digital dataset streamed after START (the firmware's heartbeat_signal,
+            or what the AD8232 firmware "reads" from its ADC)
+        firmware: "gateway" or "ad8232"
+        speed: 1.0 = real 250 Hz; N = N times faster (packet timestamps follow, so the
+            stream looks like an N times faster MCU clock)
+        start_delay: Seconds from START to the first sample (gateway firmware; divided
+            by speed)
+        boot_delay: Seconds from the port being opened to the boot text (default 0.3 s, or
+            the AD8232 firmware's delay(1000)). Opening the port resets a real ESP32 (DTR),
+            so every open restarts the simulated board too.
+        loop: Start the dataset over when it ends instead of stopping like the firmware
+    """
+
+    def __init__(
+        self,
+        samples,
+        firmware="gateway",
+        speed=1.0,
+        start_delay=START_DELAY_S,
+        boot_delay=None,
+        loop=False,
+    ):
+        if firmware not in ("gateway", "ad8232"):
+            raise ValueError(f"Unknown firmware '{firmware}'")
+        self.samples = list(samples)
+        self.firmware = firmware
+        self.speed = speed
+        self.start_delay = start_delay / speed
+        if boot_delay is None:
+            boot_delay = 1.0 if firmware == "ad8232" else 0.3
+        self.boot_delay = boot_delay
+        self.loop = loop
+        self.port = None
+        self.packets_sent = 0
+        self.samples_sent = 0
+        self.bytes_dropped = 0  # written while the host was not reading fast enough
+        self.boots = 0
+        self._master = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    # ------------------------------------------------------------------ lifecycle
+    def start(self):
+        """Create the pty pair and run the board in a thread. Returns the port path."""
+        master, slave = os.openpty()
+        tty.setraw(slave)  # no echo or newline translation, like a USB-UART bridge
+        self.port = os.ttyname(slave)
+        # Only the host keeps the slave open, so the board notices opens and closes
+        os.close(slave)
+        os.set_blocking(master, False)
+        self._master = master
+        self._thread = threading.Thread(
+            target=self._run, name="esp32-simulator", daemon=True
+        )
+        self._thread.start()
+        return self.port
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+        if self._master is not None:
+            os.close(self._master)
+            self._master = None
+
+    # ------------------------------------------------------------------ board
+    def _millis(self, now):
+        return int((now - self._power_on) * 1000 * self.speed) & 0xFFFFFFFF
+
+    def _write(self, data):
+        try:
+            written = os.write(self._master, data)
+        except BlockingIOError:
+            written = 0
+        except OSError:
+            return  # host closed the port mid-write
+        self.bytes_dropped += len(data) - written
+
+    def _reset(self, now):
+        """Board reset (port opened): boot text after boot_delay, not streaming."""
+        self._power_on = now
+        self._boot_at = now + self.boot_delay
+        self._streaming = False
+        self._command = b""
+        self._pending = []  # commands that arrive while booting wait in the UART buffer
+        self.boots += 1
+
+    def _boot(self, now):
+        self._boot_at = None
+        if self.firmware == "gateway":
+            # setup(): esp_reset_reason() is 1 (ESP_RST_POWERON) after a DTR reset
+            self._write(f"RESET_REASON:1\r\nBOOT_TIME:{self._millis(now)}\r\n".encode())
+        else:
+            self._write(
+                b"=== ESP32 ECG STREAMER READY (USB) ===\r\n"
+                b"Send 'START' command to begin data collection\r\n"
+                b"Send 'STOP' command to end data collection\r\n"
+                b"========================================\r\n"
+            )
+        for command in self._pending:
+            self._on_command(command, now)
+        self._pending = []
+
+    def _on_command(self, command, now):
+        command = command.strip() if self.firmware == "ad8232" else command
+        if command == b"START":
+            if self.firmware == "gateway":
+                self._packet_id = 1
+                self._cursor = 0
+                self._packet = []
+                self._next_sample = now + self.start_delay
+                self._streaming = True
+            elif not self._streaming:
+                self._write(b"--- STARTING RECORDING ---\r\n")
+                self._cursor = 0
+                self._next_sample = now
+                self._streaming = True
+        elif command == b"STOP":
+            if self.firmware == "ad8232" and self._streaming:
+                self._write(b"--- STOPPING RECORDING ---\r\n")
+            self._streaming = False
+
+    def _sample(self, now):
+        """Everything the board sampled up to `now`, as bytes to send."""
+        out = []
+        interval = SAMPLE_INTERVAL_S / self.speed
+        while self._streaming and self._next_sample <= now:
+            due = self._next_sample
+            self._next_sample += interval
+            if self._cursor >= len(self.samples):
+                if self.firmware == "gateway" and not self.loop:
+                    self._streaming = False  # addADCSampleToBuffer(): end of dataset
+                    break
+                self._cursor = 0
+            sample = self.samples[self._cursor]
+            self._cursor += 1
+            self.samples_sent += 1
+            if self.firmware == "ad8232":
+                out.append(b"%d\r\n" % sample)
+                continue
+            self._packet.append(sample & 0x0FFF)
+            if len(self._packet) == PACKET_SAMPLES:
+                out.append(
+                    encode_packet(self._packet_id, self._millis(due), self._packet)
+                )
+                self._packet = []
+                self._packet_id = self._packet_id + 1 if self._packet_id < 255 else 1
+                self.packets_sent += 1
+        return b"".join(out)
+
+    def _run(self):
+        host_open = False
+        self._streaming = False
+        self._boot_at = None
+        while not self._stop.is_set():
+            now = time.perf_counter()
+            timeout = 0.02
+            if self._streaming:
+                # At high speeds samples are sent in batches of >= 1 ms instead of spinning
+                timeout = max(0.001, min(timeout, self._next_sample - now))
+            if self._boot_at is not None:
+                timeout = max(0.0, min(timeout, self._boot_at - now))
+
+            readable, _, _ = select.select([self._master], [], [], timeout)
+            now = time.perf_counter()
+            if readable:
+                try:
+                    data = os.read(self._master, 1024)
+                except BlockingIOError:
+                    data = b""
+                except OSError:
+                    # EIO: nobody has the slave open (port closed / not opened yet)
+                    host_open = False
+                    self._streaming = False
+                    time.sleep(0.02)
+                    continue
+                if not host_open:
+                    host_open = True
+                    self._reset(now)
+                for byte in data:
+                    if byte != 0x0A:
+                        self._command += bytes([byte])
+                        continue
+                    # '\n' ends a command; loop() only reads it once setup() is done
+                    if self._boot_at is not None:
+                        self._pending.append(self._command)
+                    else:
+                        self._on_command(self._command, now)
+                    self._command = b""
+            elif not host_open:
+                # select() timing out means the hang-up is gone: the host opened the port
+                host_open = True
+                self._reset(now)
+
+            if self._boot_at is not None and now >= self._boot_at:
+                self._boot(now)
+            if self._streaming:
+                data = self._sample(now)
+                if data:
+                    self._write(data)
+
+
+if __name__ == "__main__":
+    # Usage: python3 -m python.simulation.esp32_gateway [dataset.txt|.csv] [--speed=N]
+    #                                                 [--firmware=ad8232] [--loop]
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    options = dict(
+        arg[2:].split("=", 1) if "=" in arg else (arg[2:], True)
+        for arg in sys.argv[1:]
+        if arg.startswith("--")
+    )
+    if args:
+        samples = load_dataset(args[0])
+    else:
+        from python.core.config import Config
+        from python.core.synthetic import SyntheticECG
+
+        # 30 s (7500 samples, the size of a flashed dataset) shaped by heartrate_config
+        samples, _ = SyntheticECG.from_config(Config()).generate(seconds=30)
+        samples = samples.tolist()
+    gateway = SimulatedGateway(
+        samples,
+        firmware=options.get("firmware", "gateway"),
+        speed=float(options.get("speed", 1.0)),
+        loop="loop" in options,
+    )
+    port = gateway.start()
+    print(f"🔌 Simulated ESP32 ({gateway.firmware} firmware) on {port}")
+    print(f"   export ECG_SERIAL_PORT={port}")
+    try:
+        while True:
+            time.sleep(5)
+            print(
+                f"   boots {gateway.boots} | samples sent {gateway.samples_sent} | "
+                f"bytes dropped {gateway.bytes_dropped}"
+            )
+    except KeyboardInterrupt:
+        gateway.stop()
@@ -11,10 +11,12 @@ Requirements:
 
 Usage:
     python3 python/tests/ble/test_ble_detection.py
+    ECG_BLE_STANDIN=1 python3 python/tests/ble/test_ble_detection.py   (simulated ESP32, no radio)
 """
 
 import asyncio
-from bleak import BleakScanner, BleakClient
+import os
+import sys
 
 # Import UUIDs from config
 from ble_config import (
@@ -24,6 +26,12 @@ from ble_config import (
     ECG_COMMAND_CHARACTERISTIC_UUID,
 )
 
+# ECG_BLE_STANDIN=1 runs the test against the in-process stand-in instead of an ESP32
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../..")))
+from python.simulation.ble_standin import bleak_classes
+
+BleakScanner, BleakClient = bleak_classes()
+
 
 async def test_detection_and_connection():
     """
@@ -17,6 +17,7 @@ Requirements:
 
 Usage:
     python3 python/tests/ble/test_ble_streaming.py
+    ECG_BLE_STANDIN=1 python3 python/tests/ble/test_ble_streaming.py   (simulated ESP32, no radio)
 
 Notes about this test script:
 * This script is meant to stream data from the ESP32 to the host device for 10 seconds. It is primarily
@@ -31,7 +32,8 @@ during further testing to account for longer streaming times.
 
 import asyncio
 import struct
-from bleak import BleakScanner, BleakClient
+import os
+import sys
 
 # Import UUIDs from config
 from ble_config import (
@@ -41,6 +43,12 @@ from ble_config import (
     ECG_COMMAND_CHARACTERISTIC_UUID,
 )
 
+# ECG_BLE_STANDIN=1 runs the test against the in-process stand-in instead of an ESP32
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../..")))
+from python.simulation.ble_standin import bleak_classes
+
+BleakScanner, BleakClient = bleak_classes()
+
 # Test configuration
 PACKET_SIZE = 28
 TEST_DURATION_SEC = 10  # How long to collect packets